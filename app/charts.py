@@ -0,0 +1,256 @@
+from collections import OrderedDict
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+from managers.profiling import profiler
+
+# Опис графіків вкладки "Фінансова аналітика".
+# "report" — назва звіту з managers.analytics.REPORTS або TIME_REPORTS,
+# який показує графік; "lines" — кілька ліній, по одній на стовпець таблиці;
+# "period" — підписи дат як періодів ("Q" — кварталів, "Y" — років).
+CHART_SPECS = OrderedDict([
+    ("Витрати за категоріями (стовпчиковий графік)", {
+        "report": "categories", "kind": "bar", "color": "royalblue", "rotation": 45,
+        "title": "Витрати за категоріями", "xlabel": "Категорія", "ylabel": "Сума витрат",
+    }),
+    ("Витрати за підкатегоріями (стовпчиковий графік)", {
+        "report": "subcategories", "kind": "bar", "color": "forestgreen", "rotation": 75,
+        "title": "Витрати за підкатегоріями", "xlabel": "Категорія:Підкатегорія", "ylabel": "Сума витрат",
+    }),
+    ("Витрати за категоріями (кругова діаграма)", {
+        "report": "pie", "kind": "pie",
+        "title": "Структура витрат за категоріями",
+    }),
+    ("Динаміка витрат за місяцями (лінійний графік)", {
+        "report": "monthly", "kind": "line", "color": "firebrick", "rotation": 45,
+        "title": "Динаміка витрат за місяцями", "xlabel": "Місяць", "ylabel": "Сума витрат",
+    }),
+    ("ТОП-5 найбільших витратних категорій (горизонтальний графік)", {
+        "report": "top5", "kind": "barh", "color": "orange",
+        "title": "ТОП-5 найбільших витратних категорій", "xlabel": "Сума витрат",
+    }),
+    ("Динаміка витрат за тижнями (лінійний графік)", {
+        "report": "weekly", "kind": "line", "color": "firebrick", "marker": None, "rotation": 45,
+        "title": "Динаміка витрат за тижнями", "xlabel": "Тиждень", "ylabel": "Сума витрат",
+    }),
+    ("Витрати за кварталами (стовпчиковий графік)", {
+        "report": "quarterly", "kind": "bar", "color": "steelblue", "period": "Q", "rotation": 75,
+        "title": "Витрати за кварталами", "xlabel": "Квартал", "ylabel": "Сума витрат",
+    }),
+    ("Витрати за роками (стовпчиковий графік)", {
+        "report": "yearly", "kind": "bar", "color": "teal", "period": "Y",
+        "title": "Витрати за роками", "xlabel": "Рік", "ylabel": "Сума витрат",
+    }),
+    ("Порівняння років за місяцями (лінійний графік)", {
+        "report": "yoy", "kind": "lines", "marker": ".",
+        "title": "Порівняння років за місяцями", "xlabel": "Місяць", "ylabel": "Сума витрат",
+    }),
+    ("Ковзна середня за 30 днів (лінійний графік)", {
+        "report": "rolling30", "kind": "line", "color": "darkviolet", "marker": None, "rotation": 45,
+        "title": "Середні витрати за день (вікно 30 днів)", "xlabel": "День", "ylabel": "Сума витрат",
+    }),
+    ("Ковзна середня за 90 днів (лінійний графік)", {
+        "report": "rolling90", "kind": "line", "color": "darkcyan", "marker": None, "rotation": 45,
+        "title": "Середні витрати за день (вікно 90 днів)", "xlabel": "День", "ylabel": "Сума витрат",
+    }),
+    ("Бюджет і факт наростаючим підсумком (лінійний графік)", {
+        "report": "budget", "kind": "lines", "marker": None, "rotation": 45,
+        "title": "Бюджет і факт наростаючим підсумком", "xlabel": "День", "ylabel": "Сума витрат",
+    }),
+])
+
+
+def chart_series(spec, grouped):
+    """
+    Готує підсумки до показу: підписи пар "категорія: підкатегорія"
+    і періодів ("2024Q1", "2024") для графіків із "period".
+    """
+    if isinstance(grouped.index, pd.MultiIndex):
+        grouped = grouped.copy()
+        grouped.index = [f"{cat}: {sub}" for cat, sub in grouped.index]
+    elif spec.get("period") and isinstance(grouped.index, pd.DatetimeIndex):
+        grouped = grouped.copy()
+        grouped.index = grouped.index.to_period(spec["period"]).astype(str)
+    return grouped
+
+
+def chart_labels(series):
+    """
+    Підписи графіка: за ними графік можна оновити на місці.
+    Для таблиці (кілька ліній) — підписи осі разом зі стовпцями.
+    """
+    if isinstance(series, pd.DataFrame):
+        return [list(series.index), list(series.columns)]
+    return list(series.index)
+
+
+def draw_chart(ax, spec, series):
+    """
+    Малює підготовлені chart_series підсумки на осях ax.
+    Повертає створені художники (стовпчики, лінії, сектори).
+    """
+    kind = spec["kind"]
+    values = series.to_numpy(dtype=float)
+    if kind == "lines":
+        artists = [ax.plot(series.index, values[:, i], marker=spec.get("marker", "o"),
+                           linewidth=1.5, label=str(column))[0]
+                   for i, column in enumerate(series.columns)]
+        # легенда справа від осей: не закриває ліній і не шукає місця
+        # перебором даних (loc="best"), що помітно при кожній відмальовці
+        ax.legend(fontsize="small", loc="upper left", bbox_to_anchor=(1.0, 1.0))
+    elif kind == "bar":
+        artists = ax.bar(range(len(values)), values, color=spec["color"], alpha=0.8)
+        ax.set_xticks(range(len(values)))
+        ax.set_xticklabels([str(label) for label in series.index])
+    elif kind == "barh":
+        artists = ax.barh(range(len(values)), values, color=spec["color"], alpha=0.8)
+        ax.set_yticks(range(len(values)))
+        ax.set_yticklabels([str(label) for label in series.index])
+        ax.invert_yaxis()
+    elif kind == "line":
+        artists = ax.plot(series.index, values, marker=spec.get("marker", "o"), color=spec["color"], linewidth=2)
+    else:
+        artists = ax.pie(values, labels=list(series.index), autopct='%1.1f%%', startangle=140)
+    ax.set_title(spec["title"])
+    if spec.get("xlabel"):
+        ax.set_xlabel(spec["xlabel"])
+    if spec.get("ylabel"):
+        ax.set_ylabel(spec["ylabel"])
+    if spec.get("rotation"):
+        ax.tick_params(axis='x', rotation=spec["rotation"])
+    return artists
+
+
+class _Chart:
+    def __init__(self, ax, spec, labels, artists):
+        self.ax = ax
+        self.spec = spec
+        self.labels = labels
+        self.artists = artists
+        self.position = ax.get_position()
+
+
+class ChartRenderer:
+    """
+    Малює графіки аналітики на одній постійній Figure/Canvas.
+
+    Замість нової фігури на кожне оновлення:
+    - якщо ключ (тип аналітики, фільтри, версія даних) не змінився — нічого не робить;
+    - якщо такий графік уже будувався і ще в кеші — просто показує його осі;
+    - якщо змінилися лише числа (ті самі підписи) — оновлює висоти стовпчиків
+      чи дані ліній на місці у вже побудованих осях;
+    - інакше будує нові осі. Кеш осей обмежений cache_size, тож пам'ять
+      не росте з кількістю оновлень.
+
+    Без master використовується безекранне полотно Agg (бенчмарки, звіти).
+    """
+    def __init__(self, master=None, figsize=(8, 6), dpi=100, cache_size=16):
+        self.figure = Figure(figsize=figsize, dpi=dpi)
+        if master is None:
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self.canvas = FigureCanvasAgg(self.figure)
+        else:
+            from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+            self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.cache_size = cache_size
+        self._charts = OrderedDict()  # ключ -> _Chart, у порядку використання
+        self._current = None
+        self.stats = {"unchanged": 0, "cached": 0, "updated": 0, "built": 0}
+
+    def widget(self):
+        return self.canvas.get_tk_widget()
+
+    def clear(self):
+        for chart in self._charts.values():
+            chart.ax.remove()
+        self._charts.clear()
+        self._current = None
+        self.canvas.draw_idle()
+
+    def render(self, spec, grouped, key):
+        if key == self._current:
+            self.stats["unchanged"] += 1
+            return
+
+        if key in self._charts:
+            self.stats["cached"] += 1
+            self._show(key)
+        else:
+            series = chart_series(spec, grouped)
+            reusable = self._find_reusable(spec, chart_labels(series))
+            if reusable is not None:
+                self.stats["updated"] += 1
+                with profiler.span("chart.update", rows=len(series)):
+                    self._update(self._charts[reusable], series)
+                self._charts[key] = self._charts.pop(reusable)
+                self._show(key)
+            else:
+                self.stats["built"] += 1
+                with profiler.span("chart.build", rows=len(series)):
+                    self._build(key, spec, series)
+        self._current = key
+        with profiler.span("chart.draw"):
+            self.canvas.draw()
+
+    # ---------- Внутрішнє ----------
+
+    def _find_reusable(self, spec, labels):
+        """
+        Ключ закешованого графіка того ж типу з тими самими підписами
+        (спершу поточний), який можна оновити на місці.
+        """
+        if spec["kind"] == "pie":
+            return None
+        for key in [self._current] + list(reversed(self._charts)):
+            chart = self._charts.get(key)
+            if chart is not None and chart.spec is spec and chart.labels == labels:
+                return key
+        return None
+
+    def _show(self, key):
+        for chart_key, chart in self._charts.items():
+            chart.ax.set_visible(chart_key == key)
+        chart = self._charts[key]
+        chart.ax.set_position(chart.position)
+        self._charts.move_to_end(key)
+
+    def _build(self, key, spec, series):
+        """
+        Перемальовує осі графіка того ж типу (якщо такий є в кеші)
+        або створює нові, витісняючи найдавніше використані.
+        """
+        same_kind = next((chart_key for chart_key in reversed(self._charts)
+                          if self._charts[chart_key].spec is spec), None)
+        if same_kind is not None:
+            ax = self._charts.pop(same_kind).ax
+            ax.clear()
+        else:
+            while len(self._charts) >= self.cache_size:
+                self._charts.pop(next(iter(self._charts))).ax.remove()
+            ax = self.figure.add_subplot(111)
+
+        for chart in self._charts.values():
+            chart.ax.set_visible(False)
+        ax.set_visible(True)
+        artists = draw_chart(ax, spec, series)
+        self.figure.tight_layout()
+        self._charts[key] = _Chart(ax, spec, chart_labels(series), artists)
+
+    @staticmethod
+    def _update(chart, series):
+        values = series.to_numpy(dtype=float)
+        kind = chart.spec["kind"]
+        if kind == "line":
+            chart.artists[0].set_ydata(values)
+        elif kind == "lines":
+            for i, line in enumerate(chart.artists):
+                line.set_ydata(values[:, i])
+        else:
+            for rect, value in zip(chart.artists, values):
+                if kind == "barh":
+                    rect.set_width(value)
+                else:
+                    rect.set_height(value)
+        chart.ax.relim()
+        chart.ax.autoscale_view()
@@ -1,9 +1,31 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-import pandas as pd
+from datetime import date
+from tkinter import ttk, messagebox, filedialog
 from tkcalendar import DateEntry
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+
+from app.jobs import JobRunner
+from managers.profiling import profiler
+
+ALL_CATEGORIES = "Усі категорії"
+RECORD_COLUMNS = ("Дата", "Сума", "Категорія", "Підкатегорія", "Коментар")
+# Висота рядка Treeview (див. setup_style) та запас рядків довкола видимого вікна
+RECORD_ROW_HEIGHT = 25
+RECORDS_BUFFER = 50
+# Пауза після введення в рядок пошуку, перш ніж запускати запит (мс)
+SEARCH_DELAY_MS = 200
+SEARCH_HINT = "кілька слів — усі мають бути; слово~ — нечітко"
+PROFILE_COLUMNS = ("Операція", "Кількість", "p50 мс", "p95 мс", "Макс мс", "Рядків", "Байтів")
+KEEP_RECORDS = "Не переносити (лише видалити з довідника)"
+
+
+def preload_analysis():
+    """
+    Імпортує стек аналітики (pandas, matplotlib) у фоні, поки користувач
+    працює з першою вкладкою, — відкриття аналітики потім не гальмує.
+    """
+    import matplotlib.backends.backend_tkagg  # noqa: F401
+    import app.charts  # noqa: F401
+    import managers.analytics  # noqa: F401
 
 
 class FinanceApp:
@@ -13,17 +35,34 @@ class FinanceApp:
     2. Фінансова аналітика
     3. Попередні записи
     4. Керування категоріями (адмін-вкладка)
+    5. Продуктивність (лише з увімкненим профілюванням, див. managers.profiling)
 
     Використовує CategoryManager та ExpenseManager для роботи з даними.
+    Зчитування даних і групування виконуються у фоні (JobRunner),
+    тож вікно не зависає на великих журналах. Графіки малює ChartRenderer
+    на одній постійній фігурі.
+
+    Для швидкого старту pandas і matplotlib тут не імпортуються:
+    expense_manager можна передати функцією, що створює менеджер, —
+    тоді він відкривається у фоні вже після показу вікна, а вкладка
+    аналітики будується при першому її відкритті.
     """
     def __init__(self, root, category_manager, expense_manager):
         self.root = root
         self.root.title("Фінансовий Облік")
         self.root.geometry("1000x700")
 
+        # Фонові завдання; результати повертаються через root.after
+        self.jobs = JobRunner(root)
+
         # Збережемо менеджери у поля класу
         self.category_manager = category_manager
-        self.expense_manager = expense_manager
+        if callable(expense_manager):
+            self._expense_manager = None
+            self._expense_manager_loading = self.jobs.start(expense_manager)
+            self.jobs.start(preload_analysis)
+        else:
+            self._expense_manager = expense_manager
 
         # Налаштуємо стиль для ttk
         self.setup_style()
@@ -43,12 +82,18 @@ class FinanceApp:
         self.notebook.add(self.analysis_frame, text="Фінансова аналітика")
         self.notebook.add(self.records_frame, text="Попередні записи")
         self.notebook.add(self.admin_frame, text="Керування категоріями")
+        self.profile_frame = None
+        if profiler.enabled:
+            self.profile_frame = ttk.Frame(self.notebook)
+            self.notebook.add(self.profile_frame, text="Продуктивність")
 
-        # Налаштовуємо кожну вкладку
+        # Налаштовуємо кожну вкладку; аналітика — при першому відкритті
         self.setup_entry_tab()
-        self.setup_analysis_tab()
+        self.analysis_ready = False
+        self.profile_ready = False
         self.setup_records_tab()
         self.setup_admin_tab()
+        self.notebook.bind("<<NotebookTabChanged>>", self.on_tab_changed)
 
         # Поле для сповіщень
         self.notification_label = ttk.Label(root, text="", foreground="green")
@@ -80,7 +125,7 @@ class FinanceApp:
         style.configure("Treeview",
                         background="white",
                         foreground="#333",
-                        rowheight=25,
+                        rowheight=RECORD_ROW_HEIGHT,
                         fieldbackground="white",
                         font=("Arial", 9))
         style.configure("Treeview.Heading",
@@ -90,6 +135,37 @@ class FinanceApp:
         style.map("Treeview",
                   background=[("selected", "#cce5ff")])
 
+    @property
+    def expense_manager(self):
+        """
+        Менеджер витрат; якщо він ще відкривається у фоні — чекаємо на нього.
+        """
+        if self._expense_manager is None:
+            self._expense_manager = self._expense_manager_loading.result()
+        return self._expense_manager
+
+    def close(self):
+        """
+        Після закриття вікна: дочікується фонових записів і зберігає
+        відкладені менеджером витрат індекси.
+        """
+        self.jobs.wait_runs()
+        if self._expense_manager is not None:
+            self._expense_manager.flush()
+
+    def on_tab_changed(self, event):
+        selected = self.notebook.select()
+        if not self.analysis_ready and selected == str(self.analysis_frame):
+            self.setup_analysis_tab()
+            self.analysis_ready = True
+        if selected == str(self.admin_frame):
+            self.load_usage_counts()
+        if self.profile_frame is not None and selected == str(self.profile_frame):
+            if not self.profile_ready:
+                self.setup_profile_tab()
+                self.profile_ready = True
+            self.populate_profile_tree()
+
     # ---------- Вкладка "Додавання витрат" ----------
 
     def setup_entry_tab(self):
@@ -145,122 +221,387 @@ class FinanceApp:
             messagebox.showerror("Помилка", "Заповніть всі обов'язкові поля!")
             return
 
-        self.expense_manager.add_expense(record)
-        self.show_notification("Витрата додана успішно!")
+        # запис — у фоні: менеджер може бути зайнятий іншим завданням
+        # (звітом, імпортом), і головний потік не має чекати на його блокування
+        self.jobs.run(lambda: self.expense_manager.add_expense(record), self.on_expense_added,
+                      self.on_job_error)
 
+    def on_expense_added(self, _):
+        self.show_notification("Витрата додана успішно!")
         self.amount_entry.delete(0, tk.END)
         self.comment_entry.delete(0, tk.END)
 
     # ---------- Вкладка "Фінансова аналітика" ----------
 
     def setup_analysis_tab(self):
+        from app.charts import CHART_SPECS, ChartRenderer
+
         controls_frame = ttk.Frame(self.analysis_frame)
         controls_frame.pack(fill="x", padx=5, pady=5)
 
         ttk.Label(controls_frame, text="Оберіть тип аналітики:").pack(side="left", padx=5)
 
-        analysis_options = [
-            "Витрати за категоріями (стовпчиковий графік)",
-            "Витрати за підкатегоріями (стовпчиковий графік)",
-            "Витрати за категоріями (кругова діаграма)",
-            "Динаміка витрат за місяцями (лінійний графік)",
-            "ТОП-5 найбільших витратних категорій (горизонтальний графік)"
-        ]
+        analysis_options = list(CHART_SPECS)
         self.analysis_type_cb = ttk.Combobox(controls_frame, values=analysis_options, state="readonly", width=50)
         self.analysis_type_cb.current(0)
         self.analysis_type_cb.pack(side="left", padx=5)
 
         ttk.Button(controls_frame, text="Оновити аналітику", command=self.show_statistics).pack(side="left", padx=5)
+        ttk.Button(controls_frame, text="Перебудувати підсумки", command=self.rebuild_aggregates).pack(side="left", padx=5)
+        ttk.Button(controls_frame, text="Перевірити підсумки", command=self.check_aggregates).pack(side="left", padx=5)
+
+        self.analysis_progress = ttk.Progressbar(controls_frame, mode="indeterminate", length=80)
+        self.analysis_progress.pack(side="left", padx=5)
+
+        # Фільтри: період і категорія передаються у запити ExpenseManager
+        filters_frame = ttk.Frame(self.analysis_frame)
+        filters_frame.pack(fill="x", padx=5)
+
+        self.period_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filters_frame, text="За період:", variable=self.period_var).pack(side="left", padx=5)
+        self.date_from_entry = DateEntry(filters_frame, date_pattern='yyyy-MM-dd')
+        self.date_from_entry.set_date(date.today().replace(month=1, day=1))
+        self.date_from_entry.pack(side="left")
+        ttk.Label(filters_frame, text="—").pack(side="left", padx=3)
+        self.date_to_entry = DateEntry(filters_frame, date_pattern='yyyy-MM-dd')
+        self.date_to_entry.pack(side="left")
+
+        ttk.Label(filters_frame, text="Категорія:").pack(side="left", padx=(15, 5))
+        self.filter_category_cb = ttk.Combobox(
+            filters_frame,
+            values=[ALL_CATEGORIES] + list(self.category_manager.categories.keys()),
+            state="readonly",
+            width=30
+        )
+        self.filter_category_cb.current(0)
+        self.filter_category_cb.pack(side="left")
+
+        ttk.Label(filters_frame, text="Пошук:").pack(side="left", padx=(15, 5))
+        self.analysis_search_entry = ttk.Entry(filters_frame, width=30)
+        self.analysis_search_entry.pack(side="left")
+        self.analysis_search_entry.bind("<Return>", lambda event: self.show_statistics())
 
         self.canvas_frame = ttk.Frame(self.analysis_frame)
         self.canvas_frame.pack(expand=True, fill="both", padx=5, pady=5)
 
-    def show_statistics(self):
-        for widget in self.canvas_frame.winfo_children():
-            widget.destroy()
-
-        df = self.expense_manager.get_expenses()
-
-        df["Дата"] = pd.to_datetime(df["Дата"], errors="coerce")
-        df["Сума"] = pd.to_numeric(df["Сума"], errors="coerce")
-        df.dropna(subset=["Дата", "Сума"], inplace=True)
+        # Одна фігура на весь час роботи: оновлення не створюють нових полотен
+        self.chart_renderer = ChartRenderer(self.canvas_frame)
+        self.chart_renderer.widget().pack(expand=True, fill="both")
 
-        if df.empty:
+    def show_statistics(self):
+        selected_analysis = self.analysis_type_cb.get()
+        filters = self.analysis_filters()
+        self.analysis_progress.start(10)
+        # Повторне натискання витісняє попередній запит
+        self.jobs.submit("analysis",
+                         lambda: self.compute_statistics(selected_analysis, filters),
+                         self.display_statistics,
+                         self.on_job_error)
+
+    def analysis_filters(self):
+        """
+        Збирає фільтри вкладки аналітики у вигляді аргументів для ExpenseManager.
+        """
+        filters = {}
+        if self.period_var.get():
+            filters["date_from"] = self.date_from_entry.get_date()
+            filters["date_to"] = self.date_to_entry.get_date()
+        category = self.filter_category_cb.get()
+        if category and category != ALL_CATEGORIES:
+            filters["categories"] = [category]
+        text = self.analysis_search_entry.get().strip()
+        if text:
+            filters["text"] = text
+        return filters
+
+    def compute_statistics(self, selected_analysis, filters=None):
+        """
+        Виконується у фоновому потоці: рахує лише підсумки для графіка.
+        Малювання лишається головному потоку (ChartRenderer).
+        Повертає (ключ графіка, опис графіка, підсумки).
+        """
+        from app.charts import CHART_SPECS
+        from managers.analytics import compute_report
+
+        filters = filters or {}
+        spec = CHART_SPECS[selected_analysis]
+        key = (selected_analysis,
+               tuple(sorted((name, tuple(value) if isinstance(value, list) else value)
+                            for name, value in filters.items())),
+               self.expense_manager.data_version(),
+               # бюджети зберігаються окремо від записів
+               self.expense_manager.budgets.signature() if spec["report"] == "budget" else None)
+        # Групування виконує менеджер (для SQLite — прямо в базі),
+        # сюди потрапляють лише підсумкові рядки
+        with profiler.span("analysis.compute") as span:
+            grouped = compute_report(self.expense_manager, spec["report"], **filters)
+            span.rows = len(grouped)
+        return key, spec, grouped
+
+    def display_statistics(self, result):
+        self.analysis_progress.stop()
+        key, spec, grouped = result
+        if grouped.empty:
+            self.chart_renderer.clear()
             messagebox.showinfo("Інформація", "Немає даних для відображення аналітики.")
             return
-
-        selected_analysis = self.analysis_type_cb.get()
-        fig, ax = plt.subplots(figsize=(8, 6), dpi=100)
-
-        # 1. Витрати за категоріями (стовпчиковий графік)
-        if "Витрати за категоріями (стовпчиковий графік)" in selected_analysis:
-            grouped = df.groupby("Категорія")["Сума"].sum()
-            grouped.plot(kind="bar", ax=ax, color="royalblue", alpha=0.8)
-            ax.set_title("Витрати за категоріями")
-            ax.set_xlabel("Категорія")
-            ax.set_ylabel("Сума витрат")
-            ax.tick_params(axis='x', rotation=45)
-
-        # 2. Витрати за підкатегоріями (стовпчиковий графік)
-        elif "Витрати за підкатегоріями (стовпчиковий графік)" in selected_analysis:
-            grouped = df.groupby(["Категорія", "Підкатегорія"])["Сума"].sum()
-            grouped.index = grouped.index.map(lambda x: f"{x[0]}: {x[1]}")
-            grouped.plot(kind="bar", ax=ax, color="forestgreen", alpha=0.8)
-            ax.set_title("Витрати за підкатегоріями")
-            ax.set_xlabel("Категорія:Підкатегорія")
-            ax.set_ylabel("Сума витрат")
-            ax.tick_params(axis='x', rotation=75)
-
-        # 3. Витрати за категоріями (кругова діаграма)
-        elif "Витрати за категоріями (кругова діаграма)" in selected_analysis:
-            grouped = df.groupby("Категорія")["Сума"].sum()
-            ax.pie(grouped, labels=grouped.index, autopct='%1.1f%%', startangle=140)
-            ax.set_title("Структура витрат за категоріями")
-
-        # 4. Динаміка витрат за місяцями (лінійний графік)
-        elif "Динаміка витрат за місяцями (лінійний графік)" in selected_analysis:
-            df.set_index("Дата", inplace=True)
-            monthly = df.resample('M')["Сума"].sum()
-            monthly.plot(kind="line", ax=ax, marker="o", color="firebrick", linewidth=2)
-            ax.set_title("Динаміка витрат за місяцями")
-            ax.set_xlabel("Місяць")
-            ax.set_ylabel("Сума витрат")
-            plt.setp(ax.get_xticklabels(), rotation=45)
-            df.reset_index(inplace=True)
-
-        # 5. ТОП-5 найбільших витратних категорій (горизонтальний графік)
-        elif "ТОП-5 найбільших витратних категорій (горизонтальний графік)" in selected_analysis:
-            grouped = df.groupby("Категорія")["Сума"].sum().sort_values(ascending=False)
-            top_5 = grouped.head(5)
-            top_5.plot(kind="barh", ax=ax, color="orange", alpha=0.8)
-            ax.set_title("ТОП-5 найбільших витратних категорій")
-            ax.set_xlabel("Сума витрат")
-            ax.invert_yaxis()
-
-        fig.tight_layout()
-        canvas = FigureCanvasTkAgg(fig, master=self.canvas_frame)
-        canvas.draw()
-        canvas.get_tk_widget().pack(expand=True, fill="both")
+        with profiler.span("analysis.render", rows=len(grouped)):
+            self.chart_renderer.render(spec, grouped, key)
+
+    def rebuild_aggregates(self):
+        self.analysis_progress.start(10)
+        self.jobs.submit("aggregates", self.expense_manager.rebuild_aggregates,
+                         lambda _: self.on_aggregates_rebuilt(), self.on_job_error)
+
+    def on_aggregates_rebuilt(self):
+        self.analysis_progress.stop()
+        self.show_notification("Підсумки перебудовано з усіх записів!")
+
+    def check_aggregates(self):
+        self.analysis_progress.start(10)
+        self.jobs.submit("aggregates", self.expense_manager.verify_aggregates,
+                         self.show_aggregates_check, self.on_job_error)
+
+    def show_aggregates_check(self, problems):
+        self.analysis_progress.stop()
+        if not problems:
+            messagebox.showinfo("Перевірка", "Підсумки узгоджені з записами.")
+            return
+        details = "\n".join(f"{name}: {key} — {mine} замість {actual}" if name == "counts" else
+                            f"{name}: {key} — {mine / 100:.2f} замість {actual / 100:.2f}"
+                            for name, key, mine, actual in problems[:10])
+        if messagebox.askyesno("Перевірка",
+                               f"Знайдено розбіжностей: {len(problems)}\n{details}\n\nПеребудувати підсумки?"):
+            self.rebuild_aggregates()
+
+    def on_job_error(self, exc):
+        if self.analysis_ready:
+            self.analysis_progress.stop()
+        self.records_progress.stop()
+        messagebox.showerror("Помилка", f"Не вдалося виконати операцію: {exc}")
 
     # ---------- Вкладка "Попередні записи" ----------
 
     def setup_records_tab(self):
-        self.tree = ttk.Treeview(self.records_frame,
-                                 columns=("Дата", "Сума", "Категорія", "Підкатегорія", "Коментар"),
-                                 show="headings")
-        self.tree.pack(expand=True, fill="both")
-
-        for col in ("Дата", "Сума", "Категорія", "Підкатегорія", "Коментар"):
-            self.tree.heading(col, text=col)
+        """
+        Віртуальний список: у Treeview існують лише рядки, що вміщуються
+        у вікні, а дані для них беруться з ExpenseManager за зсувом.
+        Тому відкриття і прокрутка не залежать від розміру журналу.
+        Сторінки підвантажуються у фоні, тож головний потік не чекає
+        на менеджер (злиття щойно доданих записів, пересортування).
+        """
+        # Пошук за коментарем, призначенням платежу, категорією й підкатегорією
+        # (інвертований індекс менеджера); запит — після паузи у введенні
+        search_frame = ttk.Frame(self.records_frame)
+        search_frame.pack(fill="x", padx=5, pady=5)
+        ttk.Label(search_frame, text="Пошук:").pack(side="left")
+        self.records_search_entry = ttk.Entry(search_frame, width=40)
+        self.records_search_entry.pack(side="left", padx=5)
+        self.records_search_entry.bind("<KeyRelease>", self.on_records_search)
+        ttk.Button(search_frame, text="В аналітику", command=self.search_in_analysis).pack(side="left")
+        ttk.Label(search_frame, text=SEARCH_HINT, foreground="grey").pack(side="left", padx=10)
+
+        list_frame = ttk.Frame(self.records_frame)
+        list_frame.pack(expand=True, fill="both")
+
+        self.tree = ttk.Treeview(list_frame, columns=RECORD_COLUMNS, show="headings", selectmode="browse")
+        self.tree.pack(side="left", expand=True, fill="both")
+
+        for col in RECORD_COLUMNS:
+            self.tree.heading(col, text=col, command=lambda c=col: self.sort_records(c))
             self.tree.column(col, width=140)
 
-        ttk.Button(self.records_frame, text="Оновити", command=self.load_records).pack(pady=5)
+        # Смуга прокрутки керує зсувом у даних менеджера, а не самим Treeview
+        self.records_scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.scroll_records)
+        self.records_scrollbar.pack(side="right", fill="y")
+
+        self.tree.bind("<Configure>", lambda event: self.render_records())
+        self.tree.bind("<MouseWheel>", self.on_records_wheel)
+        self.tree.bind("<Button-4>", self.on_records_wheel)
+        self.tree.bind("<Button-5>", self.on_records_wheel)
+
+        bottom_frame = ttk.Frame(self.records_frame)
+        bottom_frame.pack(pady=5)
+        ttk.Button(bottom_frame, text="Оновити", command=self.load_records).pack(side="left")
+        ttk.Button(bottom_frame, text="Імпорт CSV…", command=self.import_records).pack(side="left", padx=5)
+        self.records_progress = ttk.Progressbar(bottom_frame, mode="indeterminate", length=80)
+        self.records_progress.pack(side="left", padx=5)
+        self.records_count_label = ttk.Label(bottom_frame, text="")
+        self.records_count_label.pack(side="left", padx=5)
+
+        self.records_total = 0
+        self.records_offset = 0
+        self.records_sort = None  # (стовпець, за зростанням)
+        self.records_text = ""
+        self._records_search_after = None
+        self._records_buffer_start = 0
+        self._records_buffer = []
+        self._records_buffer_last = False  # буфер доходить до кінця даних
 
     def load_records(self):
-        df = self.expense_manager.get_expenses()
-        self.tree.delete(*self.tree.get_children())
-        for _, row in df.iterrows():
-            self.tree.insert("", "end", values=list(row))
+        self.records_progress.start(10)
+        sort, text = self.records_sort, self.records_text
+        # Перше звернення (розбір файлу, сортування, пошук) — у фоні
+        self.jobs.submit("records", lambda: self.prepare_records(sort, text), self.show_records, self.on_job_error)
+
+    def prepare_records(self, sort, text=""):
+        with profiler.span("records.prepare") as span:
+            total = span.rows = self.expense_manager.count(text)
+            if sort is not None or text:
+                self.expense_manager.get_page(0, 0, *(sort or (None, True)), text=text)
+        return total
+
+    def show_records(self, total):
+        self.records_progress.stop()
+        self.records_total = total
+        label = f"Знайдено записів: {total}" if self.records_text else f"Усього записів: {total}"
+        self.records_count_label.config(text=label)
+        self._records_buffer = []
+        self._records_buffer_last = False
+        self.render_records()
+
+    def import_records(self):
+        path = filedialog.askopenfilename(title="Імпорт витрат",
+                                          filetypes=[("CSV", "*.csv"), ("Усі файли", "*.*")])
+        if not path:
+            return
+        self.records_progress.start(10)
+        self.jobs.submit("import",
+                         lambda: self.expense_manager.import_csv(path, self.category_manager),
+                         self.show_import_report,
+                         self.on_job_error)
+
+    def show_import_report(self, report):
+        self.records_progress.stop()
+        details = "\n".join(f"рядок {line}: {reason}" for line, reason in report.rejected_lines[:10])
+        messagebox.showinfo("Імпорт", f"{report}\n\n{details}" if details else str(report))
+        self.load_records()
+
+    def on_records_search(self, event):
+        """
+        Запит виконується, коли введення затихло на SEARCH_DELAY_MS,
+        а не на кожну клавішу.
+        """
+        if self._records_search_after is not None:
+            self.root.after_cancel(self._records_search_after)
+        self._records_search_after = self.root.after(SEARCH_DELAY_MS, self.search_records)
+
+    def search_records(self):
+        self._records_search_after = None
+        text = self.records_search_entry.get().strip()
+        if text == self.records_text:
+            return
+        self.records_text = text
+        self.records_offset = 0
+        self.load_records()
+
+    def search_in_analysis(self):
+        """
+        Переносить пошуковий запит у фільтри аналітики й показує її.
+        """
+        if not self.analysis_ready:
+            self.setup_analysis_tab()
+            self.analysis_ready = True
+        self.analysis_search_entry.delete(0, "end")
+        self.analysis_search_entry.insert(0, self.records_search_entry.get().strip())
+        self.notebook.select(self.analysis_frame)
+        self.show_statistics()
+
+    def sort_records(self, column):
+        ascending = not (self.records_sort is not None and self.records_sort == (column, True))
+        self.records_sort = (column, ascending)
+        for col in RECORD_COLUMNS:
+            arrow = (" ▲" if ascending else " ▼") if col == column else ""
+            self.tree.heading(col, text=col + arrow)
+        self.records_offset = 0
+        self.load_records()
+
+    def visible_record_rows(self):
+        # мінус один рядок на заголовок
+        return max(1, self.tree.winfo_height() // RECORD_ROW_HEIGHT - 1)
+
+    def scroll_records(self, action, amount, what=None):
+        visible = self.visible_record_rows()
+        if action == "moveto":
+            self.records_offset = int(float(amount) * self.records_total)
+        elif what == "pages":
+            self.records_offset += int(amount) * visible
+        else:
+            self.records_offset += int(amount)
+        self.render_records()
+
+    def on_records_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.records_offset -= 3
+        else:
+            self.records_offset += 3
+        self.render_records()
+        return "break"
+
+    def render_records(self):
+        visible = self.visible_record_rows()
+        self.records_offset = max(0, min(self.records_offset, self.records_total - visible))
+        count = min(visible, self.records_total)
+        rows = self.buffered_record_rows(self.records_offset, count)
+        if rows is None:
+            # поки сторінка вантажиться, лишаються попередні рядки
+            self.fetch_record_rows(self.records_offset, count)
+            return
+
+        with profiler.span("records.render", rows=len(rows)):
+            items = list(self.tree.get_children())
+            while len(items) < len(rows):
+                items.append(self.tree.insert("", "end"))
+            if len(items) > len(rows):
+                self.tree.delete(*items[len(rows):])
+            for item, values in zip(items, rows):
+                self.tree.item(item, values=values)
+
+        if self.records_total:
+            self.records_scrollbar.set(self.records_offset / self.records_total,
+                                       (self.records_offset + len(rows)) / self.records_total)
+        else:
+            self.records_scrollbar.set(0, 1)
+
+    def buffered_record_rows(self, offset, count):
+        """
+        Рядки [offset, offset + count) з локального буфера або None,
+        якщо їх там немає.
+        """
+        start, rows = self._records_buffer_start, self._records_buffer
+        if start <= offset and (offset + count <= start + len(rows) or self._records_buffer_last):
+            return rows[offset - start:offset - start + count]
+        return None
+
+    def fetch_record_rows(self, offset, count):
+        """
+        Підвантажує у фоні вікно довкола [offset, offset + count) з невеликим
+        запасом; коли воно надійде, список перемальовується. Новіший запит
+        (прокрутка далі, інше сортування) витісняє попередній.
+        """
+        from managers.storage import format_frame
+
+        start = max(0, offset - RECORDS_BUFFER)
+        size = count + 2 * RECORDS_BUFFER
+        sort, text = self.records_sort, self.records_text
+        sort_by, ascending = sort or (None, True)
+
+        def fetch():
+            with profiler.span("records.fetch") as span:
+                page = self.expense_manager.get_page(start, size, sort_by, ascending, text=text)
+                page = format_frame(page.reindex(columns=list(RECORD_COLUMNS)))
+                rows = list(page.itertuples(index=False, name=None))
+                span.rows = len(rows)
+            return sort, text, start, rows, len(rows) < size
+
+        self.jobs.submit("records.page", fetch, self.show_record_rows, self.on_job_error)
+
+    def show_record_rows(self, page):
+        sort, text, start, rows, last = page
+        if (sort, text) != (self.records_sort, self.records_text):
+            return  # тим часом змінились сортування чи пошук — чекаємо на нову сторінку
+        self._records_buffer_start, self._records_buffer, self._records_buffer_last = start, rows, last
+        self.render_records()
 
     # ---------- Вкладка "Керування категоріями" (адміністрування) ----------
 
@@ -271,9 +612,13 @@ class FinanceApp:
         tree_frame = ttk.Frame(admin_main_frame)
         tree_frame.pack(side="left", fill="both", expand=True, padx=5, pady=5)
 
-        self.category_tree = ttk.Treeview(tree_frame, columns=("Type",), show="tree headings")
+        self.category_tree = ttk.Treeview(tree_frame, columns=("Записів",), show="tree headings")
         self.category_tree.heading("#0", text="Категорія / Підкатегорія", anchor="w")
         self.category_tree.column("#0", width=200)
+        self.category_tree.heading("Записів", text="Записів")
+        self.category_tree.column("Записів", width=80, anchor="e")
+        # назви, що трапляються в записах, але відсутні в довіднику
+        self.category_tree.tag_configure("orphan", foreground="#888888")
         self.category_tree.pack(side="left", fill="both", expand=True)
 
         vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.category_tree.yview)
@@ -297,17 +642,178 @@ class FinanceApp:
         ttk.Button(buttons_frame, text="Додати підкатегорію", command=self.add_subcategory).pack(pady=2)
         ttk.Button(buttons_frame, text="Видалити підкатегорію", command=self.delete_subcategory).pack(pady=15)
 
-        ttk.Button(buttons_frame, text="Оновити дерево", command=self.populate_category_tree).pack(pady=20)
+        ttk.Label(buttons_frame, text="Нова назва:").pack(pady=5)
+        self.rename_entry = ttk.Entry(buttons_frame, width=20)
+        self.rename_entry.pack(pady=2)
+        ttk.Button(buttons_frame, text="Перейменувати / об'єднати", command=self.rename_node).pack(pady=2)
+
+        ttk.Label(buttons_frame, text="Бюджет на місяць:").pack(pady=5)
+        self.budget_entry = ttk.Entry(buttons_frame, width=20)
+        self.budget_entry.pack(pady=2)
+        ttk.Button(buttons_frame, text="Встановити бюджет", command=self.set_budget).pack(pady=2)
 
-        # Початково заповнимо дерево
+        ttk.Button(buttons_frame, text="Оновити дерево", command=self.load_usage_counts).pack(pady=20)
+
+        # Кількості записів з'являться, коли менеджер витрат їх порахує
+        self.usage_counts = None
         self.populate_category_tree()
 
     def populate_category_tree(self):
+        """
+        Дерево довідника з кількістю записів у кожному вузлі (з індексу
+        агрегатів, див. ExpenseManager.usage_counts). Назви з записів,
+        яких немає в довіднику, показуються сірим — їх можна перейменувати
+        чи об'єднати з наявними.
+        """
         self.category_tree.delete(*self.category_tree.get_children())
-        for cat, subcats in self.category_manager.categories.items():
-            cat_id = self.category_tree.insert("", "end", text=cat, open=True)
+        counts = self.usage_counts
+        tree = {cat: list(subcats) for cat, subcats in self.category_manager.categories.items()}
+        totals = {}
+        if counts is not None:
+            for (cat, sub), count in counts.items():
+                totals[cat] = totals.get(cat, 0) + count
+                subcats = tree.setdefault(cat, [])
+                if sub is not None and sub not in subcats:
+                    subcats.append(sub)
+
+        known = self.category_manager.categories
+        for cat, subcats in tree.items():
+            cat_tags = () if cat in known else ("orphan",)
+            cat_id = self.category_tree.insert("", "end", text=cat, open=True, tags=cat_tags,
+                                               values=(totals.get(cat, 0) if counts is not None else "",))
             for sub in subcats:
-                self.category_tree.insert(cat_id, "end", text=sub)
+                sub_tags = () if sub in known.get(cat, []) else ("orphan",)
+                self.category_tree.insert(cat_id, "end", text=sub, tags=sub_tags,
+                                          values=(counts.get((cat, sub), 0) if counts is not None else "",))
+
+    def load_usage_counts(self):
+        self.jobs.submit("usage", lambda: self.expense_manager.usage_counts(),
+                         self.show_usage_counts, self.on_job_error)
+
+    def show_usage_counts(self, counts):
+        self.usage_counts = counts
+        self.populate_category_tree()
+
+    def category_usage(self, category, subcategory=None):
+        """
+        Кількість записів категорії (або пари); None — ще не пораховано.
+        """
+        if self.usage_counts is None:
+            return None
+        return sum(count for (cat, sub), count in self.usage_counts.items()
+                   if cat == category and (subcategory is None or sub == subcategory))
+
+    def rename_node(self):
+        """
+        Перейменовує вибрану категорію чи підкатегорію в довіднику
+        і в усіх записах; якщо нова назва вже існує — об'єднує.
+        """
+        new_name = self.rename_entry.get().strip()
+        if not new_name:
+            messagebox.showerror("Помилка", "Введіть нову назву!")
+            return
+        selection = self.category_tree.selection()
+        if not selection:
+            messagebox.showerror("Помилка", "Оберіть категорію чи підкатегорію для перейменування!")
+            return
+
+        item_id = selection[0]
+        name = self.category_tree.item(item_id, "text")
+        parent_id = self.category_tree.parent(item_id)
+        if name == new_name:
+            return
+        if parent_id:
+            cat = self.category_tree.item(parent_id, "text")
+            exists = new_name in self.category_manager.categories.get(cat, [])
+            question = f"Підкатегорія '{new_name}' вже існує в '{cat}'. Об'єднати з нею '{name}'?"
+            message = f"Підкатегорію '{name}' {'об’єднано з' if exists else 'перейменовано на'} '{new_name}'!"
+            move = (cat, name, cat, new_name)
+            self.relabel(lambda: self.expense_manager.move_subcategory(*move),
+                         lambda: self.category_manager.move_subcategory(*move),
+                         message, question if exists else None)
+        else:
+            exists = new_name in self.category_manager.categories
+            question = f"Категорія '{new_name}' вже існує. Об'єднати з нею '{name}'?"
+            message = f"Категорію '{name}' {'об’єднано з' if exists else 'перейменовано на'} '{new_name}'!"
+            self.relabel(lambda: self.expense_manager.rename_category(name, new_name),
+                         lambda: self.category_manager.rename_category(name, new_name),
+                         message, question if exists else None)
+
+    def set_budget(self):
+        """
+        Місячний бюджет категорії (вибраної або категорії вибраної підкатегорії)
+        для графіка "Бюджет і факт"; порожнє поле чи 0 — прибирає бюджет.
+        """
+        selection = self.category_tree.selection()
+        if not selection:
+            messagebox.showerror("Помилка", "Оберіть категорію для бюджету!")
+            return
+        item_id = self.category_tree.parent(selection[0]) or selection[0]
+        category = self.category_tree.item(item_id, "text")
+        text = self.budget_entry.get().strip().replace(",", ".")
+        try:
+            amount = float(text) if text else None
+        except ValueError:
+            messagebox.showerror("Помилка", "Бюджет має бути числом!")
+            return
+        if amount is not None and amount < 0:
+            messagebox.showerror("Помилка", "Бюджет не може бути від'ємним!")
+            return
+        self.expense_manager.budgets.set(category, amount)
+        if amount:
+            self.show_notification(f"Бюджет '{category}': {amount:.2f} на місяць")
+        else:
+            self.show_notification(f"Бюджет '{category}' прибрано")
+
+    def relabel(self, update_records, update_dictionary, message, question=None):
+        """
+        Перейменування в записах виконується у фоні (менеджеру може знадобитися
+        зчитати журнал); довідник оновлюється лише після його успіху.
+        """
+        if question is not None and not messagebox.askyesno("Підтвердження", question):
+            return
+        self.jobs.submit("relabel", update_records,
+                         lambda touched: self.on_relabeled(update_dictionary, message, touched),
+                         self.on_job_error)
+
+    def on_relabeled(self, update_dictionary, message, touched):
+        update_dictionary()
+        self.rename_entry.delete(0, tk.END)
+        self.refresh_category_lists()
+        self.load_usage_counts()
+        if self.records_total:
+            self.load_records()
+        self.show_notification(message if touched is None else f"{message} Записів: {touched}")
+
+    def ask_reassign_target(self, message, choices):
+        """
+        Модальний діалог вибору, куди перенести записи вузла, що видаляється.
+        choices — {підпис: значення}. Повертає значення, "" — не переносити,
+        None — скасовано.
+        """
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Перенесення записів")
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        ttk.Label(dialog, text=message).pack(padx=10, pady=(10, 5))
+        target_cb = ttk.Combobox(dialog, values=[KEEP_RECORDS] + list(choices), state="readonly", width=40)
+        target_cb.current(1 if choices else 0)
+        target_cb.pack(padx=10, pady=5)
+
+        result = {}
+
+        def accept():
+            label = target_cb.get()
+            result["value"] = "" if label == KEEP_RECORDS else choices[label]
+            dialog.destroy()
+
+        buttons = ttk.Frame(dialog)
+        buttons.pack(pady=10)
+        ttk.Button(buttons, text="Видалити", command=accept).pack(side="left", padx=5)
+        ttk.Button(buttons, text="Скасувати", command=dialog.destroy).pack(side="left", padx=5)
+        self.root.wait_window(dialog)
+        return result.get("value")
 
     def add_category(self):
         new_cat = self.new_category_entry.get().strip()
@@ -324,8 +830,8 @@ class FinanceApp:
         self.new_category_entry.delete(0, tk.END)
         self.show_notification(f"Категорію '{new_cat}' додано!")
 
-        # Оновлюємо список категорій у вкладці “Додавання витрат”
-        self.category_cb["values"] = list(self.category_manager.categories.keys())
+        # Оновлюємо списки категорій у вкладках “Додавання витрат” та “Фінансова аналітика”
+        self.refresh_category_lists()
 
     def delete_category(self):
         selection = self.category_tree.selection()
@@ -341,14 +847,28 @@ class FinanceApp:
             messagebox.showerror("Помилка", "Оберіть саме категорію, а не підкатегорію.")
             return
 
-        confirm = messagebox.askyesno("Підтвердження", f"Ви дійсно бажаєте видалити категорію '{cat_name}'?")
+        used = self.category_usage(cat_name)
+        if used:
+            others = {cat: cat for cat in self.category_manager.categories if cat != cat_name}
+            target = self.ask_reassign_target(
+                f"Категорія '{cat_name}' має записів: {used}.\nПеренести їх до категорії:", others)
+            if target is None:
+                return
+            if target:
+                self.relabel(lambda: self.expense_manager.rename_category(cat_name, target),
+                             lambda: self.category_manager.rename_category(cat_name, target),
+                             f"Категорію '{cat_name}' видалено, записи перенесено до '{target}'!")
+                return
+            confirm = True
+        else:
+            confirm = messagebox.askyesno("Підтвердження", f"Ви дійсно бажаєте видалити категорію '{cat_name}'?")
         if confirm:
             if cat_name in self.category_manager.categories:
                 del self.category_manager.categories[cat_name]
                 self.category_manager.save_categories()
                 self.populate_category_tree()
                 self.show_notification(f"Категорію '{cat_name}' видалено!")
-                self.category_cb["values"] = list(self.category_manager.categories.keys())
+                self.refresh_category_lists()
 
     def add_subcategory(self):
         new_sub = self.new_subcategory_entry.get().strip()
@@ -395,7 +915,24 @@ class FinanceApp:
             return
 
         cat_name = self.category_tree.item(parent_id, "text")
-        confirm = messagebox.askyesno("Підтвердження", f"Ви дійсно бажаєте видалити підкатегорію '{sub_name}'?")
+        used = self.category_usage(cat_name, sub_name)
+        if used:
+            others = {f"{cat} / {sub}": (cat, sub)
+                      for cat, subcats in self.category_manager.categories.items()
+                      for sub in subcats if (cat, sub) != (cat_name, sub_name)}
+            target = self.ask_reassign_target(
+                f"Підкатегорія '{sub_name}' має записів: {used}.\nПеренести їх до:", others)
+            if target is None:
+                return
+            if target:
+                move = (cat_name, sub_name) + target
+                self.relabel(lambda: self.expense_manager.move_subcategory(*move),
+                             lambda: self.category_manager.move_subcategory(*move),
+                             f"Підкатегорію '{sub_name}' видалено, записи перенесено до '{target[0]} / {target[1]}'!")
+                return
+            confirm = True
+        else:
+            confirm = messagebox.askyesno("Підтвердження", f"Ви дійсно бажаєте видалити підкатегорію '{sub_name}'?")
         if confirm:
             if cat_name in self.category_manager.categories:
                 if sub_name in self.category_manager.categories[cat_name]:
@@ -404,6 +941,47 @@ class FinanceApp:
                     self.populate_category_tree()
                     self.show_notification(f"Підкатегорію '{sub_name}' видалено з '{cat_name}'!")
 
+    def refresh_category_lists(self):
+        """
+        Оновлює списки категорій у вкладках “Додавання витрат” та “Фінансова аналітика”.
+        """
+        categories = list(self.category_manager.categories.keys())
+        self.category_cb["values"] = categories
+        if self.analysis_ready:
+            self.filter_category_cb["values"] = [ALL_CATEGORIES] + categories
+
+    # ---------- Вкладка "Продуктивність" ----------
+
+    def setup_profile_tab(self):
+        """
+        Таблиця p50/p95 за операціями з профайлера; оновлюється
+        при кожному відкритті вкладки або кнопкою.
+        """
+        self.profile_tree = ttk.Treeview(self.profile_frame, columns=PROFILE_COLUMNS, show="headings")
+        self.profile_tree.pack(expand=True, fill="both", padx=5, pady=5)
+        for col in PROFILE_COLUMNS:
+            self.profile_tree.heading(col, text=col)
+            self.profile_tree.column(col, width=220 if col == PROFILE_COLUMNS[0] else 100,
+                                     anchor="w" if col == PROFILE_COLUMNS[0] else "e")
+
+        bottom_frame = ttk.Frame(self.profile_frame)
+        bottom_frame.pack(pady=5)
+        ttk.Button(bottom_frame, text="Оновити", command=self.populate_profile_tree).pack(side="left")
+        ttk.Button(bottom_frame, text="Очистити", command=self.reset_profile).pack(side="left", padx=5)
+        ttk.Label(bottom_frame, text=f"Журнал вимірів: {profiler.path}").pack(side="left", padx=5)
+
+    def populate_profile_tree(self):
+        self.profile_tree.delete(*self.profile_tree.get_children())
+        for name, stats in profiler.summary().items():
+            self.profile_tree.insert("", "end", values=(
+                name, stats["count"],
+                f"{stats['p50_ms']:.1f}", f"{stats['p95_ms']:.1f}", f"{stats['max_ms']:.1f}",
+                stats["rows"], stats["bytes"]))
+
+    def reset_profile(self):
+        profiler.reset()
+        self.populate_profile_tree()
+
     def show_notification(self, message):
         self.notification_label.config(text=message, foreground="green")
         self.root.after(3000, lambda: self.notification_label.config(text=""))
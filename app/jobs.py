@@ -0,0 +1,107 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class JobRunner:
+    """
+    Виконує важкі операції (зчитування даних, групування, побудову графіків)
+    у фоновому пулі потоків, щоб головний цикл Tk не блокувався.
+
+    Результати повертаються у головний потік опитуванням через root.after,
+    бо віджети Tk можна чіпати лише з нього. Кожне завдання має ключ
+    (наприклад, "analysis"): нове завдання з тим самим ключем витісняє
+    попереднє — воно скасовується, якщо ще не почалося, а його результат
+    у будь-якому разі відкидається.
+    """
+    def __init__(self, root, max_workers=2, poll_ms=30):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="checkbus-job")
+        self._ids = itertools.count(1)
+        self._latest = {}   # ключ -> номер останнього завдання
+        self._jobs = {}     # номер -> (ключ, future, on_done, on_error)
+        self._polling = False
+
+    def submit(self, key, fn, on_done, on_error=None):
+        """
+        Запускає fn() у фоні. on_done(result) або on_error(exc) будуть викликані
+        у головному потоці, лише якщо завдання не витіснене новішим.
+        """
+        self.cancel(key)
+        job_id = next(self._ids)
+        self._latest[key] = job_id
+        self._jobs[job_id] = (key, self._executor.submit(fn), on_done, on_error)
+        self._schedule_poll()
+        return job_id
+
+    def run(self, fn, on_done, on_error=None):
+        """
+        Запускає fn() у фоні без ключа: завдання не витісняється новішими
+        і не скасовується (записи даних). on_done(result) / on_error(exc) —
+        у головному потоці, як у submit.
+        """
+        job_id = next(self._ids)
+        self._jobs[job_id] = (None, self._executor.submit(fn), on_done, on_error)
+        self._schedule_poll()
+        return job_id
+
+    def wait_runs(self):
+        """
+        Чекає, доки завершаться завдання run (перед закриттям програми).
+        """
+        wait([future for key, future, _, _ in list(self._jobs.values()) if key is None])
+
+    def start(self, fn):
+        """
+        Запускає fn() у фоні без ключа й колбеків (попереднє завантаження).
+        Повертає concurrent.futures.Future.
+        """
+        return self._executor.submit(fn)
+
+    def cancel(self, key):
+        """
+        Скасовує поточне завдання з цим ключем (якщо воно є).
+        """
+        job_id = self._latest.pop(key, None)
+        if job_id is not None and job_id in self._jobs:
+            self._jobs[job_id][1].cancel()
+
+    def is_current(self, key, job_id):
+        """
+        Чи є job_id останнім завданням для ключа — для довгих дій
+        у головному потоці, які теж треба переривати.
+        """
+        return self._latest.get(key) == job_id
+
+    def is_busy(self, key):
+        job_id = self._latest.get(key)
+        return job_id is not None and job_id in self._jobs
+
+    def shutdown(self):
+        for key in list(self._latest):
+            self.cancel(key)
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        for job_id, (key, future, on_done, on_error) in list(self._jobs.items()):
+            if not future.done():
+                continue
+            del self._jobs[job_id]
+            if future.cancelled() or (key is not None and self._latest.get(key) != job_id):
+                continue
+
+            exc = future.exception()
+            if exc is None:
+                on_done(future.result())
+            elif on_error is not None:
+                on_error(exc)
+            else:
+                raise exc
+        if self._jobs:
+            self._schedule_poll()
@@ -0,0 +1,63 @@
+"""
+Бенчмарк додавання витрат: середня затримка add_expense та add_expenses
+на журналах різного розміру. Час вставки має лишатися сталим.
+
+Запуск:  python -m benchmarks.bench_add_expense [--sizes 10000 100000 1000000]
+"""
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+from managers.expense_manager import COLUMNS, ExpenseManager
+
+RECORD = {
+    "Дата": "2024-04-23",
+    "Сума": "450",
+    "Категорія": "Фонд кабінету",
+    "Підкатегорія": "Вода",
+    "Коментар": "бенчмарк",
+}
+
+
+def make_ledger(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        row = [RECORD[col] for col in COLUMNS]
+        writer.writerows(row for _ in range(rows))
+
+
+def bench(rows, inserts, durability):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "expenses.csv")
+        make_ledger(path, rows)
+        manager = ExpenseManager(path, durability=durability)
+
+        start = time.perf_counter()
+        for _ in range(inserts):
+            manager.add_expense(RECORD)
+        single = (time.perf_counter() - start) / inserts
+
+        start = time.perf_counter()
+        manager.add_expenses([RECORD] * inserts)
+        batch = time.perf_counter() - start
+    return single, batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--inserts", type=int, default=200)
+    parser.add_argument("--durability", default="flush")
+    args = parser.parse_args()
+
+    print(f"{'рядків':>10} {'add_expense, мкс':>18} {'add_expenses({}), мс'.format(args.inserts):>24}")
+    for rows in args.sizes:
+        single, batch = bench(rows, args.inserts, args.durability)
+        print(f"{rows:>10} {single * 1e6:>18.1f} {batch * 1e3:>24.2f}")
+
+
+if __name__ == "__main__":
+    main()
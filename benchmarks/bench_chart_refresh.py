@@ -0,0 +1,139 @@
+"""
+Бенчмарк оновлення графіків аналітики: нова Figure на кожне оновлення
+проти ChartRenderer (одна фігура, оновлення на місці, кеш осей).
+Міряє час одного оновлення та приріст пам'яті після сотень оновлень.
+
+Запуск:  python -m benchmarks.bench_chart_refresh [--refreshes 500] [--check]
+З --check завершується з помилкою, якщо пам'ять ChartRenderer росте
+більше ніж на --max-growth-mb (перевірка на регресію).
+"""
+import argparse
+import gc
+import sys
+import os
+import resource
+import time
+
+import numpy as np
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from app.charts import CHART_SPECS, ChartRenderer, chart_series, draw_chart
+from managers.analytics import top_categories
+
+
+def make_totals(rng, version):
+    """
+    Підсумки для всіх графіків; з кожною версією даних змінюються лише числа.
+    """
+    categories = pd.Index([f"Категорія {i}" for i in range(12)], name="Категорія")
+    subcategories = pd.MultiIndex.from_tuples(
+        [(cat, f"Підкатегорія {j}") for cat in categories for j in range(3)],
+        names=["Категорія", "Підкатегорія"])
+    months = pd.date_range("2024-01-01", periods=24, freq="MS", name="Місяць")
+    weeks = pd.date_range("2024-01-01", periods=104, freq="W-MON", name="Тиждень")
+    quarters = pd.date_range("2024-01-01", periods=8, freq="QS", name="Квартал")
+    years = pd.date_range("2015-01-01", periods=10, freq="YS", name="Рік")
+    days = pd.date_range("2024-01-01", periods=730, freq="D", name="День")
+    scale = 1 + version * 0.01
+    by_category = pd.Series(rng.uniform(100, 5000, len(categories)) * scale, index=categories)
+    daily = pd.Series(rng.uniform(0, 600, len(days)) * scale, index=days)
+    yoy = pd.DataFrame(rng.uniform(1000, 9000, (12, len(years))) * scale,
+                       index=pd.RangeIndex(1, 13, name="Місяць"),
+                       columns=pd.Index(years.year, name="Рік"))
+    return {
+        "weekly": pd.Series(rng.uniform(200, 2000, len(weeks)) * scale, index=weeks),
+        "quarterly": pd.Series(rng.uniform(3000, 27000, len(quarters)) * scale, index=quarters),
+        "yearly": pd.Series(rng.uniform(12000, 99000, len(years)) * scale, index=years),
+        "yoy": yoy,
+        "rolling30": daily.rolling(30, min_periods=1).mean(),
+        "rolling90": daily.rolling(90, min_periods=1).mean(),
+        "budget": pd.DataFrame({"Факт": daily.cumsum(), "Бюджет": np.arange(1, len(days) + 1) * 300.0},
+                               index=days),
+        "categories": by_category,
+        "subcategories": pd.Series(rng.uniform(10, 900, len(subcategories)) * scale, index=subcategories),
+        "pie": by_category,
+        "monthly": pd.Series(rng.uniform(1000, 9000, len(months)) * scale, index=months),
+        "top5": top_categories(by_category),
+    }
+
+
+def memory_mb():
+    """
+    Поточний резидентний розмір процесу (Linux), інакше — піковий.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run(label, refresh, refreshes, scenario):
+    rng = np.random.default_rng(0)
+    specs = list(CHART_SPECS.items())
+    times = []
+    baseline = None
+    for i in range(refreshes):
+        name, spec = scenario(specs, i)
+        version = i // len(specs) if scenario is switching else i
+        totals = make_totals(rng, version)
+        start = time.perf_counter()
+        refresh(name, spec, totals[spec["report"]], version)
+        times.append(time.perf_counter() - start)
+        if i == min(50, refreshes - 1):
+            # після розігріву (кеш осей заповнений, шрифти завантажені)
+            gc.collect()
+            baseline = memory_mb()
+    gc.collect()
+    growth = memory_mb() - baseline
+    print(f"{label:<48} медіана {np.median(times) * 1e3:7.2f} мс, "
+          f"p95 {np.percentile(times, 95) * 1e3:7.2f} мс, приріст пам'яті {growth:+6.2f} МБ")
+    return growth
+
+
+def same_analysis(specs, i):
+    return specs[0]
+
+
+def switching(specs, i):
+    return specs[i % len(specs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--refreshes", type=int, default=500)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--max-growth-mb", type=float, default=5.0)
+    args = parser.parse_args()
+
+    def baseline(name, spec, grouped, version):
+        fig = Figure(figsize=(8, 6), dpi=100)
+        canvas = FigureCanvasAgg(fig)
+        draw_chart(fig.subplots(), spec, chart_series(spec, grouped))
+        fig.tight_layout()
+        canvas.draw()
+
+    growths = []
+    for scenario_name, scenario in (("те саме, нові дані", same_analysis),
+                                    ("перемикання типів", switching)):
+        print(f"[{scenario_name}]")
+        run("нова Figure на кожне оновлення", baseline, args.refreshes, scenario)
+
+        renderer = ChartRenderer()
+
+        def reuse(name, spec, grouped, version):
+            # на Agg draw_idle малює одразу, тож час включає відмальовку
+            renderer.render(spec, grouped, (name, version))
+
+        growths.append(run("ChartRenderer", reuse, args.refreshes, scenario))
+        print(f"{'':<48} {renderer.stats}")
+
+    if args.check and max(growths) > args.max_growth_mb:
+        print(f"Пам'ять ChartRenderer зростає більше ніж на {args.max_growth_mb} МБ")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
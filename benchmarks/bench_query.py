@@ -0,0 +1,55 @@
+"""
+Бенчмарк вибірок за періодом: зріз за один місяць із 10 років даних
+через ExpenseManager.query (двійковий пошук у відсортованому індексі дат)
+проти повного маскування DataFrame.
+
+Запуск:  python -m benchmarks.bench_query [--rows 1000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import write_csv_ledger
+from managers.expense_manager import ExpenseManager
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    date_from, date_to = "2020-03-01", "2020-03-31"
+    columns = ["Дата", "Сума", "Категорія", "Підкатегорія"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "expenses.csv")
+        write_csv_ledger(path, args.rows, start="2015-01-01", years=10)
+        manager = ExpenseManager(path)
+        df = manager.get_expenses()
+        manager.query(date_from, date_to)  # перша побудова індексу дат
+
+        def masked():
+            return df.loc[(df["Дата"] >= date_from) & (df["Дата"] <= date_to), columns]
+
+        mask_time, expected = best_of(masked, args.repeat)
+        query_time, result = best_of(lambda: manager.query(date_from, date_to, columns=columns), args.repeat)
+        assert len(result) == len(expected)
+
+        print(f"рядків: {args.rows}, у зрізі: {len(result)}")
+        print(f"маска по всьому DataFrame: {mask_time * 1e3:8.2f} мс")
+        print(f"ExpenseManager.query:      {query_time * 1e3:8.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Бенчмарк часової аналітики на 10 роках даних: куб підсумків
+(RollupCube) проти групування сирих рядків через resample.
+
+Міряє побудову куба і завантаження контрольної точки, кожен часовий
+звіт (managers.analytics.TIME_REPORTS) з куба і тим самим звітом
+через pandas, додавання запису з оновленням куба і повний шлях
+"звіт -> графік" для порівняння років за всіма категоріями.
+
+Запуск:  python -m benchmarks.bench_rollups [--rows 1000000] [--check]
+З --check завершується з помилкою, якщо порівняння років за всіма
+категоріями малюється довше за --max-render-ms — і з побудовою нових
+осей, і з оновленням на місці (перевірка на регресію). Найперший показ
+у процесі (завантаження шрифтів matplotlib) лише друкується.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from app.charts import CHART_SPECS, ChartRenderer
+from benchmarks.synthetic import write_csv_ledger
+from managers.analytics import TIME_REPORTS, compute_report
+from managers.expense_manager import ExpenseManager
+
+RECORD = {"Дата": "2024-12-30", "Сума": "450", "Категорія": "Фонд кабінету",
+          "Підкатегорія": "Вода", "Коментар": "бенчмарк"}
+
+# Ті самі звіти "по-старому": resample сирих рядків на кожен запит
+RAW_REPORTS = {
+    "weekly": lambda amounts: amounts.resample("W-MON", label="left", closed="left").sum(),
+    "quarterly": lambda amounts: amounts.resample("QS").sum(),
+    "yearly": lambda amounts: amounts.resample("YS").sum(),
+    "yoy": lambda amounts: (lambda monthly: monthly.groupby([monthly.index.month, monthly.index.year])
+                            .sum().unstack())(amounts.resample("MS").sum()),
+    "rolling30": lambda amounts: amounts.resample("D").sum().rolling(30, min_periods=1).mean(),
+    "rolling90": lambda amounts: amounts.resample("D").sum().rolling(90, min_periods=1).mean(),
+    "budget": lambda amounts: amounts[amounts.index >= amounts.index.max().to_period("Y").start_time]
+                              .resample("D").sum().cumsum(),
+}
+
+
+def best_of(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--max-render-ms", type=float, default=100.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "expenses.csv")
+        write_csv_ledger(path, args.rows, start="2015-01-01", years=10)
+        manager = ExpenseManager(path)
+        df = manager.get_expenses()
+        amounts = df.dropna(subset=["Дата", "Сума"]).set_index("Дата")["Сума"].sort_index()
+
+        build, _ = best_of(manager.rebuild_rollups, min(args.repeat, 3))
+        load, _ = best_of(lambda: ExpenseManager(path).rollups.load(manager.data_version()), args.repeat)
+        print(f"рядків: {args.rows}, куб: {manager.rollups.days.shape[0]} днів × "
+              f"{manager.rollups.days.shape[1]} пар ({manager.rollups.days.nbytes / 2 ** 20:.1f} МБ)")
+        print(f"побудова куба:                {build * 1e3:8.2f} мс")
+        print(f"завантаження контрольної точки: {load * 1e3:6.2f} мс")
+
+        print(f"{'звіт':<12} {'куб':>10} {'resample':>12}")
+        for name in TIME_REPORTS:
+            cube, _ = best_of(lambda: compute_report(manager, name), args.repeat)
+            raw, _ = best_of(lambda: RAW_REPORTS[name](amounts), args.repeat)
+            print(f"{name:<12} {cube * 1e3:7.2f} мс {raw * 1e3:9.2f} мс")
+
+        add, _ = best_of(lambda: manager.add_expense(RECORD), args.repeat)
+        print(f"додавання запису з оновленням куба: {add * 1e3:.2f} мс")
+
+        # Порівняння років за всіма категоріями: звіт із куба і графік —
+        # з побудовою нових осей (кеш графіків очищено) і оновлення на місці
+        title = next(title for title, spec in CHART_SPECS.items() if spec["report"] == "yoy")
+        spec = CHART_SPECS[title]
+        renderer = ChartRenderer()
+        version = 0
+
+        def report_and_render():
+            nonlocal version
+            version += 1
+            renderer.render(spec, compute_report(manager, "yoy"), (title, version))
+
+        def build_chart():
+            renderer.clear()
+            start = time.perf_counter()
+            report_and_render()
+            return time.perf_counter() - start
+
+        cold = build_chart()
+        built = min(build_chart() for _ in range(args.repeat))
+        render, _ = best_of(report_and_render, args.repeat)
+        years = compute_report(manager, "yoy").shape[1]
+        print(f"порівняння {years} років, усі категорії: перший показ у процесі {cold * 1e3:.2f} мс, "
+              f"побудова осей {built * 1e3:.2f} мс, оновлення {render * 1e3:.2f} мс")
+
+    if args.check and max(built, render) * 1e3 > args.max_render_ms:
+        print(f"Порівняння років малюється довше за {args.max_render_ms} мс")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Бенчмарк запуску: час імпорту main.py і час до першого вікна
+(FinanceApp побудовано, вікно відмальоване) у свіжому процесі Python —
+з відкладеним завантаженням проти повного (менеджер витрат і вкладка
+аналітики створюються одразу, як раніше).
+
+Запуск:  python -m benchmarks.bench_startup [--repeat 5] [--target-ms 400]
+Завершується з помилкою, якщо час до першого вікна перевищує --target-ms.
+Без дисплея вимірюється лише імпорт.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.synthetic import CATEGORIES_JSON
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Виконується в окремому процесі, щоб імпорти не були закешовані
+PROBE = r"""
+import json, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter() - start
+heavy = [name for name in ("pandas", "numpy", "matplotlib") if name in sys.modules]
+result = {"import": imported, "heavy": heavy, "window": None}
+try:
+    import tkinter as tk
+    root = tk.Tk()
+except tk.TclError:
+    print(json.dumps(result))
+    sys.exit(0)
+
+from managers.category_manager import CategoryManager
+from app.finance_app import FinanceApp
+if sys.argv[1] == "eager":
+    from managers.expense_manager import ExpenseManager
+    app = FinanceApp(root, CategoryManager("categories.json"), ExpenseManager("expenses.csv"))
+    app.notebook.select(app.analysis_frame)
+else:
+    app = FinanceApp(root, CategoryManager("categories.json"), main.load_expense_manager)
+root.update()
+result["window"] = time.perf_counter() - start
+print(json.dumps(result))
+app.jobs.shutdown()
+root.destroy()
+"""
+
+
+def probe(mode, workdir):
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+    output = subprocess.run([sys.executable, "-c", PROBE, mode], cwd=workdir, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--target-ms", type=float, default=400.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        shutil.copy(CATEGORIES_JSON, os.path.join(workdir, "categories.json"))
+        best = {}
+        for mode in ("lazy", "eager"):
+            runs = [probe(mode, workdir) for _ in range(args.repeat)]
+            best[mode] = {
+                "import": min(run["import"] for run in runs),
+                "window": min((run["window"] for run in runs if run["window"] is not None), default=None),
+                "heavy": runs[0]["heavy"],
+            }
+
+    print(f"імпорт main.py: {best['lazy']['import'] * 1e3:7.1f} мс "
+          f"(важкі модулі при імпорті: {', '.join(best['lazy']['heavy']) or 'немає'})")
+    if best["lazy"]["window"] is None:
+        print("перше вікно: пропущено (немає дисплея)")
+        return
+    for mode, label in (("lazy", "відкладене завантаження"), ("eager", "усе одразу")):
+        print(f"перше вікно, {label:<24} {best[mode]['window'] * 1e3:7.1f} мс")
+    if best["lazy"]["window"] * 1e3 > args.target_ms:
+        print(f"Час до першого вікна перевищує ціль {args.target_ms:.0f} мс")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Бенчмарк сховищ: час завантаження та пам'ять DataFrame
+для pd.read_csv (CSV) проти колонкових Parquet/Feather.
+
+Запуск:  python -m benchmarks.bench_storage [--rows 1000000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from benchmarks.synthetic import write_csv_ledger
+from managers.storage import ColumnarStorage, CsvStorage, migrate_csv
+
+
+def disk_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+
+def timed_load(storage, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = storage.load()
+        best = min(best, time.perf_counter() - start)
+    return best, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "expenses.csv")
+        write_csv_ledger(csv_path, args.rows)
+
+        start = time.perf_counter()
+        raw = pd.read_csv(csv_path)
+        raw_time = time.perf_counter() - start
+        print(f"{'сховище':<22} {'завантаження, с':>16} {'пам’ять, МБ':>12} {'на диску, МБ':>13}")
+        print(f"{'pd.read_csv (сирий)':<22} {raw_time:>16.3f} "
+              f"{raw.memory_usage(deep=True).sum() / 2**20:>12.1f} {disk_size(csv_path) / 2**20:>13.1f}")
+
+        storages = [("CSV (типізований)", CsvStorage(csv_path))]
+        for fmt in ColumnarStorage.FORMATS:
+            storage = ColumnarStorage(os.path.join(tmp, "expenses." + fmt))
+            migrate_csv([csv_path], storage)
+            storages.append((fmt.capitalize(), storage))
+
+        for name, storage in storages:
+            load_time, df = timed_load(storage, args.repeat)
+            print(f"{name:<22} {load_time:>16.3f} "
+                  f"{df.memory_usage(deep=True).sum() / 2**20:>12.1f} {disk_size(storage.path) / 2**20:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Навантажувальний тест HTTP-сервісу (server.py): запускає сервіс
+на синтетичному журналі в окремому процесі, після чого --clients
+з'єднань (keep-alive) протягом --duration секунд шлють суміш запитів:
+додавання записів (частка --writes, з них --bulk пачками по 20),
+сторінки записів, усі звіти та звіт за рік із фільтром.
+
+Друкує кількість запитів за секунду і затримки (p50, p99, макс)
+загалом і за видами запитів. Завершується з помилкою, якщо якийсь
+запит не вдався або записи загубилися.
+
+Запуск:  python -m benchmarks.load_server [--rows 100000] [--clients 32]
+                 [--duration 10] [--writes 0.2] [--bulk 0.1] [--max-staleness 0]
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+from benchmarks.synthetic import CATEGORIES_JSON, ROOT, load_category_pairs, write_csv_ledger
+
+BULK_SIZE = 20
+
+
+class Client:
+    """
+    Одне HTTP/1.1-з'єднання з keep-alive: запити по черзі.
+    """
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8") if payload is not None else b""
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                          .encode("latin-1") + body)
+        await self.writer.drain()
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, await self.reader.readexactly(length)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def make_requests(rng, pairs, rows, args):
+    """
+    Нескінченний генератор (вид, метод, шлях, тіло) у заданих пропорціях.
+    """
+    number = 0
+
+    def record():
+        nonlocal number
+        number += 1
+        cat, sub = pairs[rng.integers(len(pairs))]
+        return {"Дата": "2024-05-01", "Сума": str(int(rng.integers(1, 5000))),
+                "Категорія": cat, "Підкатегорія": sub, "Коментар": f"load-{os.getpid()}-{number}"}
+
+    while True:
+        draw = rng.random()
+        if draw < args.writes:
+            if rng.random() < args.bulk:
+                yield "add.bulk", "POST", "/expenses/bulk", [record() for _ in range(BULK_SIZE)]
+            else:
+                yield "add", "POST", "/expenses", record()
+        elif draw < args.writes + (1 - args.writes) / 3:
+            offset = int(rng.integers(0, max(1, rows - 100)))
+            yield "expenses.page", "GET", f"/expenses?offset={offset}&limit=100&sort={quote('Сума')}&desc=1", None
+        elif draw < args.writes + 2 * (1 - args.writes) / 3:
+            yield "reports", "GET", "/reports", None
+        else:
+            cat = quote(pairs[rng.integers(len(pairs))][0])
+            yield ("reports.year", "GET",
+                   f"/reports/monthly?date_from=2020-01-01&date_to=2020-12-31&category={cat}", None)
+
+
+async def run_client(host, port, requests, deadline, latencies, errors):
+    client = Client(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            kind, method, path, payload = next(requests)
+            start = time.perf_counter()
+            status, body = await client.request(method, path, payload)
+            latencies.setdefault(kind, []).append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append((kind, status, body[:200].decode("utf-8", "replace")))
+    finally:
+        client.close()
+
+
+async def load(host, port, rows, pairs, args):
+    rng = np.random.default_rng(args.seed)
+    requests = make_requests(rng, pairs, rows, args)
+    latencies, errors = {}, []
+    client = Client(host, port)
+    _, before = await client.request("GET", "/health")
+    await client.request("GET", "/reports")  # прогрів: індекс агрегатів, кеш
+    started = time.perf_counter()
+    await asyncio.gather(*(run_client(host, port, requests, started + args.duration, latencies, errors)
+                           for _ in range(args.clients)))
+    elapsed = time.perf_counter() - started
+    _, after = await client.request("GET", "/health")
+    client.close()
+    return latencies, errors, elapsed, json.loads(before), json.loads(after)
+
+
+def print_stats(name, durations, elapsed):
+    ms = np.array(durations) * 1000
+    print(f"  {name:16} {len(ms):8d} {len(ms) / elapsed:10,.0f}/с   p50 {np.percentile(ms, 50):7.2f} мс"
+          f"   p99 {np.percentile(ms, 99):7.2f} мс   макс {ms.max():7.2f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000, help="рядків у синтетичному журналі")
+    parser.add_argument("--clients", type=int, default=32, help="одночасних з'єднань")
+    parser.add_argument("--duration", type=float, default=10.0, help="тривалість, с")
+    parser.add_argument("--writes", type=float, default=0.2, help="частка запитів на додавання")
+    parser.add_argument("--bulk", type=float, default=0.1, help="частка додавань пачкою")
+    parser.add_argument("--max-staleness", default="0", help="передається сервісу (0 — читання завжди свіжі)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pairs = load_category_pairs()
+    with tempfile.TemporaryDirectory() as tmp:
+        ledger = os.path.join(tmp, "expenses.csv")
+        categories = os.path.join(tmp, "categories.json")
+        write_csv_ledger(ledger, args.rows)
+        with open(CATEGORIES_JSON, "rb") as src, open(categories, "wb") as dst:
+            dst.write(src.read())
+
+        server = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), ledger,
+                                   "--categories", categories, "--port", "0",
+                                   "--max-staleness", args.max_staleness],
+                                  stdout=subprocess.PIPE, text=True, cwd=ROOT)
+        try:
+            # сервіс друкує адресу, коли вже приймає з'єднання
+            match = re.search(r"http://([^:]+):(\d+)", server.stdout.readline())
+            if match is None:
+                sys.exit("Сервіс не запустився")
+            host, port = match.group(1), int(match.group(2))
+            latencies, errors, elapsed, before, after = asyncio.run(load(host, port, args.rows, pairs, args))
+        finally:
+            server.terminate()
+            server.wait()
+
+    total = sum(len(durations) for durations in latencies.values())
+    print(f"{args.rows} рядків, {args.clients} з'єднань, {elapsed:.1f} с: {total / elapsed:,.0f} запитів/с")
+    print_stats("усі", [d for durations in latencies.values() for d in durations], elapsed)
+    for kind in sorted(latencies):
+        print_stats(kind, latencies[kind], elapsed)
+
+    expected = len(latencies.get("add", [])) + BULK_SIZE * len(latencies.get("add.bulk", []))
+    written = after["written"] - before["written"]
+    batches = after["batches"] - before["batches"]
+    print(f"записано {written} із {expected} записів за {batches} пачок "
+          f"({written / max(batches, 1):.1f} записів на пачку)")
+    for kind, status, body in errors[:10]:
+        print(f"помилка {kind}: {status} {body}", file=sys.stderr)
+    if errors or written != expected:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
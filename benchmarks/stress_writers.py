@@ -0,0 +1,106 @@
+"""
+Стрес-тест одночасного запису: N процесів одночасно додають витрати
+в одне сховище (і категорії в один categories.json), після чого
+перевіряється, що жоден запис не загубився і не продублювався.
+Друкує пропускну здатність і, для режиму "journal", скільки fsync
+знадобилося на всі записи (ефект group commit).
+
+Запуск:  python -m benchmarks.stress_writers [--writers 8] [--inserts 200]
+                 [--storage csv|parquet|feather|sqlite] [--durability journal]
+Типовий режим надійності — journal для csv і flush для решти сховищ
+(журнал є лише в CSV, SQLite має власний).
+Завершується з помилкою, якщо записи загубилися.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from managers.category_manager import CategoryManager
+from managers.expense_manager import ExpenseManager
+from managers.storage import DURABILITY_MODES
+
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "feather": ".feather", "sqlite": ".db"}
+
+
+def writer(args):
+    path, durability, categories_path, writer_id, inserts, batch, start_at = args
+    manager = ExpenseManager(path, durability=durability)
+    categories = CategoryManager(categories_path)
+    time.sleep(max(0.0, start_at - time.time()))
+
+    started = time.perf_counter()
+    for first in range(0, inserts, batch):
+        manager.add_expenses({
+            "Дата": "2024-05-01",
+            "Сума": "100",
+            "Категорія": "Інше",
+            "Підкатегорія": "Канцелярія",
+            "Коментар": f"w{writer_id}-{number}",
+        } for number in range(first, min(first + batch, inserts)))
+        if first % (10 * batch) == 0:
+            categories.categories.setdefault(f"Стрес {writer_id}", []).append(f"крок {first}")
+            categories.save_categories()
+    elapsed = time.perf_counter() - started
+
+    journal = getattr(manager.storage, "journal", None)
+    return elapsed, dict(journal.stats) if journal is not None else {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--inserts", type=int, default=200, help="записів на процес")
+    parser.add_argument("--batch", type=int, default=1, help="записів за один виклик add_expenses")
+    parser.add_argument("--storage", choices=EXTENSIONS, default="csv")
+    parser.add_argument("--durability", choices=DURABILITY_MODES, default=None,
+                        help="типово journal для csv, flush для решти")
+    args = parser.parse_args()
+    if args.durability == "journal" and args.storage != "csv":
+        parser.error("режим journal підтримується лише для --storage csv")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "expenses" + EXTENSIONS[args.storage])
+        categories_path = os.path.join(tmp, "categories.json")
+        if args.storage == "sqlite":
+            durability = "flush"
+        else:
+            durability = args.durability or ("journal" if args.storage == "csv" else "flush")
+        ExpenseManager(path, durability=durability)
+        CategoryManager(categories_path)
+
+        start_at = time.time() + 1.0
+        tasks = [(path, durability, categories_path, writer_id, args.inserts, args.batch, start_at)
+                 for writer_id in range(args.writers)]
+        wall = time.perf_counter()
+        with multiprocessing.Pool(args.writers) as pool:
+            results = pool.map(writer, tasks)
+        wall = time.perf_counter() - wall - 1.0
+
+        expected = {f"w{w}-{n}" for w in range(args.writers) for n in range(args.inserts)}
+        comments = list(ExpenseManager(path, durability=durability).get_expenses()["Коментар"])
+        lost = len(expected - set(comments))
+        duplicated = len(comments) - len(set(comments))
+        categories = CategoryManager(categories_path).categories
+        lost_categories = [w for w in range(args.writers) if f"Стрес {w}" not in categories]
+
+    total = args.writers * args.inserts
+    print(f"{args.storage}/{durability}: {args.writers} процесів × {args.inserts} записів "
+          f"(по {args.batch} за виклик)")
+    print(f"пропускна здатність: {total / wall:,.0f} записів/с "
+          f"(повільний процес: {max(elapsed for elapsed, _ in results):.2f} с)")
+    stats = [journal for _, journal in results if journal]
+    if stats:
+        appends = sum(s["appends"] for s in stats)
+        fsyncs = sum(s["fsyncs"] for s in stats)
+        print(f"group commit: {appends} дописувань у журнал, {fsyncs} fsync "
+              f"({appends / max(fsyncs, 1):.1f} записів на fsync)")
+    print(f"загублено: {lost}, дублікатів: {duplicated}, загублено категорій: {len(lost_categories)}")
+    if lost or duplicated or lost_categories:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
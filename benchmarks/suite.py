@@ -0,0 +1,300 @@
+"""
+Набір бенчмарків менеджерів та аналітики на синтетичних журналах.
+
+Журнали генеруються детерміновано (benchmarks.synthetic) у форматі
+expenses.csv з категоріями з categories.json. Для кожного розміру
+вимірюються:
+  add_expense / add_expenses        — додавання одного запису і пачки;
+  get_expenses.cold / .warm         — перше зчитування журналу і повторне з кешу;
+  aggregates.rebuild                — побудова індексу підсумків;
+  rollups.rebuild                   — побудова куба часових підсумків;
+  report.<звіт> / report.<звіт>.year — звіти вкладки аналітики (разом із часовими)
+                                      без фільтрів і за один рік (без графічного
+                                      інтерфейсу);
+  records.window / records.all      — рядки для вкладки "Попередні записи":
+                                      одне вікно списку і всі записи одразу;
+  search.build / search.query       — перший пошук (побудова індексу SearchIndex)
+                                      і нові запити за префіксами слів;
+  categories.load / .save           — CategoryManager на categories.json
+                                      і на великому дереві категорій.
+
+Результати записуються у JSON; з --baseline порівнюються з попереднім
+запуском, і програма завершується з кодом 1, якщо найкращий час якогось
+виміру погіршився більше ніж на --threshold (і більше ніж на --min-delta-ms).
+Найкращий із повторів порівнюється замість медіани, бо менше залежить
+від сторонніх процесів на машині.
+
+Запуск:  python -m benchmarks.suite [--sizes 1000 100000 1000000 10000000]
+             [--repeat 5] [--output benchmark_results.json]
+             [--baseline old.json] [--threshold 0.25] [--data-dir benchmarks_data]
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import CATEGORIES_JSON, ROOT, load_expense_columns, make_ledger
+from managers.analytics import REPORTS, TIME_REPORTS, compute_report
+from managers.category_manager import CategoryManager
+from managers.expense_manager import ExpenseManager
+from managers.storage import format_frame
+
+SIZES = (1_000, 100_000, 1_000_000, 10_000_000)
+RECORD_COLUMNS = ["Дата", "Сума", "Категорія", "Підкатегорія", "Коментар"]
+RECORD = {
+    "Дата": "23.04.2024",
+    "Сума": "450",
+    "Категорія": "Фонд кабінету",
+    "Підкатегорія": "Вода",
+    "Коментар": "бенчмарк",
+}
+# Вікно списку записів, як у вкладці (видимі рядки + запас RECORDS_BUFFER з обох боків)
+WINDOW_ROWS = 130
+# Понад цей розмір records.all не вимірюється: усі рядки як кортежі не вміщуються в пам'ять
+MAX_MATERIALIZE = 1_000_000
+
+
+def ledger_path(data_dir, rows, seed):
+    """
+    Повертає шлях до журналу потрібного розміру, генеруючи його лише раз.
+    """
+    path = os.path.join(data_dir, f"ledger_{rows}_{seed}.csv")
+    if not os.path.exists(path):
+        df = make_ledger(rows, seed=seed, columns=load_expense_columns(),
+                         date_format="%d.%m.%Y", uncategorized=0.01)
+        df.to_csv(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def measure(fn, repeat):
+    """
+    Тривалості repeat викликів fn (с).
+    """
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def bench_ledger(source, rows, args, work):
+    """
+    Виміри для одного журналу: {назва: [тривалості]}.
+    Працює з копією журналу в каталозі work (додавання змінює файл).
+    """
+    results = {}
+    ledger = os.path.join(work, "expenses.csv")
+    shutil.copyfile(source, ledger)
+    # великі журнали зчитуються секундами — менше повторів для повільних вимірів
+    slow_repeat = args.repeat if rows <= 1_000_000 else min(args.repeat, 2)
+
+    results["get_expenses.cold"] = measure(lambda: ExpenseManager(ledger).get_expenses(), slow_repeat)
+    manager = ExpenseManager(ledger)
+    manager.get_expenses()
+    results["get_expenses.warm"] = measure(manager.get_expenses, args.repeat)
+
+    results["aggregates.rebuild"] = measure(manager.rebuild_aggregates, slow_repeat)
+    results["rollups.rebuild"] = measure(manager.rebuild_rollups, slow_repeat)
+    year = {"date_from": "2020-01-01", "date_to": "2020-12-31"}
+    for name in REPORTS + TIME_REPORTS:
+        compute_report(manager, name)
+        compute_report(manager, name, **year)
+        results[f"report.{name}"] = measure(lambda: compute_report(manager, name), args.repeat)
+        results[f"report.{name}.year"] = measure(lambda: compute_report(manager, name, **year), args.repeat)
+
+    rng = np.random.default_rng(0)
+    offsets = iter(rng.integers(0, max(1, rows - WINDOW_ROWS), args.repeat).tolist())
+
+    def window():
+        page = manager.get_page(next(offsets), WINDOW_ROWS, "Сума", False)
+        list(format_frame(page.reindex(columns=RECORD_COLUMNS)).itertuples(index=False, name=None))
+
+    manager.get_page(0, 0, "Сума", False)  # сортування виконується один раз на вкладку
+    results["records.window"] = measure(window, args.repeat)
+    if rows <= MAX_MATERIALIZE:
+        results["records.all"] = measure(
+            lambda: list(format_frame(manager.get_expenses().reindex(columns=RECORD_COLUMNS))
+                         .itertuples(index=False, name=None)),
+            slow_repeat)
+
+    # індекс пошуку зберігається поруч із журналом — прибираємо його перед виміром
+    search_path = manager.sidecar_path("search.npz")
+
+    def build_search():
+        if os.path.exists(search_path):
+            os.remove(search_path)
+        fresh = ExpenseManager(ledger)
+        fresh.get_expenses()
+        start = time.perf_counter()
+        fresh.count("оплата")
+        return time.perf_counter() - start
+
+    results["search.build"] = [build_search() for _ in range(slow_repeat)]
+    queries = iter(search_queries(manager, args.repeat, rng))
+    results["search.query"] = measure(lambda: manager.count(next(queries)), args.repeat)
+
+    # додавання змінює журнал, тому — останнім
+    results["add_expense"] = measure(lambda: manager.add_expense(RECORD), args.inserts)
+    batch = [RECORD] * args.batch
+    results["add_expenses"] = measure(lambda: manager.add_expenses(batch), args.repeat)
+    return results
+
+
+def search_queries(manager, count, rng):
+    """
+    count різних запитів (префікси слів із назв категорій і підкатегорій
+    та пари з них): результати пошуку кешуються за текстом запиту.
+    """
+    words = sorted({word for column in ("Категорія", "Підкатегорія")
+                    for value in manager.get_expenses()[column].dropna().unique()
+                    for word in str(value).split() if len(word) >= 4})
+    prefixes = sorted({word[:length] for word in words for length in range(3, len(word) + 1)})
+    queries = prefixes + [f"{a} {b}" for a, b in zip(prefixes, reversed(prefixes))]
+    return [queries[i] for i in rng.permutation(len(queries))[:count]]
+
+
+def bench_categories(tmp, args):
+    """
+    Зчитування і збереження дерева категорій: справжнього та великого.
+    """
+    results = {}
+    large = {f"Категорія {i}": [f"Підкатегорія {i}.{j}" for j in range(20)] for i in range(1000)}
+    with open(CATEGORIES_JSON, "r", encoding="utf-8") as f:
+        trees = {"": json.load(f), ".large": large}
+
+    for suffix, tree in trees.items():
+        path = os.path.join(tmp, f"categories{suffix}.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(tree, f, ensure_ascii=False, indent=2)
+        results[f"categories.load{suffix}"] = measure(lambda: CategoryManager(path), args.repeat)
+        manager = CategoryManager(path)
+
+        def save():
+            manager.categories.setdefault("Бенчмарк", []).append(str(len(manager.categories["Бенчмарк"])))
+            manager.save_categories()
+
+        results[f"categories.save{suffix}"] = measure(save, args.repeat)
+    return results
+
+
+def summarize(name, rows, durations):
+    return {
+        "name": name,
+        "rows": rows,
+        "repeat": len(durations),
+        "median_ms": statistics.median(durations) * 1e3,
+        "min_ms": min(durations) * 1e3,
+        "max_ms": max(durations) * 1e3,
+    }
+
+
+def environment():
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                  capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "revision": revision,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """
+    Порівнює найкращі часи з попереднім запуском. Повертає список регресій.
+    """
+    previous = {(r["name"], r["rows"]): r for r in baseline["results"]}
+    regressions = []
+    print(f"\nпорівняння з {baseline['meta'].get('revision') or 'попереднім запуском'}:")
+    for result in results:
+        old = previous.get((result["name"], result["rows"]))
+        if old is None:
+            continue
+        ratio = result["min_ms"] / old["min_ms"] if old["min_ms"] else float("inf")
+        regressed = ratio > 1 + threshold and result["min_ms"] - old["min_ms"] > min_delta_ms
+        if regressed:
+            regressions.append(result)
+        print(f"  {result['name']:<28} {result['rows'] or '':>10} "
+              f"{old['min_ms']:>10.2f} → {result['min_ms']:>10.2f} мс  ×{ratio:.2f}"
+              f"{'  РЕГРЕСІЯ' if regressed else ''}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="\n".join(__doc__.strip().splitlines()[1:]))
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES[:2]),
+                        help=f"розміри журналів (типово 1000 100000; повний набір: {' '.join(map(str, SIZES))})")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--inserts", type=int, default=200, help="викликів add_expense")
+    parser.add_argument("--batch", type=int, default=1000, help="записів в одному add_expenses")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", default=None, metavar="ПРЕФІКС",
+                        help="лише виміри, назви яких починаються з цих префіксів")
+    parser.add_argument("--data-dir", default=None,
+                        help="де зберігати згенеровані журнали між запусками (типово тимчасово)")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="JSON попереднього запуску для порівняння")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="допустиме погіршення найкращого часу (0.25 = на 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="менші абсолютні зміни вважаються шумом")
+    args = parser.parse_args(argv)
+
+    results = []
+
+    def collect(rows, measured):
+        for name, durations in measured.items():
+            if args.only and not name.startswith(tuple(args.only)):
+                continue
+            result = summarize(name, rows, durations)
+            results.append(result)
+            print(f"  {name:<28} {rows or '':>10} {result['median_ms']:>10.2f} мс "
+                  f"(мін {result['min_ms']:.2f}, макс {result['max_ms']:.2f})", flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir or tmp
+        os.makedirs(data_dir, exist_ok=True)
+        print(f"  {'вимір':<28} {'рядків':>10} {'медіана':>13}")
+        collect(None, bench_categories(tmp, args))
+        for rows in args.sizes:
+            source = ledger_path(data_dir, rows, args.seed)
+            with tempfile.TemporaryDirectory() as work:
+                collect(rows, bench_ledger(source, rows, args, work))
+
+    document = {"meta": environment(), "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, indent=2)
+    print(f"\nрезультати: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f"регресій: {len(regressions)} (поріг {args.threshold:.0%})")
+            return 1
+        print("регресій немає")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
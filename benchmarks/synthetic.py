@@ -0,0 +1,67 @@
+"""
+Генератор синтетичних журналів витрат для бенчмарків.
+Категорії беруться з categories.json, стовпці — як у expenses.csv.
+Журнал визначається лише параметрами (rows, seed, ...), тож однакові
+параметри завжди дають однаковий файл.
+"""
+import csv
+import json
+import os
+import numpy as np
+import pandas as pd
+
+from managers.storage import COLUMNS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATEGORIES_JSON = os.path.join(ROOT, "categories.json")
+EXPENSES_CSV = os.path.join(ROOT, "expenses.csv")
+
+
+def load_category_pairs(json_path=CATEGORIES_JSON):
+    with open(json_path, "r", encoding="utf-8") as f:
+        categories = json.load(f)
+    return [(cat, sub) for cat, subcats in categories.items() for sub in subcats]
+
+
+def load_expense_columns(csv_path=EXPENSES_CSV):
+    """
+    Стовпці справжнього журналу (разом зі старим "За шо платіж").
+    """
+    with open(csv_path, "r", encoding="utf-8") as f:
+        return next(csv.reader(f))
+
+
+def make_ledger(rows, start="2015-01-01", years=10, seed=0, json_path=CATEGORIES_JSON,
+                columns=COLUMNS, date_format="%Y-%m-%d", uncategorized=0.0) -> pd.DataFrame:
+    """
+    Детермінований журнал витрат: дати рівномірно в межах years років,
+    суми — логнормальні цілі гривні, пари категорія/підкатегорія з categories.json.
+    uncategorized — частка рядків без категорії (як у старих записах expenses.csv).
+    """
+    rng = np.random.default_rng(seed)
+    pairs = load_category_pairs(json_path)
+    pair_idx = rng.integers(0, len(pairs), rows)
+    days = np.sort(rng.integers(0, 365 * years, rows))
+
+    # рядки дат і категорій будуються один раз на значення, а не на рядок
+    calendar = (pd.Timestamp(start) + pd.to_timedelta(np.arange(365 * years), unit="D")).strftime(date_format)
+    cats = np.array([cat for cat, _ in pairs], dtype=object)[pair_idx]
+    subs = np.array([sub for _, sub in pairs], dtype=object)[pair_idx]
+    if uncategorized:
+        empty = rng.random(rows) < uncategorized
+        cats[empty] = ""
+        subs[empty] = ""
+
+    data = {
+        "Дата": np.asarray(calendar, dtype=object)[days],
+        "Сума": np.maximum(1, rng.lognormal(6, 1.2, rows)).astype(np.int64),
+        "Категорія": cats,
+        "Підкатегорія": subs,
+        "За шо платіж": subs,
+        "Коментар": np.where(rng.random(rows) < 0.2, "оплата постачальнику", ""),
+    }
+    return pd.DataFrame({col: data[col] for col in columns}, columns=list(columns))
+
+
+def write_csv_ledger(path, rows, **kwargs):
+    make_ledger(rows, **kwargs).to_csv(path, index=False)
@@ -1,21 +1,40 @@
+import argparse
 import tkinter as tk
 
 from managers.category_manager import CategoryManager
-from managers.expense_manager import ExpenseManager
+from managers.profiling import DEFAULT_PATH, profiler
 from app.finance_app import FinanceApp
 
 
-def main():
+def load_expense_manager(category_manager=None):
+    """
+    Відкриває сховище витрат. Викликається у фоні вже після показу вікна,
+    бо імпорт pandas займає більшу частину часу запуску.
+    Словник категорій CategoryManager стає словником кодів у кеші витрат.
+    """
+    from managers.expense_manager import ExpenseManager
+    return ExpenseManager("expenses.csv", category_manager=category_manager)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Фінансовий облік")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PATH, default=None, metavar="ФАЙЛ",
+                        help=f"записувати тривалості операцій у JSONL (типово {DEFAULT_PATH}) "
+                             "і показати вкладку \"Продуктивність\"")
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiler.configure(True, args.profile)
+
     root = tk.Tk()
 
-    # Створюємо менеджери
+    # Створюємо менеджери (менеджер витрат — у фоні, див. FinanceApp)
     category_manager = CategoryManager("categories.json")
-    expense_manager = ExpenseManager("expenses.csv")
 
     # Створюємо додаток
-    app = FinanceApp(root, category_manager, expense_manager)
+    app = FinanceApp(root, category_manager, lambda: load_expense_manager(category_manager))
 
     root.mainloop()
+    app.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+import json
+import os
+import pandas as pd
+
+from managers.ledger import TypedLedger
+
+
+class AggregateIndex:
+    """
+    Поточні підсумки витрат, що оновлюються інкрементально:
+    - за категорією;
+    - за парою (категорія, підкатегорія);
+    - за календарним місяцем ("yyyy-mm").
+
+    Суми зберігаються цілими копійками, щоб уникнути накопичення похибки.
+    Враховуються лише рядки з коректними датою та сумою; рядки без категорії
+    потрапляють тільки у місячні підсумки (як і при groupby у pandas).
+
+    Окремо ведеться кількість записів за парою (категорія, підкатегорія або
+    None) — для дерева категорій; вона враховує всі записи з категорією.
+
+    Індекс зберігається у JSON-файлі (checkpoint) разом із відбитком
+    сховища, на якому він побудований. Якщо при завантаженні відбиток
+    не збігається, індекс треба перебудувати з сирих даних.
+    """
+    def __init__(self, checkpoint_path):
+        self.checkpoint_path = checkpoint_path
+        self.signature = None
+        self.clear()
+
+    def clear(self):
+        self.by_category = {}
+        self.by_subcategory = {}
+        self.by_month = {}
+        self.counts = {}
+
+    # ---------- Оновлення ----------
+
+    def add(self, date, amount, category=None, subcategory=None):
+        """
+        Враховує одну витрату за O(1). date — pd.Timestamp, amount — у гривнях.
+        """
+        if not pd.isna(category):
+            key = (category, None if pd.isna(subcategory) else subcategory)
+            self.counts[key] = self.counts.get(key, 0) + 1
+        if pd.isna(date) or pd.isna(amount):
+            return
+        kopecks = int(round(amount * 100))
+        month = date.strftime("%Y-%m")
+        self.by_month[month] = self.by_month.get(month, 0) + kopecks
+        if pd.isna(category):
+            return
+        self.by_category[category] = self.by_category.get(category, 0) + kopecks
+        if not pd.isna(subcategory):
+            key = (category, subcategory)
+            self.by_subcategory[key] = self.by_subcategory.get(key, 0) + kopecks
+
+    def add_frame(self, df: pd.DataFrame):
+        """
+        Враховує пачку типізованих записів: невелику — по рядку,
+        велику (імпорт) — через групування кодів (TypedLedger).
+        """
+        if len(df) > 64:
+            self._merge(df)
+            return
+        for date, amount, category, subcategory in zip(
+                df["Дата"], df["Сума"], df["Категорія"], df["Підкатегорія"]):
+            self.add(date, amount, category, subcategory)
+
+    def rebuild(self, data):
+        """
+        Повністю перераховує індекс із сирих даних (векторизовано).
+        data — DataFrame або вже побудований TypedLedger.
+        """
+        self.clear()
+        self._merge(data)
+
+    def _merge(self, data):
+        ledger = data if isinstance(data, TypedLedger) else TypedLedger(data)
+        rows = ledger.rows()
+
+        months, sums = ledger.month_sums(rows)
+        self._add_totals(self.by_month, (str(month) for month in months), sums)
+        cats, sums = ledger.category_sums(rows)
+        self._add_totals(self.by_category, cats, sums)
+        cats, subs, sums = ledger.subcategory_sums(rows)
+        self._add_totals(self.by_subcategory, zip(cats, subs), sums)
+        for key, count in ledger.pair_counts().items():
+            self.counts[key] = self.counts.get(key, 0) + count
+
+    def relabel(self, resolve):
+        """
+        Переносить підсумки і кількості після перейменування чи об'єднання
+        категорій: resolve(категорія, підкатегорія) -> нова пара.
+        Місячні підсумки не змінюються.
+        """
+        by_category, by_subcategory, counts = {}, {}, {}
+        # записи категорії без підкатегорії: її підсумок мінус суми її пар
+        rest = dict(self.by_category)
+        for (cat, sub), total in self.by_subcategory.items():
+            rest[cat] = rest.get(cat, 0) - total
+            key = resolve(cat, sub)
+            by_category[key[0]] = by_category.get(key[0], 0) + total
+            if key[1] is not None:
+                by_subcategory[key] = by_subcategory.get(key, 0) + total
+        for cat, total in rest.items():
+            if total:
+                target = resolve(cat, None)[0]
+                by_category[target] = by_category.get(target, 0) + total
+        for (cat, sub), count in self.counts.items():
+            key = resolve(cat, sub)
+            counts[key] = counts.get(key, 0) + count
+        self.by_category, self.by_subcategory, self.counts = by_category, by_subcategory, counts
+
+    @staticmethod
+    def _add_totals(totals, keys, sums):
+        for key, value in zip(keys, sums.tolist()):
+            totals[key] = totals.get(key, 0) + value
+
+    # ---------- Читання ----------
+
+    def category_totals(self) -> pd.Series:
+        return self._to_series(self.by_category, pd.Index(sorted(self.by_category), name="Категорія"))
+
+    def subcategory_totals(self) -> pd.Series:
+        index = pd.MultiIndex.from_tuples(sorted(self.by_subcategory), names=["Категорія", "Підкатегорія"])
+        return self._to_series(self.by_subcategory, index)
+
+    def monthly_totals(self) -> pd.Series:
+        months = sorted(self.by_month)
+        totals = self._to_series(self.by_month, pd.Index(months))
+        totals.index = pd.DatetimeIndex(pd.to_datetime(months, format="%Y-%m"), name="Місяць")
+        return totals
+
+    @staticmethod
+    def _to_series(totals, index):
+        return pd.Series([totals[key] / 100 for key in index], index=index, name="Сума", dtype="float64")
+
+    # ---------- Контрольна точка ----------
+
+    def save(self, signature):
+        """
+        Атомарно записує індекс разом із відбитком сховища.
+        """
+        self.signature = jsonable(signature)
+        state = {
+            "signature": self.signature,
+            "by_category": self.by_category,
+            "by_subcategory": [[cat, sub, total] for (cat, sub), total in self.by_subcategory.items()],
+            "by_month": self.by_month,
+            "counts": [[cat, sub, count] for (cat, sub), count in self.counts.items()],
+        }
+        # окреме ім'я для кожного процесу: журнал можуть вести кілька робочих місць
+        tmp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def is_current(self, signature):
+        return self.signature is not None and self.signature == jsonable(signature)
+
+    def load(self, signature):
+        """
+        Завантажує індекс із контрольної точки.
+        Повертає True, якщо вона існує і відповідає поточному стану сховища.
+        """
+        if not os.path.exists(self.checkpoint_path):
+            return False
+        try:
+            with open(self.checkpoint_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if state.get("signature") != jsonable(signature) or "counts" not in state:
+            return False
+
+        self.signature = state["signature"]
+        self.by_category = state["by_category"]
+        self.by_subcategory = {(cat, sub): total for cat, sub, total in state["by_subcategory"]}
+        self.by_month = state["by_month"]
+        self.counts = {(cat, sub): count for cat, sub, count in state["counts"]}
+        return True
+
+    def diff(self, other):
+        """
+        Порівнює з іншим індексом; повертає список розбіжностей
+        у вигляді (розріз, ключ, ця сума, інша сума) у копійках.
+        """
+        problems = []
+        for name in ("by_category", "by_subcategory", "by_month", "counts"):
+            mine, theirs = getattr(self, name), getattr(other, name)
+            for key in sorted(set(mine) | set(theirs), key=str):
+                if mine.get(key, 0) != theirs.get(key, 0):
+                    problems.append((name, key, mine.get(key, 0), theirs.get(key, 0)))
+        return problems
+
+
+def jsonable(value):
+    """
+    Приводить відбиток сховища до вигляду після JSON (кортежі стають списками),
+    щоб його можна було порівнювати зі збереженим.
+    """
+    return json.loads(json.dumps(value))
@@ -0,0 +1,86 @@
+import pandas as pd
+
+# П'ять звітів вкладки "Фінансова аналітика" у порядку показу:
+# категорії, підкатегорії, структура (кругова діаграма), місяці, ТОП-N категорій
+REPORTS = ("categories", "subcategories", "pie", "monthly", "top5")
+
+# Часові звіти з куба підсумків менеджера (RollupCube): тижні, квартали,
+# роки, порівняння років, ковзні середні за 30 і 90 днів, бюджет і факт.
+# Не входять у compute_reports — рахуються поодинці на запит.
+TIME_REPORTS = ("weekly", "quarterly", "yearly", "yoy", "rolling30", "rolling90", "budget")
+
+TOP_N = 5
+
+_LEVELS = {"weekly": "week", "quarterly": "quarter", "yearly": "year"}
+_WINDOWS = {"rolling30": 30, "rolling90": 90}
+_PERIOD_FORMATS = {"День": "%Y-%m-%d", "Тиждень": "%Y-%m-%d", "Рік": "%Y"}
+
+
+def top_categories(totals: pd.Series, n=TOP_N) -> pd.Series:
+    return totals.sort_values(ascending=False).head(n)
+
+
+def compute_report(manager, name, **filters):
+    """
+    Один звіт за назвою з REPORTS або TIME_REPORTS. Підсумки рахує
+    ExpenseManager (індекс агрегатів, для SQLite — запит у базі; часові
+    звіти — зрізи куба підсумків), тож це найшвидший шлях, коли потрібен
+    лише один графік. Порівняння років і бюджет повертають pd.DataFrame.
+    """
+    if name in _LEVELS:
+        return manager.period_totals(_LEVELS[name], **filters)
+    if name in _WINDOWS:
+        return manager.rolling_average(_WINDOWS[name], **filters)
+    if name == "yoy":
+        return manager.year_over_year(**filters)
+    if name == "budget":
+        return manager.budget_vs_actual(**filters)
+    if name == "subcategories":
+        return manager.sum_by_subcategory(**filters)
+    if name == "monthly":
+        return manager.monthly_totals(**filters)
+    totals = manager.sum_by_category(**filters)
+    return top_categories(totals) if name == "top5" else totals
+
+
+def compute_reports(manager, date_from=None, date_to=None, categories=None, subcategories=None,
+                    text=None) -> dict:
+    """
+    Усі п'ять звітів разом (назва з REPORTS -> pd.Series).
+
+    Без фільтрів підсумки беруться з індексу агрегатів менеджера,
+    з фільтрами — рахуються менеджером за один прохід
+    (ExpenseManager.report_totals: одна вибірка рядків на всі три
+    підсумки, для SQLite — один запит у базі). Кругова діаграма і ТОП-N
+    використовують ті самі підсумки за категоріями.
+    """
+    by_category, by_subcategory, monthly = manager.report_totals(
+        date_from, date_to, categories, subcategories, text)
+    return {
+        "categories": by_category,
+        "subcategories": by_subcategory,
+        "pie": by_category,
+        "monthly": monthly,
+        "top5": top_categories(by_category),
+    }
+
+
+def report_to_dict(series) -> dict:
+    """
+    Звіт у вигляді, придатному для JSON: місяці — "yyyy-mm" (дні й тижні —
+    "yyyy-mm-dd", роки — "yyyy"), підкатегорії вкладені у свої категорії,
+    стовпці таблиці (роки, факт і бюджет) — окремі словники; NaN — null.
+    """
+    if isinstance(series, pd.DataFrame):
+        return {str(column): report_to_dict(series[column]) for column in series.columns}
+    period_format = _PERIOD_FORMATS.get(series.index.name, "%Y-%m")
+    result = {}
+    for key, value in series.items():
+        value = None if pd.isna(value) else float(value)
+        if isinstance(key, tuple):
+            result.setdefault(str(key[0]), {})[str(key[1])] = value
+        elif isinstance(key, pd.Timestamp):
+            result[key.strftime(period_format)] = value
+        else:
+            result[str(key)] = value
+    return result
@@ -0,0 +1,68 @@
+import json
+import os
+
+from managers.locking import file_lock
+
+
+class Budgets:
+    """
+    Місячні бюджети категорій ({категорія: сума в гривнях}) поруч зі сховищем
+    (<файл>.budgets.json). Використовуються графіком "бюджет і факт"
+    (RollupCube.budget_vs_actual).
+
+    Файл невеликий і спільний для всіх копій програми: зміни записуються
+    під блокуванням поверх свіжої версії з диска, а load перечитує його,
+    лише якщо він змінився.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = file_lock(path)
+        self.amounts = {}
+        self._signature = None
+
+    def signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self) -> dict:
+        signature = self.signature()
+        if signature != self._signature:
+            self.amounts = self._read()
+            self._signature = signature
+        return self.amounts
+
+    def set(self, category, amount):
+        """
+        Встановлює місячний бюджет категорії; amount=None або 0 — прибирає його.
+        """
+        with self._lock:
+            amounts = self._read()
+            if amount:
+                amounts[category] = float(amount)
+            else:
+                amounts.pop(category, None)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(amounts, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+            self.amounts = amounts
+            self._signature = self.signature()
+
+    def rename(self, old, new):
+        """
+        Переносить бюджет при перейменуванні категорії (при об'єднанні — додає).
+        """
+        amounts = self.load()
+        if old in amounts:
+            self.set(new, amounts.get(new, 0) + amounts[old])
+            self.set(old, None)
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
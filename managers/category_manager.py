@@ -1,14 +1,25 @@
+import copy
 import json
 import os
 
+from managers.locking import file_lock
+from managers.profiling import profiler
+
 
 class CategoryManager:
     """
     Відповідає за зчитування і збереження категорій (із JSON-файлу).
     Зберігає категорії у self.categories (dict).
+
+    Файл може спільно використовуватися кількома робочими місцями.
+    Збереження виконується під блокуванням файлу: свіжа версія з диска
+    перечитується, і до неї застосовуються лише зміни, зроблені тут
+    після останнього зчитування (додані й видалені категорії
+    та підкатегорії), тож одночасні зміни з різних місць не губляться.
     """
     def __init__(self, json_file_path="categories.json"):
         self.json_file_path = json_file_path
+        self._lock = file_lock(json_file_path)
         self.categories = self.load_categories()
 
     def load_categories(self):
@@ -16,25 +27,89 @@ class CategoryManager:
         Зчитує категорії з JSON-файлу.
         Якщо файл не існує, створює базовий словник і записує його у файл.
         """
-        if os.path.exists(self.json_file_path):
-            with open(self.json_file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        else:
-            base_categories = {
-                "Оренда": ["Офіс", "Склад", "Дім"],
-                "Транспорт": ["Таксі", "Авто", "Громадський транспорт"],
-                "Зарплата": ["Співробітники", "Фрілансери"],
-                "Інше": ["Канцелярія", "Обладнання", "Реклама"]
-            }
-            self.save_categories(base_categories)
-            return base_categories
+        with self._lock, profiler.span("categories.load"):
+            if os.path.exists(self.json_file_path):
+                categories = self._read()
+                self._base = copy.deepcopy(categories)
+                return categories
+            else:
+                base_categories = {
+                    "Оренда": ["Офіс", "Склад", "Дім"],
+                    "Транспорт": ["Таксі", "Авто", "Громадський транспорт"],
+                    "Зарплата": ["Співробітники", "Фрілансери"],
+                    "Інше": ["Канцелярія", "Обладнання", "Реклама"]
+                }
+                self._base = {}
+                self.save_categories(base_categories)
+                return self.categories
 
     def save_categories(self, categories=None):
         """
         Зберігає словник категорій у JSON-файл.
         Якщо categories=None, то бере self.categories.
+        Зміни зливаються з версією, яку тим часом могли зберегти інші процеси.
         """
         if categories is not None:
             self.categories = categories
-        with open(self.json_file_path, "w", encoding="utf-8") as f:
-            json.dump(self.categories, f, ensure_ascii=False, indent=2)
+        with self._lock, profiler.span("categories.save") as span:
+            current = self._read() if os.path.exists(self.json_file_path) else {}
+            merged = merge_categories(self._base, self.categories, current)
+            tmp_path = f"{self.json_file_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(merged, f, ensure_ascii=False, indent=2)
+                span.nbytes = f.tell()
+            os.replace(tmp_path, self.json_file_path)
+        self.categories = merged
+        self._base = copy.deepcopy(merged)
+
+    def rename_category(self, old, new):
+        """
+        Перейменовує категорію; якщо new уже існує — об'єднує їхні
+        підкатегорії. Записи витрат перейменовує ExpenseManager.rename_category.
+        """
+        subcats = self.categories.pop(old, [])
+        target = self.categories.setdefault(new, [])
+        target.extend(sub for sub in subcats if sub not in target)
+        self.save_categories()
+
+    def move_subcategory(self, category, subcategory, new_category, new_subcategory):
+        """
+        Перейменовує підкатегорію або переносить її в іншу категорію
+        (з об'єднанням, якщо там така вже є).
+        """
+        subcats = self.categories.get(category, [])
+        if subcategory in subcats:
+            subcats.remove(subcategory)
+        target = self.categories.setdefault(new_category, [])
+        if new_subcategory not in target:
+            target.append(new_subcategory)
+        self.save_categories()
+
+    def _read(self):
+        with open(self.json_file_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+
+def merge_categories(base, mine, theirs):
+    """
+    Трибічне злиття: до theirs (версія на диску) застосовуються зміни mine
+    відносно base (версія, з якої починалося редагування).
+    """
+    merged = {cat: list(subcats) for cat, subcats in theirs.items()}
+    for cat in base:
+        if cat not in mine:
+            merged.pop(cat, None)
+    for cat, subcats in mine.items():
+        base_subcats = base.get(cat)
+        if cat not in merged:
+            if base_subcats is not None and list(subcats) == list(base_subcats):
+                continue  # видалена деінде, а тут не змінювалась
+            merged[cat] = []
+        base_subcats = base_subcats or []
+        for sub in base_subcats:
+            if sub not in subcats and sub in merged[cat]:
+                merged[cat].remove(sub)
+        for sub in subcats:
+            if sub not in base_subcats and sub not in merged[cat]:
+                merged[cat].append(sub)
+    return merged
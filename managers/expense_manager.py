@@ -1,36 +1,848 @@
-import os
+import functools
+import threading
+import numpy as np
 import pandas as pd
 
+from managers.aggregate_index import AggregateIndex
+from managers.budgets import Budgets
+from managers.importer import import_csv
+from managers.labels import LabelMap, relabel_frame, resolve
+from managers.ledger import TypedLedger, as_day
+from managers.profiling import profiler
+from managers.rollups import RollupCube
+from managers.search import SEARCH_COLUMNS, SearchIndex
+from managers.storage import COLUMNS, compact_frame, concat_frames, format_frame, open_storage, records_to_frame
+
+
+def synchronized(method):
+    """
+    Виконує метод під блокуванням менеджера: до нього звертаються
+    і головний потік Tk, і фонові завдання.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+# Скільки результатів пошуку (масок рядків) тримати в кеші на версію даних
+MAX_CACHED_SEARCHES = 16
+
+
+def _is_contiguous(positions):
+    return len(positions) > 0 and positions[-1] - positions[0] == len(positions) - 1 \
+        and bool(np.all(np.diff(positions) == 1))
+
+
+def _contiguous_months(totals):
+    """
+    Місячні суми з усіма місяцями між першим і останнім (порожні — нулі).
+    """
+    if totals.empty:
+        return totals
+    months = pd.date_range(totals.index.min(), totals.index.max(), freq="MS", name="Місяць")
+    return totals.reindex(months, fill_value=0)
+
+
 class ExpenseManager:
     """
-    Відповідає за роботу з витратами (CSV-файл).
+    Відповідає за роботу з витратами.
     Ініціалізація, додавання, зчитування тощо.
+
+    Дані зберігаються у підключуваному сховищі (managers.storage):
+    CSV-файл за замовчуванням, колонковий Parquet/Feather-каталог
+    або база SQLite.
+    Нові записи лише дописуються, тож час додавання не залежить
+    від розміру журналу витрат.
+
+    Зчитані дані кешуються у пам'яті вже з потрібними типами; категорії
+    та інші повторювані тексти зберігаються словниковими кодами
+    (словник категорій — з category_manager, якщо його передано).
+    Кеш скидається, якщо змінився відбиток сховища (час модифікації,
+    розмір), а власні записи додаються до кешу без повторного розбору файлу.
+    Лічильники cache_hits / cache_misses показують ефективність кешу.
+    Фільтри й підсумки з фільтрами рахуються векторно над TypedLedger
+    (копійки, datetime64[D], коди категорій).
+
+    Поруч зі сховищем ведеться індекс агрегатів (<файл>.agg.json):
+    підсумки за категоріями, підкатегоріями та місяцями оновлюються
+    при кожному додаванні, тож графіки не групують сирі рядки.
+
+    Перейменування та об'єднання категорій (rename_category,
+    move_subcategory) не переписують сховище: вони дописуються правилами
+    в <файл>.labels.json (LabelMap) і застосовуються при зчитуванні,
+    а в кеші змінюють лише словник чи рядки зачеплених пар. У сам файл
+    витрат вони переносяться пізніше, одним перезаписом (apply_labels).
+
+    Пошук (фільтр text) — інвертований індекс токенів коментарів
+    і категорій (SearchIndex, <файл>.search.npz) плюс номери значень
+    для кожного рядка, які доповнюються при дописуванні записів.
+
+    Часова аналітика (періоди від дня до року, порівняння років, ковзні
+    середні, бюджети з <файл>.budgets.json) береться з куба підсумків
+    день × пара категорій (RollupCube, <файл>.rollup.npz), який, як
+    і індекс агрегатів, оновлюється при кожному додаванні (на диск — пачками,
+    див. flush).
     """
-    def __init__(self, csv_file_path="expenses.csv"):
-        self.csv_file_path = csv_file_path
-        self.init_csv()
+    def __init__(self, file_path="expenses.csv", durability="flush", storage=None, category_manager=None):
+        self.storage = storage if storage is not None else open_storage(file_path, durability)
+        self.file_path = self.storage.path
+        self.category_manager = category_manager
+        self.init_storage()
+
+        self._lock = threading.RLock()
 
-    def init_csv(self):
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache = None
+        self._cache_signature = None
+        self._pending = []
+        self._search_values = {}
+        self._reset_derived()
+
+        self.labels = LabelMap(self.sidecar_path("labels.json"))
+        self.search_index = SearchIndex(self.sidecar_path("search.npz"))
+        self.aggregates = AggregateIndex(self.sidecar_path("agg.json"))
+        self._aggregates_ready = False
+        self.rollups = RollupCube(self.sidecar_path("rollup.npz"))
+        self._rollups_ready = False
+        self.budgets = Budgets(self.sidecar_path("budgets.json"))
+
+    def init_storage(self):
         """
-        Перевіряє, чи існує файл із витратами,
+        Перевіряє, чи існує сховище витрат,
         якщо ні — створює зі стандартними стовпцями.
         """
-        if not os.path.exists(self.csv_file_path):
-            pd.DataFrame(columns=["Дата", "Сума", "Категорія", "Підкатегорія", "Коментар"]) \
-              .to_csv(self.csv_file_path, index=False)
+        self.storage.init(COLUMNS)
 
     def add_expense(self, record: dict):
         """
-        Додає витрату до CSV-файлу.
+        Додає витрату до сховища.
         Параметр record — це словник із ключами:
         ["Дата", "Сума", "Категорія", "Підкатегорія", "Коментар"]
         """
-        df = pd.read_csv(self.csv_file_path)
-        df = pd.concat([df, pd.DataFrame([record])], ignore_index=True)
-        df.to_csv(self.csv_file_path, index=False)
+        self.add_expenses([record])
+
+    @synchronized
+    def add_expenses(self, records):
+        """
+        Дописує одразу кілька витрат однією операцією запису.
+        Відсутні ключі записуються як порожні значення.
+        """
+        records = list(records)
+        if not records:
+            return
+        with profiler.span("expenses.add", rows=len(records)):
+            self._write(lambda: self.storage.append(records),
+                        lambda: records_to_frame(records, self.storage.columns()))
+
+    @synchronized
+    def add_frame(self, df: pd.DataFrame):
+        """
+        Дописує вже типізований DataFrame (наприклад, пачку імпорту).
+        """
+        if not df.empty:
+            with profiler.span("expenses.add_frame", rows=len(df)):
+                self._write(lambda: self.storage.append_frame(df), lambda: df)
+
+    def _write(self, write, make_frame):
+        """
+        Виконує запис у сховище і підтримує кеш та індекс агрегатів:
+        якщо вони відповідали сховищу до запису, нові рядки просто
+        додаються до них; інакше їх буде перебудовано при наступному читанні.
+        make_frame() будує типізовані нові рядки лише тоді, коли вони потрібні.
+        Відбитки до і після запису знімаються під блокуванням сховища,
+        щоб між ними не вклинився запис іншого процесу.
+        """
+        with self.storage.lock():
+            signature = self._signature()
+            cache_was_fresh = self._cache is not None and signature == self._cache_signature
+            aggregates_were_fresh = self._aggregates_ready and self.aggregates.is_current(signature)
+            rollups_were_fresh = self._rollups_ready and self.rollups.is_current(signature)
+
+            write()
+            signature = self._signature()
+            frame = make_frame() if cache_was_fresh or aggregates_were_fresh or rollups_were_fresh else None
+
+            if cache_was_fresh:
+                self._pending.append(frame)
+                self._cache_signature = signature
+            else:
+                self.invalidate_cache()
+
+            if aggregates_were_fresh:
+                self.aggregates.add_frame(frame)
+                self.aggregates.save(signature)
+            else:
+                self._aggregates_ready = False
+
+            if rollups_were_fresh:
+                self.rollups.add_frame(frame)
+                self.rollups.checkpoint(signature)
+            else:
+                self._rollups_ready = False
 
-    def get_expenses(self) -> pd.DataFrame:
+    def import_csv(self, path, category_manager=None, chunksize=50_000, progress=None):
+        """
+        Потоково імпортує сторонній CSV (старі експорти, банківські виписки):
+        читає пачками, нормалізує формати дат, перевіряє категорії
+        за CategoryManager, пропускає дублікати наявних записів
+        і дописує пачками. Повертає ImportReport.
+        """
+        categories = category_manager.categories if category_manager is not None else None
+        return import_csv(self, path, categories, chunksize, progress)
+
+    @synchronized
+    @profiler.timed("expenses.get_expenses")
+    def get_expenses(self, valid_only=False) -> pd.DataFrame:
         """
         Повертає витрати у вигляді DataFrame.
+        "Дата" має тип datetime64, "Сума" — числовий.
+        Якщо valid_only=True, повертаються лише рядки з коректними датою та сумою.
+
+        Повертається поверхнева копія кешу: додавання/видалення стовпців
+        чи індексу у ній не зачіпає кеш, але значення змінювати не варто.
+        """
+        self._refresh_cache()
+        if not valid_only:
+            return self._cache.copy(deep=False)
+        if self._cache_valid is None:
+            self._cache_valid = self._cache.dropna(subset=["Дата", "Сума"])
+        return self._cache_valid.copy(deep=False)
+
+    def sidecar_path(self, suffix):
+        """
+        Шлях до допоміжного файлу поруч зі сховищем (індекси тощо).
+        """
+        return self.file_path.rstrip("/\\") + "." + suffix
+
+    def data_version(self):
+        """
+        Версія даних — відбиток сховища і правил перейменування. Змінюється
+        при кожному записі (у тому числі з іншого процесу), тож придатна
+        як ключ кешу графіків.
+        """
+        return self._signature()
+
+    def _signature(self):
+        return (self.storage.signature(), self.labels.signature())
+
+    # ---------- Вибірки ----------
+
+    @synchronized
+    @profiler.timed("expenses.query")
+    def query(self, date_from=None, date_to=None, categories=None, subcategories=None,
+              columns=None, text=None) -> pd.DataFrame:
+        """
+        Повертає витрати, що відповідають фільтрам:
+        - date_from / date_to — включні межі дат (рядки без дати не потрапляють);
+        - categories / subcategories — списки дозволених назв;
+        - text — пошуковий запит (див. managers.search.parse_query);
+        - columns — потрібні стовпці (решта не копіюється і не зчитується).
+        З діапазоном дат рядки впорядковані за датою, інакше — як у сховищі.
+
+        Для SQLite фільтри й проєкція виконуються в SQL. Для решти сховищ
+        діапазон дат шукається двійковим пошуком у відсортованому індексі дат,
+        тож нерелевантні рядки навіть не переглядаються.
+        """
+        if hasattr(self.storage, "query") and not text:
+            return self.storage.query(date_from, date_to, categories, subcategories, columns)
+
+        self._refresh_cache()
+        cache = self._cache
+        positions = self._select(date_from, date_to, categories, subcategories, text)
+
+        # спершу відбираємо рядки, потім стовпці — копіюється лише потрібне
+        if positions is None:
+            df = cache
+        elif _is_contiguous(positions):
+            # журнал зазвичай ведеться за датами, тож період — суцільний зріз
+            df = cache.iloc[positions[0]:positions[-1] + 1]
+        else:
+            df = cache.take(positions)
+        if columns is not None:
+            df = df[list(columns)]
+        return df.copy(deep=False)
+
+    # ---------- Агрегати ----------
+    # Без фільтрів підсумки беруться з індексу агрегатів.
+    # З фільтрами: якщо сховище вміє рахувати агрегати саме (SQLite),
+    # обчислення передається йому (крім пошуку text, який веде менеджер);
+    # інакше підсумки рахуються над TypedLedger.
+    # Межі date_from / date_to включні; некоректні рядки не враховуються.
+
+    @synchronized
+    @profiler.timed("expenses.sum_by_category")
+    def sum_by_category(self, date_from=None, date_to=None, categories=None, subcategories=None,
+                        text=None) -> pd.Series:
+        """
+        Сума витрат за кожною категорією.
+        """
+        filters = (date_from, date_to, categories, subcategories)
+        if not text and all(value is None for value in filters):
+            return self._ensure_aggregates().category_totals()
+        if hasattr(self.storage, "sum_by_category") and not text:
+            return self.storage.sum_by_category(*filters)
+        self._refresh_cache()
+        return self._typed_ledger().category_totals(self._select(*filters, text))
+
+    @synchronized
+    @profiler.timed("expenses.sum_by_subcategory")
+    def sum_by_subcategory(self, date_from=None, date_to=None, categories=None, subcategories=None,
+                           text=None) -> pd.Series:
+        """
+        Сума витрат за кожною парою (категорія, підкатегорія).
+        """
+        filters = (date_from, date_to, categories, subcategories)
+        if not text and all(value is None for value in filters):
+            return self._ensure_aggregates().subcategory_totals()
+        if hasattr(self.storage, "sum_by_subcategory") and not text:
+            return self.storage.sum_by_subcategory(*filters)
+        self._refresh_cache()
+        return self._typed_ledger().subcategory_totals(self._select(*filters, text))
+
+    @synchronized
+    @profiler.timed("expenses.monthly_totals")
+    def monthly_totals(self, date_from=None, date_to=None, categories=None, subcategories=None,
+                       text=None) -> pd.Series:
+        """
+        Сума витрат за календарними місяцями (індекс — перше число місяця).
+        Місяці без витрат присутні з нульовою сумою.
+        """
+        filters = (date_from, date_to, categories, subcategories)
+        if not text and all(value is None for value in filters):
+            totals = self._ensure_aggregates().monthly_totals()
+        elif hasattr(self.storage, "monthly_totals") and not text:
+            totals = self.storage.monthly_totals(*filters)
+        else:
+            self._refresh_cache()
+            totals = self._typed_ledger().monthly_totals(self._select(*filters, text))
+        return _contiguous_months(totals)
+
+    @synchronized
+    @profiler.timed("expenses.report_totals")
+    def report_totals(self, date_from=None, date_to=None, categories=None, subcategories=None,
+                      text=None):
+        """
+        (sum_by_category, sum_by_subcategory, monthly_totals) за один прохід:
+        одна вибірка рядків (_select) і одна TypedLedger-вибірка коректних
+        рядків на всі три підсумки, для SQLite — один запит у базі.
+        """
+        filters = (date_from, date_to, categories, subcategories)
+        if not text and all(value is None for value in filters):
+            aggregates = self._ensure_aggregates()
+            totals = (aggregates.category_totals(), aggregates.subcategory_totals(),
+                      aggregates.monthly_totals())
+        elif hasattr(self.storage, "report_totals") and not text:
+            totals = self.storage.report_totals(*filters)
+        else:
+            self._refresh_cache()
+            totals = self._typed_ledger().report_totals(self._select(*filters, text))
+        by_category, by_subcategory, monthly = totals
+        return by_category, by_subcategory, _contiguous_months(monthly)
+
+    # ---------- Категорії в записах ----------
+
+    def rename_category(self, old, new):
+        """
+        Перейменовує категорію в усіх наявних записах; якщо new уже
+        вживається — записи обох категорій об'єднуються.
+        Повертає кількість зачеплених записів.
+        """
+        return self._relabel(["category", old, new])
+
+    def move_subcategory(self, category, subcategory, new_category, new_subcategory):
+        """
+        Переносить записи пари (category, subcategory) у пару
+        (new_category, new_subcategory): перейменування підкатегорії,
+        об'єднання з іншою чи перенесення в іншу категорію.
+        Повертає кількість зачеплених записів.
+        """
+        return self._relabel(["subcategory", category, subcategory, new_category, new_subcategory])
+
+    @synchronized
+    def usage_counts(self) -> dict:
+        """
+        {(категорія, підкатегорія або None): кількість записів} з індексу
+        агрегатів — без перегляду сирих рядків.
+        """
+        return dict(self._ensure_aggregates().counts)
+
+    @synchronized
+    def _relabel(self, rule):
+        """
+        Застосовує правило перейменування до наявних записів.
+        Для SQLite — UPDATE у базі, для решти сховищ — правило в LabelMap.
+        Кеш змінюється на місці: за зворотним індексом пар (TypedLedger)
+        перекодовуються лише зачеплені рядки або лише запис словника;
+        індекс агрегатів і куб підсумків переносяться між ключами без перерахунку.
+        """
+        with self.storage.lock(), profiler.span("expenses.relabel") as span:
+            self._refresh_cache()
+            signature = self._signature()
+            aggregates_were_fresh = self._aggregates_ready and self.aggregates.is_current(signature)
+            rollups_were_fresh = self._rollups_ready and self.rollups.is_current(signature)
+
+            if hasattr(self.storage, "relabel"):
+                self.storage.relabel(rule)
+                cache_still_fresh = True
+            else:
+                rule.append(len(self._cache))
+                cache_still_fresh = self.labels.add(rule)
+
+            if cache_still_fresh:
+                self._cache, touched = relabel_frame(self._cache, [rule], self._typed_ledger())
+                span.rows = touched
+                self._cache_signature = self._signature()
+                self._cache_valid = None
+                self._sort_orders = {}
+                self._ledger = None
+                self._text_masks = {}
+                self._text_orders = {}
+            else:
+                # правила тим часом змінив інший процес
+                touched = None
+                self.invalidate_cache()
+                aggregates_were_fresh = rollups_were_fresh = False
+
+            if aggregates_were_fresh:
+                self.aggregates.relabel(lambda cat, sub: resolve(cat, sub, [rule]))
+                self.aggregates.save(self._signature())
+            else:
+                self._aggregates_ready = False
+
+            if rollups_were_fresh:
+                self.rollups.relabel(lambda cat, sub: resolve(cat, sub, [rule]))
+                self.rollups.save(self._signature())
+            else:
+                self._rollups_ready = False
+
+            if rule[0] == "category":
+                self.budgets.rename(rule[1], rule[2])
+        return touched
+
+    @synchronized
+    def rebuild_aggregates(self):
+        """
+        Перебудовує індекс агрегатів із сирих даних і зберігає контрольну точку.
+        """
+        signature = self._signature()
+        self._refresh_cache()
+        ledger = self._typed_ledger()
+        with profiler.span("aggregates.rebuild", rows=len(ledger)):
+            self.aggregates.rebuild(ledger)
+        self.aggregates.save(signature)
+        self._aggregates_ready = True
+
+    @synchronized
+    def verify_aggregates(self):
+        """
+        Перевіряє узгодженість індексу агрегатів із сирими даними.
+        Повертає список розбіжностей (порожній — якщо все гаразд).
+        """
+        self._ensure_aggregates()
+        fresh = AggregateIndex(None)
+        self._refresh_cache()
+        fresh.rebuild(self._typed_ledger())
+        return self.aggregates.diff(fresh)
+
+    def _ensure_aggregates(self) -> AggregateIndex:
+        signature = self._signature()
+        if self._aggregates_ready and self.aggregates.is_current(signature):
+            return self.aggregates
+        # контрольну точку могла оновити інша копія програми
+        if self.aggregates.load(signature):
+            self._aggregates_ready = True
+        else:
+            self.rebuild_aggregates()
+        return self.aggregates
+
+    # ---------- Часова аналітика (куб підсумків) ----------
+    # Фільтри дат і категорій — зрізи куба; з пошуком text куб
+    # будується лише із знайдених рядків.
+
+    @synchronized
+    @profiler.timed("expenses.period_totals")
+    def period_totals(self, level="month", date_from=None, date_to=None, categories=None,
+                      subcategories=None, text=None) -> pd.Series:
+        """
+        Суми за періодами: level — "day", "week", "month", "quarter" або "year".
+        """
+        return self._rollups_for(text).totals(level, date_from, date_to, categories, subcategories)
+
+    @synchronized
+    @profiler.timed("expenses.year_over_year")
+    def year_over_year(self, date_from=None, date_to=None, categories=None, subcategories=None,
+                       text=None) -> pd.DataFrame:
+        """
+        Місячні суми за роками (рядки — місяці, стовпці — роки).
+        """
+        return self._rollups_for(text).year_over_year(date_from, date_to, categories, subcategories)
+
+    @synchronized
+    @profiler.timed("expenses.rolling_average")
+    def rolling_average(self, window=30, date_from=None, date_to=None, categories=None,
+                        subcategories=None, text=None) -> pd.Series:
+        """
+        Ковзна середня денна сума за window днів.
+        """
+        return self._rollups_for(text).rolling_average(window, date_from, date_to, categories, subcategories)
+
+    @synchronized
+    @profiler.timed("expenses.budget_vs_actual")
+    def budget_vs_actual(self, date_from=None, date_to=None, categories=None, subcategories=None,
+                         text=None) -> pd.DataFrame:
+        """
+        Наростаючі факт і бюджет за днями періоду (типово — поточного року даних).
+        """
+        return self._rollups_for(text).budget_vs_actual(self.budgets.load(), date_from, date_to,
+                                                        categories, subcategories)
+
+    @synchronized
+    def rebuild_rollups(self):
+        """
+        Перебудовує куб підсумків із сирих даних і зберігає контрольну точку.
+        """
+        signature = self._signature()
+        self._refresh_cache()
+        ledger = self._typed_ledger()
+        with profiler.span("rollups.rebuild", rows=len(ledger)):
+            self.rollups.rebuild(ledger)
+        self.rollups.save(signature)
+        self._rollups_ready = True
+
+    @synchronized
+    def flush(self):
+        """
+        Записує відкладені на диск зміни: контрольну точку куба підсумків
+        і перейменування з правил LabelMap (apply_labels). Викликається
+        перед завершенням програми; без нього незбережений куб просто
+        перераховується з даних при наступному запуску, а правила
+        застосовуються при зчитуванні, як і раніше.
+        """
+        self.apply_labels()
+        self.rollups.flush()
+
+    @synchronized
+    def apply_labels(self):
+        """
+        Переносить перейменування з правил LabelMap у сам файл витрат
+        і видаляє правила. Правила прив'язані до позицій рядків: якби файл
+        переписала стороння програма (упорядкувала, видалила рядки), вони
+        перейменували б не ті записи. Зміст даних не змінюється, тож кеш,
+        індекс агрегатів і куб підсумків лише переносяться на нову версію.
+        Повертає кількість перенесених правил (SQLite перейменовує записи
+        одразу, у нього правил немає).
+        """
+        if not hasattr(self.storage, "apply_labels"):
+            return 0
+        with self.storage.lock():
+            rules = self.labels.load()
+            if not rules:
+                return 0
+            with profiler.span("expenses.apply_labels", rows=len(rules)):
+                signature = self._signature()
+                cache_was_fresh = self._cache is not None and signature == self._cache_signature
+                aggregates_were_fresh = self._aggregates_ready and self.aggregates.is_current(signature)
+                rollups_were_fresh = self._rollups_ready and self.rollups.is_current(signature)
+
+                self.storage.apply_labels(rules)
+                self.labels.clear()
+                signature = self._signature()
+
+                if cache_was_fresh:
+                    self._cache_signature = signature
+                if aggregates_were_fresh:
+                    self.aggregates.save(signature)
+                if rollups_were_fresh:
+                    self.rollups.save(signature)
+        return len(rules)
+
+    def _rollups_for(self, text=None) -> RollupCube:
+        if not text:
+            return self._ensure_rollups()
+        self._refresh_cache()
+        cube = RollupCube(None)
+        cube.rebuild(self._typed_ledger(), self._select(None, None, None, None, text))
+        return cube
+
+    def _ensure_rollups(self) -> RollupCube:
+        signature = self._signature()
+        if self._rollups_ready and self.rollups.is_current(signature):
+            return self.rollups
+        if self.rollups.load(signature):
+            self._rollups_ready = True
+        else:
+            self.rebuild_rollups()
+        return self.rollups
+
+    def _select(self, date_from, date_to, categories, subcategories, text=None):
+        """
+        Позиції рядків кешу, що відповідають фільтрам (None — усі рядки).
+        Діапазон дат — двійковий пошук у відсортованому індексі дат,
+        пошук — маска з інвертованого індексу, категорії — порівняння кодів словника.
+        """
+        positions = None
+        if date_from is not None or date_to is not None:
+            order, dates = self._date_index()
+            start = np.searchsorted(dates, as_day(date_from), "left") if date_from is not None else 0
+            stop = np.searchsorted(dates, as_day(date_to), "right") if date_to is not None else len(dates)
+            positions = order[start:stop]
+        if text:
+            mask = self._text_mask(text)
+            positions = np.flatnonzero(mask) if positions is None else positions[mask[positions]]
+        for column, values in (("Категорія", categories), ("Підкатегорія", subcategories)):
+            if values is not None:
+                positions = self._typed_ledger().match(column, values, positions)
+        return positions
+
+    @synchronized
+    def count(self, text=None) -> int:
+        """
+        Загальна кількість записів (включно з некоректними)
+        або кількість знайдених пошуковим запитом text.
+        """
+        self._refresh_cache()
+        if text:
+            return int(self._text_mask(text).sum())
+        return len(self._cache)
+
+    @synchronized
+    @profiler.timed("expenses.get_page")
+    def get_page(self, offset, limit, sort_by=None, ascending=True, text=None) -> pd.DataFrame:
+        """
+        Повертає limit записів, починаючи з позиції offset, у порядку
+        файлу або відсортованими за стовпцем sort_by; з text — лише знайдені
+        пошуком. Сортування і пошук виконуються менеджером один раз
+        і перевикористовуються для всіх сторінок.
+        """
+        self._refresh_cache()
+        if text:
+            return self._cache.iloc[self._text_rows(text, sort_by, ascending)[offset:offset + limit]]
+        if sort_by is None:
+            return self._cache.iloc[offset:offset + limit]
+        order = self._sort_order(sort_by, ascending)
+        return self._cache.iloc[order[offset:offset + limit]]
+
+    @synchronized
+    def export_csv(self, csv_path):
+        """
+        Експортує всі витрати у CSV (дата — yyyy-mm-dd) для обміну
+        з іншими програмами незалежно від формату сховища.
+        """
+        format_frame(self.get_expenses()).to_csv(csv_path, index=False)
+
+    @synchronized
+    def invalidate_cache(self):
+        """
+        Примусово скидає кеш — наступне зчитування розбере файл заново.
+        """
+        self._cache = None
+        self._cache_signature = None
+        self._pending = []
+        self._search_values = {}
+        self._reset_derived()
+
+    # ---------- Кеш ----------
+
+    def _refresh_cache(self):
+        signature = self._signature()
+        if self._cache is not None and signature == self._cache_signature:
+            self.cache_hits += 1
+        else:
+            self.cache_misses += 1
+            self.invalidate_cache()
+            with profiler.span("expenses.load") as span:
+                df = self.storage.load()
+                span.rows = len(df)
+            with profiler.span("expenses.compact", rows=len(df)):
+                self._cache, _ = relabel_frame(compact_frame(df, self._category_dictionary()),
+                                               self.labels.load())
+            self._cache_signature = signature
+
+        if self._pending:
+            with profiler.span("expenses.merge_pending", rows=sum(len(frame) for frame in self._pending)):
+                self._extend_search_values(self._pending)
+                columns = list(self._cache.columns)
+                start, orders = len(self._cache), self._sort_orders
+                self._cache = concat_frames([self._cache] + [frame.reindex(columns=columns)
+                                                             for frame in self._pending])
+                self._pending = []
+                self._reset_derived()
+                self._sort_orders = self._extend_sort_orders(orders, start)
+
+    def _category_dictionary(self):
+        return self.category_manager.categories if self.category_manager is not None else None
+
+    def _reset_derived(self):
+        """
+        Скидає структури, похідні від кешу (фільтровані дані, порядки сортування,
+        колонкове подання).
+        """
+        self._cache_valid = None
+        self._sort_orders = {}
+        self._date_order = None
+        self._sorted_dates = None
+        self._ledger = None
+        self._text_masks = {}
+        self._text_orders = {}
+
+    def _typed_ledger(self) -> TypedLedger:
+        """
+        Колонкове подання кешу (копійки, дні, коди категорій) для підсумків.
+        Викликати після _refresh_cache.
+        """
+        if self._ledger is None:
+            with profiler.span("expenses.ledger", rows=len(self._cache)):
+                self._ledger = TypedLedger(self._cache)
+        return self._ledger
+
+    def _date_index(self):
+        """
+        Відсортований індекс дат: перестановка рядків кешу за датою
+        та відповідний масив дат без пропусків (для np.searchsorted).
+        """
+        if self._date_order is None:
+            days = self._typed_ledger().days
+            order = np.argsort(days, kind="stable")  # NaT потрапляють у кінець
+            valid = int((~np.isnat(days)).sum())
+            self._date_order = order[:valid]
+            self._sorted_dates = days[self._date_order]
+        return self._date_order, self._sorted_dates
+
+    # ---------- Пошук ----------
+
+    def _column_value_ids(self, column):
+        """
+        (коди рядків, таблиця код -> номер значення SearchIndex) для стовпця.
+        Для словникових стовпців таблиця будується за словником (один раз
+        на словник), для решти коди — вже номери значень (таблиця None),
+        які при дописуванні доповнюються (_extend_search_values).
+        Нові значення потрапляють в індекс; зберігає його викликач (flush).
+        """
+        values = self._cache[column]
+        cached = self._search_values.get(column)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = values.cat.categories
+            if not isinstance(cached, tuple) or cached[0] is not categories:
+                # код -1 (порожньо) потрапляє на останній елемент таблиці
+                table = np.append(self.search_index.ids(categories), np.int32(-1))
+                cached = self._search_values[column] = (categories, table)
+            return values.cat.codes.to_numpy(), cached[1]
+        if not isinstance(cached, np.ndarray) or len(cached) != len(values):
+            codes, uniques = pd.factorize(values)
+            cached = np.append(self.search_index.ids(uniques), np.int32(-1))[codes]
+            self._search_values[column] = cached
+        return cached, None
+
+    def _extend_search_values(self, frames):
+        for column, ids in self._search_values.items():
+            if isinstance(ids, np.ndarray):
+                added = [self.search_index.ids(frame[column] if column in frame else [None] * len(frame))
+                         for frame in frames]
+                self._search_values[column] = np.concatenate([ids] + added)
+        self.search_index.flush()
+
+    def _text_mask(self, text) -> np.ndarray:
+        """
+        Булева маска рядків кешу, що відповідають пошуковому запиту text:
+        кожен терм має знайтися хоч в одному зі стовпців SEARCH_COLUMNS.
+        Обчислюється один раз на версію даних.
+        """
+        mask = self._text_masks.get(text)
+        if mask is None:
+            with profiler.span("expenses.search", rows=len(self._cache)):
+                columns = [self._column_value_ids(column)
+                           for column in SEARCH_COLUMNS if column in self._cache.columns]
+                self.search_index.flush()
+                terms = self.search_index.match(text)
+                # запит лише з розділових знаків (без жодного токена) нічого
+                # не знаходить; порожній чи з самих пробілів — не фільтр
+                mask = np.full(len(self._cache), all(terms) if terms else not text.strip(), dtype=bool)
+                # до 8 термів за прохід: біт терму для кожного значення,
+                # тож кожен стовпець переглядається один раз на всі терми
+                for first in range(0, len(terms) if mask.any() else 0, 8):
+                    chunk = terms[first:first + 8]
+                    # зайвий останній елемент (0) — для порожніх значень (-1)
+                    bits = np.zeros(len(self.search_index.values) + 1, dtype=np.uint8)
+                    hit = np.zeros(len(bits), dtype=bool)
+                    for bit, postings in enumerate(chunk):
+                        # лише запис у булевий масив і одна векторна операція:
+                        # "bits[ids] |= ..." ще й читав би кожен елемент
+                        hit[:] = False
+                        hit[postings[0] if len(postings) == 1 else np.concatenate(postings)] = True
+                        bits |= hit.view(np.uint8) << bit
+                    found = np.zeros(len(mask), dtype=np.uint8)
+                    for codes, table in columns:
+                        column_bits = bits if table is None else bits[table]
+                        if column_bits.any():
+                            found |= column_bits[codes]
+                    mask &= found == (1 << len(chunk)) - 1
+            if len(self._text_masks) >= MAX_CACHED_SEARCHES:
+                self._text_masks.clear()
+                self._text_orders.clear()
+            self._text_masks[text] = mask
+        return mask
+
+    def _text_rows(self, text, sort_by, ascending) -> np.ndarray:
+        """
+        Позиції знайдених рядків у порядку файлу або впорядковані
+        за стовпцем sort_by (за рангом у повному порядку сортування).
+        """
+        key = (text, sort_by, ascending)
+        rows = self._text_orders.get(key)
+        if rows is None:
+            rows = np.flatnonzero(self._text_mask(text))
+            if sort_by is not None:
+                order = self._sort_order(sort_by, ascending)
+                rank = np.empty(len(order), dtype=np.int64)
+                rank[order] = np.arange(len(order))
+                rows = rows[np.argsort(rank[rows], kind="stable")]
+            self._text_orders[key] = rows
+        return rows
+
+    def _extend_sort_orders(self, orders, start):
+        """
+        Доповнює готові порядки сортування за сумою й датою рядками,
+        дописаними з позиції start, без повного пересортування: нові рядки
+        вставляються двійковим пошуком (за рівних значень — після наявних,
+        як у стабільному сортуванні; порожні — в кінець). Порядки за
+        текстовими стовпцями (словник кодів міг змінитись) відкидаються
+        і за потреби будуються заново.
+        """
+        extended = {}
+        for (column, ascending), order in orders.items():
+            values = self._cache[column]
+            if values.dtype.kind not in "fiM":
+                continue
+            missing = values.isna().to_numpy()
+            keys = values.to_numpy()
+            if keys.dtype.kind == "M":
+                keys = keys.astype("datetime64[ns]").view(np.int64)
+            if not ascending:
+                keys = -keys
+            present = len(order) - int(missing[:start].sum())
+            added = np.arange(start, len(keys))
+            new, new_missing = added[~missing[start:]], added[missing[start:]]
+            new = new[np.argsort(keys[new], kind="stable")]
+            at = np.searchsorted(keys[order[:present]], keys[new], side="right")
+            extended[(column, ascending)] = np.concatenate(
+                [np.insert(order[:present], at, new), order[present:], new_missing])
+        return extended
+
+    def _sort_order(self, column, ascending):
+        """
+        Перестановка рядків кешу, відсортованих за стовпцем (порожні — в кінці).
+        Обчислюється один раз на версію даних.
         """
-        return pd.read_csv(self.csv_file_path)
+        key = (column, ascending)
+        if key not in self._sort_orders:
+            values = self._cache[column].reset_index(drop=True)
+            if isinstance(values.dtype, pd.CategoricalDtype) and \
+                    not values.cat.categories.is_monotonic_increasing:
+                # після перейменувань словник може бути не впорядкований за абеткою
+                values = values.cat.reorder_categories(values.cat.categories.sort_values())
+            ordered = values.sort_values(ascending=ascending, kind="stable", na_position="last")
+            self._sort_orders[key] = ordered.index.to_numpy()
+        return self._sort_orders[key]
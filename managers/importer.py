@@ -0,0 +1,160 @@
+import time
+import numpy as np
+import pandas as pd
+
+from managers.profiling import profiler
+from managers.storage import coerce_types
+
+# Стовпці, за якими запис вважається дублікатом уже наявного
+KEY_COLUMNS = ["Дата", "Сума", "Категорія", "Підкатегорія", "Коментар"]
+
+# Скільки відхилених рядків зберігати у звіті з причинами (решта лише рахується)
+MAX_REPORTED_REJECTS = 1000
+
+
+class ImportReport:
+    """
+    Підсумок імпорту: скільки рядків прочитано, додано, пропущено як дублікати
+    та відхилено (з номерами рядків файлу й причинами).
+    """
+    def __init__(self, path):
+        self.path = path
+        self.rows_read = 0
+        self.imported = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.rejected_lines = []  # (номер рядка у файлі, причина)
+        self.seconds = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows_read / self.seconds if self.seconds else 0.0
+
+    def reject(self, line_numbers, reason):
+        self.rejected += len(line_numbers)
+        room = MAX_REPORTED_REJECTS - len(self.rejected_lines)
+        self.rejected_lines.extend((int(line), reason) for line in line_numbers[:max(room, 0)])
+
+    def __str__(self):
+        return (f"Прочитано: {self.rows_read}, додано: {self.imported}, "
+                f"дублікатів: {self.duplicates}, відхилено: {self.rejected} "
+                f"({self.rows_per_second:,.0f} рядків/с)")
+
+
+class DuplicateIndex:
+    """
+    Хеш-індекс наявних записів для пошуку дублікатів.
+    Зберігає лише відсортований масив 64-бітних хешів (8 байт на рядок)
+    і кількість повторів кожного хешу: однакові платежі в один день
+    трапляються, тож дублікатом вважається лише «зайвий» повтор.
+    """
+    def __init__(self, df: pd.DataFrame):
+        hashes = row_hashes(df) if len(df) else np.empty(0, dtype=np.uint64)
+        self.hashes, self.counts = np.unique(hashes, return_counts=True)
+        self.used = {}  # хеш -> скільки наявних записів уже «зайнято» імпортом
+
+    def is_duplicate(self, hashes) -> np.ndarray:
+        positions = np.searchsorted(self.hashes, hashes)
+        positions = np.minimum(positions, max(len(self.hashes) - 1, 0))
+        candidates = np.flatnonzero(self.hashes[positions] == hashes) if len(self.hashes) else []
+
+        result = np.zeros(len(hashes), dtype=bool)
+        for i in candidates:
+            h = int(hashes[i])
+            used = self.used.get(h, 0)
+            if used < self.counts[positions[i]]:
+                self.used[h] = used + 1
+                result[i] = True
+        return result
+
+
+def row_hashes(df: pd.DataFrame) -> np.ndarray:
+    """
+    Хеш нормалізованого запису: дата yyyy-mm-dd, сума в копійках, текстові поля
+    без пробілів на краях, як у normalize_chunk (у наявних записах вони
+    трапляються, а порожнє значення і відсутнє вважаються однаковими).
+    """
+    key = pd.DataFrame({
+        "Дата": df["Дата"].dt.strftime("%Y-%m-%d"),
+        "Сума": (df["Сума"] * 100).round().astype("Int64"),
+    })
+    for col in KEY_COLUMNS[2:]:
+        key[col] = df[col].astype("string").str.strip() if col in df else None
+    key = key.astype(object).where(key.notna(), "")
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+
+def normalize_chunk(chunk: pd.DataFrame, columns) -> pd.DataFrame:
+    """
+    Приводить пачку сирих рядків до стовпців сховища: обрізає пробіли,
+    розбирає дати обох форматів і суми. Невідомі стовпці відкидаються.
+    """
+    chunk = chunk.rename(columns=lambda col: col.strip().lstrip("\ufeff"))
+    chunk = chunk.apply(lambda values: values.str.strip())
+    chunk = chunk.where(chunk != "").reindex(columns=columns)
+    return coerce_types(chunk)
+
+
+def validate_chunk(df: pd.DataFrame, categories=None) -> pd.Series:
+    """
+    Повертає для кожного рядка причину відхилення або None.
+    Якщо передано словник categories, категорія й підкатегорія
+    мають у ньому існувати.
+    """
+    reasons = pd.Series(None, index=df.index, dtype=object)
+    if categories is not None:
+        known_pairs = {(cat, sub) for cat, subcats in categories.items() for sub in subcats}
+        pairs = list(zip(df["Категорія"], df["Підкатегорія"]))
+        bad_sub = np.array([pair not in known_pairs for pair in pairs], dtype=bool)
+        reasons[bad_sub] = "невідома підкатегорія"
+        reasons[~df["Категорія"].isin(list(categories))] = "невідома категорія"
+    reasons[df["Сума"].isna()] = "некоректна сума"
+    reasons[df["Дата"].isna()] = "некоректна дата"
+    return reasons
+
+
+def import_csv(manager, path, categories=None, chunksize=50_000, progress=None) -> ImportReport:
+    """
+    Потоковий імпорт CSV у ExpenseManager пачками по chunksize рядків.
+    Пам'ять обмежена розміром пачки і хешами наявних записів (8 байт
+    на рядок): кеш менеджера на час імпорту скидається, щоб пачки не
+    накопичувались у ньому до наступного читання — після імпорту його
+    буде зчитано зі сховища заново. Індекси агрегатів і куб підсумків
+    оновлюються пачками, як і раніше.
+    progress(report) викликається після кожної пачки.
+    """
+    report = ImportReport(path)
+    start = time.perf_counter()
+    columns = manager.storage.columns()
+    duplicates = DuplicateIndex(manager.get_expenses())
+
+    # рядок 1 — заголовок, тож перший запис має номер 2
+    first_line = 2
+    for chunk in pd.read_csv(path, dtype=str, chunksize=chunksize, keep_default_na=False,
+                             skip_blank_lines=True):
+        line_numbers = np.arange(first_line, first_line + len(chunk))
+        first_line += len(chunk)
+        report.rows_read += len(chunk)
+
+        with profiler.span("import.prepare_chunk", rows=len(chunk)):
+            df = normalize_chunk(chunk, columns)
+            reasons = validate_chunk(df, categories)
+            rejected = reasons.notna().to_numpy()
+            for reason in reasons[rejected].unique():
+                report.reject(line_numbers[(reasons == reason).to_numpy()], reason)
+
+            df = df[~rejected]
+            is_duplicate = duplicates.is_duplicate(row_hashes(df)) if len(df) else np.zeros(0, dtype=bool)
+            report.duplicates += int(is_duplicate.sum())
+            df = df[~is_duplicate]
+
+        # скидаємо щоразу: кеш міг зчитати паралельний читач (вкладка, сервер)
+        manager.invalidate_cache()
+        manager.add_frame(df.reset_index(drop=True))
+        report.imported += len(df)
+        report.seconds = time.perf_counter() - start
+        if progress is not None:
+            progress(report)
+
+    report.seconds = time.perf_counter() - start
+    return report
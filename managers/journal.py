@@ -0,0 +1,150 @@
+import json
+import os
+
+from managers.locking import file_lock
+
+
+class WriteJournal:
+    """
+    Журнал попереднього запису (<файл>.journal) для CSV-сховища.
+
+    Нові записи дописуються в невеликий журнал замість основного файлу,
+    а періодично переносяться в нього пачкою (compact). Кожна пачка —
+    один JSON-рядок {"csv": текст}: запис, обірваний збоєм посеред write,
+    не є цілим рядком і відкидається при читанні.
+
+    Group commit: після дописування процес чекає не власного fsync,
+    а лише того, щоб журнал був скинутий на диск принаймні до кінця
+    його запису. Поки один процес виконує fsync, інші дописують свої
+    пачки, і наступний fsync фіксує їх усі разом. Межа вже зафіксованої
+    частини журналу зберігається у файлі <журнал>.synced.
+
+    Дописування та перенесення мають виконуватися під блокуванням
+    сховища (див. CsvStorage.lock); сам журнал блокує лише fsync.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._sync_lock = file_lock(path + ".sync")
+        self.stats = {"appends": 0, "fsyncs": 0, "piggybacked": 0}
+
+    # ---------- Запис ----------
+
+    def append(self, text) -> int:
+        """
+        Дописує пачку CSV-рядків. Повертає кінець запису в журналі —
+        аргумент для commit().
+        """
+        line = (json.dumps({"csv": text}, ensure_ascii=False) + "\n").encode("utf-8")
+        with open(self.path, "ab") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() and not self._ends_with_newline():
+                # хвіст обірваного запису: відокремлюємо, щоб не зіпсувати новий
+                f.write(b"\n")
+            f.write(line)
+            end = f.tell()
+        self.stats["appends"] += 1
+        return end
+
+    def commit(self, end):
+        """
+        Повертається, коли журнал надійно записаний на диск до позиції end.
+        """
+        with self._sync_lock:
+            if self._synced() >= end:
+                self.stats["piggybacked"] += 1
+                return
+            fd = os.open(self.path, os.O_RDWR)
+            try:
+                size = os.fstat(fd).st_size
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+            self._set_synced(size)
+            self.stats["fsyncs"] += 1
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    # ---------- Читання та перенесення ----------
+
+    def read(self):
+        """
+        Повертає (CSV-текст усіх цілих пачок, позицію кінця останньої з них,
+        позицію основного файлу з незавершеного перенесення або None).
+        """
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return "", 0, None
+
+        texts = []
+        valid_end = 0
+        compact_from = None
+        position = 0
+        for line in data.splitlines(keepends=True):
+            position += len(line)
+            if not line.endswith(b"\n"):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if "compact_from" in entry:
+                compact_from = entry["compact_from"]
+                break
+            texts.append(entry["csv"])
+            valid_end = position
+        return "".join(texts), valid_end, compact_from
+
+    def begin_compaction(self, main_size, valid_end):
+        """
+        Позначає в журналі початок перенесення: якщо процес впаде
+        посеред дописування в основний файл, recover() обріже його
+        до main_size, і перенесення повториться з нуля.
+        """
+        with open(self.path, "r+b") as f:
+            f.truncate(valid_end)
+            f.seek(valid_end)
+            f.write((json.dumps({"compact_from": main_size}) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        """
+        Очищає журнал після перенесення записів в основний файл.
+        """
+        with self._sync_lock:
+            with open(self.path, "r+b") as f:
+                f.truncate(0)
+                os.fsync(f.fileno())
+            self._set_synced(0)
+
+    def discard_marker(self, valid_end):
+        with open(self.path, "r+b") as f:
+            f.truncate(valid_end)
+            os.fsync(f.fileno())
+
+    # ---------- Внутрішнє ----------
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _synced_path(self):
+        return self.path + ".synced"
+
+    def _synced(self):
+        try:
+            with open(self._synced_path(), "r", encoding="ascii") as f:
+                return int(f.read() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def _set_synced(self, size):
+        with open(self._synced_path(), "w", encoding="ascii") as f:
+            f.write(str(size))
@@ -0,0 +1,190 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from managers.locking import file_lock
+
+
+class LabelMap:
+    """
+    Перейменування категорій і підкатегорій у записах (<файл>.labels.json).
+
+    Сховище витрат не переписується: кожне перейменування чи об'єднання
+    дописується правилом у невеликий файл, а правила застосовуються
+    до записів при зчитуванні (relabel_frame) над кодами словників,
+    а не рядками тексту. Тож перейменування в журналі з мільйонів
+    рядків займає частку секунди.
+
+    Правила прив'язані до позицій рядків, тож живуть лише до
+    ExpenseManager.apply_labels (зокрема при flush перед завершенням
+    програми): тоді назви переписуються в сам файл витрат, а правила
+    видаляються (clear) — і файл, який потім упорядкує чи відредагує
+    стороння програма, не розійдеться з ними.
+
+    Правила (у порядку додавання; rows — кількість записів на момент правила):
+    ["category", стара, нова, rows] — записи категорії переходять у нову
+        (якщо нова вже вживається — категорії об'єднуються);
+    ["subcategory", категорія, стара, нова категорія, нова підкатегорія, rows] —
+        записи однієї пари переходять в іншу пару.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._lock = file_lock(path)
+        self.rules = []
+        self._signature = None
+
+    def signature(self):
+        """
+        Відбиток файлу правил (None — правил немає); входить у версію даних.
+        """
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def load(self):
+        """
+        Перечитує правила, якщо файл змінився (зокрема іншим процесом).
+        """
+        signature = self.signature()
+        if signature != self._signature:
+            self.rules = self._read()
+            self._signature = signature
+        return self.rules
+
+    def add(self, rule) -> bool:
+        """
+        Дописує правило. Повертає False, якщо тим часом файл змінив
+        інший процес, — тоді записи в пам'яті треба перечитати.
+        """
+        with self._lock:
+            current = self._read()
+            unchanged = current == self.rules
+            current.append(list(rule))
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(current, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+            self.rules = current
+            self._signature = self.signature()
+        return unchanged
+
+    def clear(self):
+        """
+        Видаляє файл правил (коли їх уже перенесено у файл витрат).
+        """
+        with self._lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.rules = []
+            self._signature = None
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+
+def resolve(category, subcategory, rules):
+    """
+    Куди потрапляє пара (категорія, підкатегорія) після правил rules
+    (без урахування меж rows). Порожні значення — None.
+    """
+    for rule in rules:
+        if rule[0] == "category":
+            if category == rule[1]:
+                category = rule[2]
+        elif (category, subcategory) == (rule[1], rule[2]):
+            category, subcategory = rule[3], rule[4]
+    return category, subcategory
+
+
+def relabel_frame(df: pd.DataFrame, rules, ledger=None):
+    """
+    Застосовує правила до стовпців "Категорія" / "Підкатегорія" (categorical).
+    Повертає (DataFrame, кількість змінених рядків).
+
+    Правило діє лише на перші rows рядків — ті, що існували, коли його
+    додали (сховища лише дописуються, тож позиції рядків стабільні);
+    пізніші записи зі старою назвою вже не перейменовуються.
+    З ledger (TypedLedger того самого DataFrame; лише для одного правила,
+    що діє на всі рядки) рядки беруться зі зворотного індексу пар,
+    тож решта рядків не переглядається.
+    Якщо нова назва категорії ще не вживається, змінюється лише запис словника.
+    """
+    if not rules or df.empty:
+        return df, 0
+    cats = _categorical(df["Категорія"])
+    subs = _categorical(df["Підкатегорія"])
+    cat_names, sub_names = list(cats.categories), list(subs.categories)
+    cat_index = {name: code for code, name in enumerate(cat_names)}
+    sub_index = {name: code for code, name in enumerate(sub_names)}
+    cat_codes = cats.codes.astype(np.int32)
+    sub_codes = subs.codes.astype(np.int32)
+
+    touched = 0
+    for rule in rules:
+        limit = rule[-1]
+        if rule[1] not in cat_index:
+            continue
+        old = cat_index[rule[1]]
+        if rule[0] == "category":
+            if ledger is not None:
+                rows = _ledger_rows(ledger, lambda cat, sub: cat == old)
+            else:
+                rows = np.flatnonzero(cat_codes[:limit] == old)
+            if rule[2] not in cat_index and len(rows) == int((cat_codes == old).sum()):
+                # нова назва ще не вживається і всі рядки переходять —
+                # досить перейменувати запис словника
+                del cat_index[rule[1]]
+                cat_names[old] = rule[2]
+                cat_index[rule[2]] = old
+            else:
+                cat_codes[rows] = _code(cat_names, cat_index, rule[2])
+        else:
+            if rule[2] not in sub_index:
+                continue
+            sub = sub_index[rule[2]]
+            if ledger is not None:
+                rows = _ledger_rows(ledger, lambda cat, s: cat == old and s == sub)
+            else:
+                rows = np.flatnonzero((cat_codes[:limit] == old) & (sub_codes[:limit] == sub))
+            cat_codes[rows] = _code(cat_names, cat_index, rule[3])
+            sub_codes[rows] = _code(sub_names, sub_index, rule[4])
+        touched += len(rows)
+
+    df = df.copy(deep=False)
+    df["Категорія"] = pd.Categorical.from_codes(cat_codes, categories=cat_names)
+    df["Підкатегорія"] = pd.Categorical.from_codes(sub_codes, categories=sub_names)
+    return df, touched
+
+
+def _ledger_rows(ledger, wanted):
+    """
+    Позиції рядків пар (код категорії, код підкатегорії), для яких wanted істинне.
+    """
+    width = len(ledger.subcategories) + 1
+    keys = [key for key in ledger.pair_keys().tolist() if wanted(key // width - 1, key % width - 1)]
+    if not keys:
+        return np.empty(0, dtype=np.int64)
+    return np.concatenate([ledger.pair_rows(key) for key in keys])
+
+
+def _categorical(values: pd.Series) -> pd.Categorical:
+    if not isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.astype("category")
+    return values.array
+
+
+def _code(names, index, name):
+    if name is None:
+        return -1
+    if name not in index:
+        index[name] = len(names)
+        names.append(name)
+    return index[name]
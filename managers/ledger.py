@@ -0,0 +1,222 @@
+import numpy as np
+import pandas as pd
+
+# Підсумки за парами (категорія, підкатегорія) рахуються np.bincount
+# по комбінованому коду, якщо кількість можливих пар не більша за цю межу;
+# інакше — через np.unique лише наявних пар
+MAX_PAIR_BINS = 1 << 22
+
+
+class TypedLedger:
+    """
+    Колонкове подання кешу витрат для підсумків і фільтрів:
+    - days — дати як datetime64[D];
+    - kopecks — суми цілими копійками (int64);
+    - valid — рядки з коректними датою та сумою (інші в підсумки не входять);
+    - category_codes / subcategory_codes — коди словників categories /
+      subcategories (-1 — порожнє значення).
+
+    Будується один раз на версію даних. Групування виконується
+    np.bincount за кодами, без хешування рядків, тож підсумки за мільйон
+    рядків займають мілісекунди. Коди беруться безпосередньо зі словникових
+    (categorical) стовпців кешу, без копіювання.
+    """
+    def __init__(self, df: pd.DataFrame):
+        self.days = df["Дата"].to_numpy(dtype="datetime64[D]")
+        amounts = pd.to_numeric(df["Сума"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        self.valid = ~np.isnat(self.days) & ~np.isnan(amounts)
+        self.kopecks = np.round(np.where(self.valid, amounts, 0) * 100).astype(np.int64)
+        self.categories, self.category_codes = _codes(df["Категорія"])
+        self.subcategories, self.subcategory_codes = _codes(df["Підкатегорія"])
+        self._months = None
+        self._reverse = None
+
+    def __len__(self):
+        return len(self.days)
+
+    # ---------- Вибірки ----------
+
+    def rows(self, positions=None) -> np.ndarray:
+        """
+        Позиції коректних рядків (серед positions, якщо задано).
+        """
+        if positions is None:
+            return np.flatnonzero(self.valid)
+        return positions[self.valid[positions]]
+
+    def match(self, column, values, positions=None) -> np.ndarray:
+        """
+        Позиції рядків (серед positions, якщо задано), у яких значення стовпця
+        "Категорія" / "Підкатегорія" входить у values. Порівнюються коди
+        через таблицю відповідності, а не рядки.
+        """
+        names, codes = ((self.categories, self.category_codes) if column == "Категорія"
+                        else (self.subcategories, self.subcategory_codes))
+        wanted = names.get_indexer(list(values))
+        table = np.zeros(len(names) + 1, dtype=bool)
+        table[wanted[wanted >= 0] + 1] = True  # зсув на 1: код -1 (порожньо) — у table[0]
+        if positions is None:
+            return np.flatnonzero(table[codes + 1])
+        return positions[table[codes[positions] + 1]]
+
+    def months(self) -> np.ndarray:
+        """
+        Номер місяця кожного рядка (місяці від 1970-01, як datetime64[M]).
+        """
+        if self._months is None:
+            self._months = self.days.astype("datetime64[M]").astype(np.int64)
+        return self._months
+
+    # ---------- Зворотний індекс пар (категорія, підкатегорія) ----------
+
+    def _reverse_index(self):
+        """
+        Ключ пари кодів (-1 — порожнє значення):
+        (код категорії + 1) * (кількість підкатегорій + 1) + код підкатегорії + 1.
+        Повертає (ключі наявних пар, межі груп, позиції рядків, упорядковані за парою):
+        рядки пари keys[i] — order[starts[i]:starts[i + 1]].
+        Будується один раз на версію даних, лише коли знадобиться.
+        """
+        if self._reverse is None:
+            width = len(self.subcategories) + 1
+            pairs = (self.category_codes.astype(np.int64) + 1) * width + self.subcategory_codes + 1
+            order = np.argsort(pairs, kind="stable")
+            keys, starts = np.unique(pairs[order], return_index=True)
+            if len(order) < 2 ** 31:
+                order = order.astype(np.int32)
+            self._reverse = (keys, np.append(starts, len(order)), order)
+        return self._reverse
+
+    def pair_keys(self) -> np.ndarray:
+        return self._reverse_index()[0]
+
+    def pair_rows(self, key) -> np.ndarray:
+        """
+        Позиції всіх рядків пари з ключем key (зокрема некоректних).
+        """
+        keys, starts, order = self._reverse_index()
+        i = np.searchsorted(keys, key)
+        if i == len(keys) or keys[i] != key:
+            return order[:0]
+        return order[starts[i]:starts[i + 1]]
+
+    def pair_counts(self) -> dict:
+        """
+        {(категорія, підкатегорія або None): кількість записів} — усіх,
+        зокрема з некоректними датою чи сумою; без записів без категорії.
+        """
+        keys, starts, _ = self._reverse_index()
+        width = len(self.subcategories) + 1
+        counts = {}
+        for key, count in zip(keys.tolist(), np.diff(starts).tolist()):
+            if key // width:
+                sub = key % width
+                counts[(self.categories[key // width - 1],
+                        self.subcategories[sub - 1] if sub else None)] = count
+        return counts
+
+    # ---------- Підсумки (копійки) ----------
+
+    def category_sums(self, rows):
+        """
+        (назви категорій, суми в копійках) для рядків rows; без порожніх категорій.
+        """
+        codes = self.category_codes[rows]
+        keep = codes >= 0
+        labels, sums = _bincount(codes[keep], self.kopecks[rows][keep], len(self.categories))
+        return self.categories[labels], sums
+
+    def subcategory_sums(self, rows):
+        """
+        (категорії, підкатегорії, суми в копійках) за парами для рядків rows.
+        """
+        cats = self.category_codes[rows]
+        subs = self.subcategory_codes[rows]
+        keep = (cats >= 0) & (subs >= 0)
+        width = len(self.subcategories)
+        pairs = cats[keep].astype(np.int64) * width + subs[keep]
+        kopecks = self.kopecks[rows][keep]
+        bins = len(self.categories) * width
+        if bins <= MAX_PAIR_BINS:
+            labels, sums = _bincount(pairs, kopecks, bins)
+        else:
+            labels, inverse = np.unique(pairs, return_inverse=True)
+            sums = np.bincount(inverse, weights=kopecks, minlength=len(labels))
+            sums = np.rint(sums).astype(np.int64)
+        return self.categories[labels // width], self.subcategories[labels % width], sums
+
+    def month_sums(self, rows):
+        """
+        (перші числа місяців як datetime64[M], суми в копійках) для рядків rows.
+        """
+        months = self.months()[rows]
+        if not len(months):
+            return np.empty(0, dtype="datetime64[M]"), np.empty(0, dtype=np.int64)
+        first = months.min()
+        labels, sums = _bincount(months - first, self.kopecks[rows], int(months.max() - first) + 1)
+        return (labels + first).astype("datetime64[M]"), sums
+
+    # ---------- Підсумки (pd.Series у гривнях, як у ExpenseManager) ----------
+
+    def category_totals(self, positions=None) -> pd.Series:
+        return self._category_series(self.rows(positions))
+
+    def subcategory_totals(self, positions=None) -> pd.Series:
+        return self._subcategory_series(self.rows(positions))
+
+    def monthly_totals(self, positions=None) -> pd.Series:
+        return self._month_series(self.rows(positions))
+
+    def report_totals(self, positions=None):
+        """
+        (за категоріями, за парами, за місяцями) з однієї вибірки рядків.
+        """
+        rows = self.rows(positions)
+        return self._category_series(rows), self._subcategory_series(rows), self._month_series(rows)
+
+    def _category_series(self, rows) -> pd.Series:
+        labels, sums = self.category_sums(rows)
+        # словник упорядкований, доки в ньому не з'явились перейменування (LabelMap)
+        return _to_series(sums, pd.Index(labels, name="Категорія")).sort_index()
+
+    def _subcategory_series(self, rows) -> pd.Series:
+        cats, subs, sums = self.subcategory_sums(rows)
+        index = pd.MultiIndex.from_arrays([cats, subs], names=["Категорія", "Підкатегорія"])
+        return _to_series(sums, index).sort_index()
+
+    def _month_series(self, rows) -> pd.Series:
+        months, sums = self.month_sums(rows)
+        return _to_series(sums, pd.DatetimeIndex(months.astype("datetime64[s]"), name="Місяць"))
+
+
+def as_day(value):
+    """
+    Дата фільтра (рядок, datetime, Timestamp) як datetime64[D].
+    """
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+def _codes(values: pd.Series):
+    """
+    (словник, коди) стовпця: для categorical — без копіювання,
+    для звичайного — через factorize з упорядкованим словником.
+    """
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        return values.cat.categories, values.cat.codes.to_numpy()
+    codes, uniques = pd.factorize(values, sort=True)
+    return pd.Index(uniques), codes
+
+
+def _bincount(codes, kopecks, size):
+    """
+    Суми kopecks за кодами 0..size-1; повертає лише коди, що трапились.
+    Ваги bincount — float64, точні для сум до 2**53 копійок.
+    """
+    counts = np.bincount(codes, minlength=size)
+    sums = np.bincount(codes, weights=kopecks, minlength=size)
+    labels = np.flatnonzero(counts)
+    return labels, np.rint(sums[labels]).astype(np.int64)
+
+
+def _to_series(kopecks, index) -> pd.Series:
+    return pd.Series(kopecks / 100, index=index, name="Сума", dtype="float64")
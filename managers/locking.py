@@ -0,0 +1,110 @@
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    Рекомендаційне (advisory) ексклюзивне блокування файлу між процесами:
+    fcntl.lockf на POSIX (працює і на мережевих дисках NFS),
+    msvcrt.locking на Windows. Блокується окремий файл <шлях>.lock,
+    тож сам файл даних можна вільно відкривати, замінювати й читати.
+
+    Усередині процесу блокування реентерабельне і діє також між потоками.
+    Екземпляри слід отримувати через file_lock(): на один файл у процесі —
+    один дескриптор, бо закриття будь-якого дескриптора файлу
+    знімає POSIX-блокування всього процесу.
+    """
+    def __init__(self, path, poll_interval=0.005):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    @property
+    def depth(self):
+        """
+        Глибина вкладеності в поточному власнику (0 — не захоплене).
+        """
+        return self._depth
+
+    def acquire(self):
+        self._thread_lock.acquire()
+        if self._depth == 0:
+            try:
+                self._lock_file()
+            except BaseException:
+                self._thread_lock.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0:
+            self._unlock_file()
+        self._thread_lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def _lock_file(self):
+        if self._fd is not None and self._reopened():
+            os.close(self._fd)
+            self._fd = None
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+        if fcntl is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX)
+            return
+        # msvcrt.LK_LOCK здається після 10 спроб, тож чекаємо самі
+        while True:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            try:
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+                return
+            except OSError:
+                time.sleep(self.poll_interval)
+
+    def _unlock_file(self):
+        if fcntl is not None:
+            fcntl.lockf(self._fd, fcntl.LOCK_UN)
+        else:
+            os.lseek(self._fd, 0, os.SEEK_SET)
+            msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+
+    def _reopened(self):
+        """
+        Файл блокування могли видалити вручну — тоді блокування старого
+        дескриптора вже нікого не зупиняє, і його треба відкрити заново.
+        """
+        try:
+            return os.fstat(self._fd).st_ino != os.stat(self.path).st_ino
+        except OSError:
+            return True
+
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def file_lock(path) -> FileLock:
+    """
+    Спільний для процесу FileLock для файлу даних path (блокується <path>.lock).
+    """
+    lock_path = os.path.abspath(path.rstrip("/\\")) + ".lock"
+    with _locks_guard:
+        lock = _locks.get(lock_path)
+        if lock is None:
+            lock = _locks[lock_path] = FileLock(lock_path)
+        return lock
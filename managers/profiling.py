@@ -0,0 +1,197 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# Змінна середовища, що вмикає профілювання: шлях до JSONL-файлу
+# або "1" (тоді записи йдуть у DEFAULT_PATH)
+ENV_VAR = "CHECKBUS_PROFILE"
+DEFAULT_PATH = "profile.jsonl"
+
+# Скільки останніх вимірів кожної операції тримати для p50/p95
+WINDOW = 1000
+
+
+class Span:
+    """
+    Один вимір: назва операції, тривалість, кількість рядків і байтів.
+    rows / nbytes заповнює код усередині блоку with.
+    """
+    __slots__ = ("name", "rows", "nbytes", "parent", "start")
+
+    def __init__(self, name, rows=None, nbytes=None):
+        self.name = name
+        self.rows = rows
+        self.nbytes = nbytes
+        self.parent = None
+        self.start = 0.0
+
+
+class _NullSpan:
+    """
+    Порожній вимір для вимкненого профілювання: майже нульові витрати.
+    """
+    __slots__ = ()
+    rows = None
+    nbytes = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """
+    Збирає тривалості операцій (завантаження, групування, малювання тощо).
+
+    Вимкнений за замовчуванням; вмикається змінною середовища CHECKBUS_PROFILE
+    або прапорцем --profile у main.py / report.py. Кожен вимір дописується
+    рядком у JSONL-файл (для аналізу реальних сесій) і потрапляє у вікно
+    останніх вимірів, з якого рахуються p50/p95 для панелі "Продуктивність".
+    """
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._durations = {}  # операція -> deque тривалостей (с)
+        self._totals = {}     # операція -> [кількість, рядків, байтів]
+
+    def configure(self, enabled=True, path=None):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self.enabled = enabled
+            self.path = path
+            if enabled and path:
+                self._file = open(path, "a", encoding="utf-8", buffering=1)
+
+    def configure_from_env(self):
+        value = os.environ.get(ENV_VAR, "")
+        if value and value != "0":
+            self.configure(True, DEFAULT_PATH if value == "1" else value)
+
+    def span(self, name, rows=None, nbytes=None):
+        """
+        with profiler.span("csv.read") as span: ...; span.rows = len(df)
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Timer(self, Span(name, rows, nbytes))
+
+    def timed(self, name):
+        """
+        Декоратор: вимірює виклик; якщо результат має довжину, вона стає rows.
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return fn(*args, **kwargs)
+                with self.span(name) as span:
+                    result = fn(*args, **kwargs)
+                    if hasattr(result, "__len__"):
+                        span.rows = len(result)
+                    return result
+            return wrapper
+        return decorator
+
+    def record(self, span, seconds):
+        entry = {
+            "ts": round(time.time(), 6),
+            "op": span.name,
+            "ms": round(seconds * 1e3, 3),
+            "rows": span.rows,
+            "bytes": span.nbytes,
+            "parent": span.parent,
+            "thread": threading.current_thread().name,
+            "pid": os.getpid(),
+        }
+        with self._lock:
+            durations = self._durations.get(span.name)
+            if durations is None:
+                durations = self._durations[span.name] = deque(maxlen=WINDOW)
+                self._totals[span.name] = [0, 0, 0]
+            durations.append(seconds)
+            totals = self._totals[span.name]
+            totals[0] += 1
+            totals[1] += span.rows or 0
+            totals[2] += span.nbytes or 0
+            if self._file is not None:
+                self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def summary(self):
+        """
+        Підсумок за операціями: {назва: {count, p50_ms, p95_ms, max_ms, rows, bytes}}.
+        Перцентилі — за останніми WINDOW вимірами.
+        """
+        with self._lock:
+            snapshot = {name: (sorted(durations), list(self._totals[name]))
+                        for name, durations in self._durations.items()}
+        return {
+            name: {
+                "count": totals[0],
+                "p50_ms": _percentile(durations, 50) * 1e3,
+                "p95_ms": _percentile(durations, 95) * 1e3,
+                "max_ms": durations[-1] * 1e3,
+                "rows": totals[1],
+                "bytes": totals[2],
+            }
+            for name, (durations, totals) in sorted(snapshot.items())
+        }
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._totals.clear()
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+
+class _Timer:
+    __slots__ = ("profiler", "span")
+
+    def __init__(self, profiler, span):
+        self.profiler = profiler
+        self.span = span
+
+    def __enter__(self):
+        stack = self.profiler._stack()
+        self.span.parent = stack[-1] if stack else None
+        stack.append(self.span.name)
+        self.span.start = time.perf_counter()
+        return self.span
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.span.start
+        self.profiler._stack().pop()
+        self.profiler.record(self.span, seconds)
+        return False
+
+
+def _percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+# Спільний профайлер процесу
+profiler = Profiler()
+profiler.configure_from_env()
@@ -0,0 +1,379 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from managers.aggregate_index import jsonable
+from managers.ledger import TypedLedger, as_day
+
+# Рівні часових підсумків; тиждень — ISO (з понеділка)
+LEVELS = ("day", "week", "month", "quarter", "year")
+
+# Після скількох дописувань куб записується на диск (checkpoint): файл
+# на 10 років займає мегабайти, і перезапис на кожне додавання подвоював
+# би його час. Незбережений залишок після перезапуску перераховується
+# з даних (контрольна точка з іншим відбитком сховища не приймається).
+SAVE_EVERY = 256
+
+
+class RollupCube:
+    """
+    Куб підсумків витрат: день × пара (категорія, підкатегорія), копійки int64.
+
+    Вимір пар зберігає лише наявні пари (None — порожня підкатегорія,
+    (None, None) — записи без категорії), тож куб за 10 років
+    і кілька десятків пар займає кілька мегабайтів. Тиждень, місяць,
+    квартал і рік — суми суцільних діапазонів днів (np.add.reduceat),
+    обчислюються при першому зверненні і далі оновлюються разом із днями.
+    Порівняння років, ковзні середні та бюджети беруть зрізи куба,
+    а не групують сирі рядки.
+
+    Як і AggregateIndex, враховує лише рядки з коректними датою та сумою,
+    оновлюється інкрементально при дописуванні записів і зберігається
+    контрольною точкою (<файл>.rollup.npz) з відбитком сховища —
+    не на кожне дописування, а кожні SAVE_EVERY змін і при flush.
+    """
+    def __init__(self, checkpoint_path):
+        self.checkpoint_path = checkpoint_path
+        self.signature = None
+        self._unsaved = 0
+        self.clear()
+
+    def clear(self):
+        self.start = None                 # перший день куба (datetime64[D])
+        self.last = None                  # останній день із записами
+        self.days = np.zeros((0, 0), dtype=np.int64)
+        self.pairs = []                   # номер стовпця -> (категорія, підкатегорія)
+        self.pair_index = {}
+        self._levels = {}                 # рівень -> (початки періодів, підсумки)
+
+    # ---------- Оновлення ----------
+
+    def rebuild(self, ledger: TypedLedger, rows=None):
+        """
+        Повністю перераховує куб із TypedLedger (лише рядки rows, якщо задано).
+        """
+        self.clear()
+        self._merge(ledger, ledger.rows(rows))
+
+    def add_frame(self, df: pd.DataFrame):
+        """
+        Враховує пачку типізованих записів (нові рядки сховища).
+        Без TypedLedger: для кількох рядків його побудова (factorize
+        словників) коштувала б більше, ніж саме оновлення куба.
+        """
+        days = df["Дата"].to_numpy(dtype="datetime64[D]")
+        amounts = pd.to_numeric(df["Сума"], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        valid = ~np.isnat(days) & ~np.isnan(amounts)
+        categories = df["Категорія"].to_numpy(dtype=object, na_value=None)[valid]
+        subcategories = df["Підкатегорія"].to_numpy(dtype=object, na_value=None)[valid]
+        columns = np.array([self._column(pair) for pair in zip(categories, subcategories)], dtype=np.int64)
+        self._accumulate(days[valid], np.round(amounts[valid] * 100).astype(np.int64), columns)
+
+    def _merge(self, ledger, rows):
+        if not len(rows):
+            return
+        width = len(ledger.subcategories) + 1
+        keys = (ledger.category_codes[rows].astype(np.int64) + 1) * width + ledger.subcategory_codes[rows] + 1
+        keys, inverse = np.unique(keys, return_inverse=True)
+        columns = np.array([self._column(_pair(ledger, key, width)) for key in keys.tolist()], dtype=np.int64)
+        self._accumulate(ledger.days[rows], ledger.kopecks[rows], columns[inverse.reshape(-1)])
+
+    def _accumulate(self, days, kopecks, columns):
+        """
+        Додає суми рядків (дні, копійки, стовпці пар) до куба:
+        один np.bincount за комбінованим кодом (день, пара).
+        """
+        if not len(days):
+            return
+        self._extend(days.min(), days.max())
+        used, inverse = np.unique(columns, return_inverse=True)
+        offsets = (days - self.start).astype(np.int64)
+        first = int(offsets.min())
+        span = int(offsets.max()) - first + 1
+        cells = (offsets - first) * len(used) + inverse.reshape(-1)
+        sums = np.bincount(cells, weights=kopecks, minlength=span * len(used))
+        block = np.rint(sums).astype(np.int64).reshape(span, len(used))
+        self.days[first:first + span, used] += block
+
+        # готові рівні оновлюються тим самим блоком: день -> його період
+        block_days = self.start + first + np.arange(span)
+        for level, (starts, totals) in self._levels.items():
+            buckets = np.searchsorted(starts, _bucket(block_days, level), "right") - 1
+            np.add.at(totals, (buckets[:, None], used[None, :]), block)
+
+    def _column(self, pair):
+        column = self.pair_index.get(pair)
+        if column is None:
+            column = self.pair_index[pair] = len(self.pairs)
+            self.pairs.append(pair)
+            self.days = np.pad(self.days, ((0, 0), (0, 1)))
+            self._levels = {}
+        return column
+
+    def _extend(self, first, last):
+        """
+        Розширює діапазон днів куба так, щоб він охоплював [first, last].
+        Нові дні в кінці додаються з запасом до кінця року — щоденні
+        записи не перевиділяють масив щоразу. Рівні, у яких з'явились
+        нові періоди, буде перераховано при наступному зверненні.
+        """
+        if self.start is None:
+            self.start = self.last = first
+        if first < self.start:
+            self.days = np.pad(self.days, (((self.start - first).astype(np.int64), 0), (0, 0)))
+            self.start = first
+            self._levels = {}
+        end = self.start + len(self.days)
+        if last >= end:
+            year_end = (last.astype("datetime64[Y]") + 1).astype("datetime64[D]")
+            self.days = np.pad(self.days, ((0, (year_end - end).astype(np.int64)), (0, 0)))
+        if last > self.last:
+            self._levels = {level: value for level, value in self._levels.items()
+                            if value[0][-1] == _bucket(last, level)}
+            self.last = last
+
+    def relabel(self, resolve):
+        """
+        Переносить стовпці після перейменування чи об'єднання категорій:
+        resolve(категорія, підкатегорія) -> нова пара; однакові пари зливаються.
+        """
+        pairs = [resolve(cat, sub) if cat is not None else (cat, sub) for cat, sub in self.pairs]
+        index = {}
+        for pair in pairs:
+            index.setdefault(pair, len(index))
+        if len(index) == len(pairs):
+            self.pairs, self.pair_index = pairs, index
+            return
+        days = np.zeros((len(self.days), len(index)), dtype=np.int64)
+        for column, pair in enumerate(pairs):
+            days[:, index[pair]] += self.days[:, column]
+        self.days, self.pairs, self.pair_index = days, list(index), index
+        self._levels = {}
+
+    # ---------- Зрізи ----------
+
+    def columns(self, categories=None, subcategories=None) -> np.ndarray:
+        """
+        Номери стовпців пар, що проходять фільтри (None — без фільтра).
+        """
+        categories = set(categories) if categories is not None else None
+        subcategories = set(subcategories) if subcategories is not None else None
+        return np.array([column for column, (cat, sub) in enumerate(self.pairs)
+                         if (categories is None or cat in categories)
+                         and (subcategories is None or sub in subcategories)], dtype=np.int64)
+
+    def level(self, level):
+        """
+        (початки періодів як datetime64[D], підсумки період × пара) до останнього дня.
+        """
+        if level not in self._levels:
+            days = self._dates()
+            if not len(days):
+                return days, self.days[:0]
+            starts, bounds = _buckets(days, level)
+            self._levels[level] = (starts, np.add.reduceat(self.days[:len(days)], bounds, axis=0))
+        return self._levels[level]
+
+    def totals(self, level="month", date_from=None, date_to=None, categories=None,
+               subcategories=None) -> pd.Series:
+        """
+        Суми за періодами рівня level (гривні; індекс — перший день періоду).
+        З межами дат періоди на краях рахуються лише за днями всередині меж.
+        """
+        if level != "day" and date_from is None and date_to is None:
+            starts, totals = self.level(level)
+            sums = totals[:, self.columns(categories, subcategories)].sum(axis=1)
+            return _to_series(sums, starts, _LEVEL_NAMES[level])
+        days, sums = self._slice(date_from, date_to, categories, subcategories)
+        if level != "day" and len(days):
+            days, bounds = _buckets(days, level)
+            sums = np.add.reduceat(sums, bounds)
+        return _to_series(sums, days, _LEVEL_NAMES[level])
+
+    def year_over_year(self, date_from=None, date_to=None, categories=None, subcategories=None) -> pd.DataFrame:
+        """
+        Місячні суми, розкладені за роками: рядки — місяці 1..12,
+        стовпці — роки; місяці поза даними — NaN (лінія року обривається).
+        """
+        monthly = self.totals("month", date_from, date_to, categories, subcategories)
+        if monthly.empty:
+            return pd.DataFrame(dtype="float64")
+        years = monthly.index.year.to_numpy()
+        table = np.full((12, years.max() - years.min() + 1), np.nan)
+        table[monthly.index.month.to_numpy() - 1, years - years.min()] = monthly.to_numpy()
+        return pd.DataFrame(table, index=pd.RangeIndex(1, 13, name="Місяць"),
+                            columns=pd.Index(range(years.min(), years.max() + 1), name="Рік"))
+
+    def rolling_average(self, window, date_from=None, date_to=None, categories=None,
+                        subcategories=None) -> pd.Series:
+        """
+        Середня денна сума за останні window днів (дні без витрат — нулі),
+        для кожного дня періоду. Перші дні куба діляться на кількість
+        наявних днів. Вікно на початку періоду бере й дні до date_from.
+        """
+        start = as_day(date_from) - (window - 1) if date_from is not None else None
+        days, sums = self._slice(start, date_to, categories, subcategories)
+        cumulative = np.concatenate([[0], np.cumsum(sums)])
+        ends = np.arange(1, len(days) + 1)
+        begins = np.maximum(ends - window, 0)
+        averages = (cumulative[ends] - cumulative[begins]) / (ends - begins)
+        if date_from is not None:
+            keep = days >= as_day(date_from)
+            days, averages = days[keep], averages[keep]
+        return _to_series(averages, days, "День")
+
+    def budget_vs_actual(self, budgets, date_from=None, date_to=None, categories=None,
+                         subcategories=None) -> pd.DataFrame:
+        """
+        Наростаючі підсумки фактичних витрат і бюджету за днями періоду
+        (типово — рік останнього запису). budgets — {категорія: бюджет на місяць};
+        бюджет місяця розподіляється рівномірно за його днями.
+        Бюджет береться для вибраних категорій (або всіх категорій з бюджетом).
+        """
+        if self.last is None:
+            return pd.DataFrame(dtype="float64")
+        if date_from is None and date_to is None:
+            date_from = self.last.astype("datetime64[Y]").astype("datetime64[D]")
+        first = as_day(date_from) if date_from is not None else self.start
+        last = as_day(date_to) if date_to is not None else (first.astype("datetime64[Y]") + 1).astype("datetime64[D]") - 1
+        days = np.arange(first, last + 1)
+        _, sums = self._slice(first, min(last, self.last), categories, subcategories)
+        # дні до початку куба — без витрат; після останнього запису — NaN
+        offset = max(int((self.start - first).astype(np.int64)), 0)
+        actual = np.full(len(days), np.nan)
+        actual[:offset] = 0
+        actual[offset:offset + len(sums)] = np.cumsum(sums) / 100
+
+        monthly = sum(amount for category, amount in budgets.items()
+                      if categories is None or category in categories)
+        months = days.astype("datetime64[M]")
+        month_days = ((months + 1).astype("datetime64[D]") - months.astype("datetime64[D]")).astype(np.int64)
+        planned = np.cumsum(monthly / month_days)
+        return pd.DataFrame({"Факт": actual, "Бюджет": planned},
+                            index=pd.DatetimeIndex(days.astype("datetime64[s]"), name="День"))
+
+    def _dates(self):
+        if self.start is None:
+            return np.empty(0, dtype="datetime64[D]")
+        return np.arange(self.start, self.last + 1)
+
+    def _slice(self, date_from, date_to, categories, subcategories):
+        """
+        (дні, суми за днями в копійках) у межах дат для вибраних пар.
+        """
+        days = self._dates()
+        first = np.searchsorted(days, as_day(date_from)) if date_from is not None else 0
+        stop = np.searchsorted(days, as_day(date_to), "right") if date_to is not None else len(days)
+        columns = self.columns(categories, subcategories)
+        block = self.days[first:stop]
+        if len(columns) == len(self.pairs):
+            return days[first:stop], block.sum(axis=1)
+        return days[first:stop], block[:, columns].sum(axis=1)
+
+    # ---------- Контрольна точка ----------
+
+    def save(self, signature):
+        """
+        Атомарно записує куб днів разом із відбитком сховища
+        (рівні перераховуються з нього при завантаженні).
+        """
+        self.signature = jsonable(signature)
+        tmp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, days=self.days,
+                     meta=np.array(json.dumps({
+                         "signature": self.signature,
+                         "start": None if self.start is None else str(self.start),
+                         "last": None if self.last is None else str(self.last),
+                         "pairs": self.pairs,
+                     }, ensure_ascii=False)))
+        os.replace(tmp_path, self.checkpoint_path)
+        self._unsaved = 0
+
+    def checkpoint(self, signature):
+        """
+        Фіксує, що куб відповідає стану сховища signature; на диск
+        записує лише кожні SAVE_EVERY змін (решту — flush).
+        """
+        self.signature = jsonable(signature)
+        self._unsaved += 1
+        if self._unsaved >= SAVE_EVERY:
+            self.save(signature)
+
+    def flush(self):
+        """
+        Записує незбережені зміни куба (наприклад, перед завершенням програми).
+        """
+        if self._unsaved and self.signature is not None:
+            self.save(self.signature)
+
+    def is_current(self, signature):
+        return self.signature is not None and self.signature == jsonable(signature)
+
+    def load(self, signature):
+        """
+        Завантажує куб із контрольної точки.
+        Повертає True, якщо вона існує і відповідає поточному стану сховища.
+        """
+        try:
+            with np.load(self.checkpoint_path) as state:
+                meta = json.loads(str(state["meta"]))
+                days = state["days"]
+        except (OSError, ValueError, KeyError):
+            return False
+        if meta.get("signature") != jsonable(signature) or days.shape[1:] != (len(meta["pairs"]),):
+            return False
+        self.clear()
+        self.signature = meta["signature"]
+        self._unsaved = 0
+        self.days = days
+        self.pairs = [tuple(pair) for pair in meta["pairs"]]
+        self.pair_index = {pair: column for column, pair in enumerate(self.pairs)}
+        if meta["start"] is not None:
+            self.start, self.last = np.datetime64(meta["start"], "D"), np.datetime64(meta["last"], "D")
+        return True
+
+
+_LEVEL_NAMES = {"day": "День", "week": "Тиждень", "month": "Місяць", "quarter": "Квартал", "year": "Рік"}
+
+
+def _pair(ledger, key, width):
+    category, subcategory = key // width - 1, key % width - 1
+    return (ledger.categories[category] if category >= 0 else None,
+            ledger.subcategories[subcategory] if subcategory >= 0 else None)
+
+
+def _bucket(days, level):
+    """
+    Перший день періоду рівня level для кожного дня (datetime64[D]).
+    """
+    if level == "day":
+        return days
+    if level == "week":
+        # 1970-01-01 — четвер: зсув 3 дні до понеділка
+        return days - (days.astype(np.int64) + 3) % 7
+    if level == "month":
+        return days.astype("datetime64[M]").astype("datetime64[D]")
+    if level == "quarter":
+        months = days.astype("datetime64[M]").astype(np.int64)
+        return (months - months % 3).astype("datetime64[M]").astype("datetime64[D]")
+    if level == "year":
+        return days.astype("datetime64[Y]").astype("datetime64[D]")
+    raise ValueError(f"Невідомий рівень: {level}")
+
+
+def _buckets(days, level):
+    """
+    (початки періодів, межі груп у days) для суцільного впорядкованого days.
+    """
+    labels = _bucket(days, level)
+    bounds = np.flatnonzero(labels[1:] != labels[:-1]) + 1
+    bounds = np.concatenate([[0], bounds])
+    return labels[bounds], bounds
+
+
+def _to_series(kopecks, starts, name) -> pd.Series:
+    index = pd.DatetimeIndex(np.asarray(starts).astype("datetime64[s]"), name=name)
+    return pd.Series(np.asarray(kopecks) / 100, index=index, name="Сума", dtype="float64")
@@ -0,0 +1,235 @@
+import bisect
+import os
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# Стовпці, за якими шукає рядок пошуку (ті, що є у сховищі)
+SEARCH_COLUMNS = ("Коментар", "За шо платіж", "Категорія", "Підкатегорія")
+# Скільки нових значень накопичується в пам'яті, перш ніж індекс буде збережено
+SAVE_EVERY = 1000
+# Мінімальна схожість (коефіцієнт Жаккара за триграмами) для нечіткого збігу
+FUZZY_THRESHOLD = 0.4
+
+_APOSTROPHES = ("'", "’", "ʼ", "‘", "`")
+_TOKEN = re.compile(r"\w+")
+
+
+def fold(text: str) -> str:
+    """
+    Нормалізація для пошуку з урахуванням української: NFC, casefold,
+    ґ = г, апострофи (' ’ ʼ) відкидаються — "пам'ять" і "памʼять" однакові.
+    """
+    text = unicodedata.normalize("NFC", text).casefold().replace("ґ", "г")
+    for apostrophe in _APOSTROPHES:
+        text = text.replace(apostrophe, "")
+    return text
+
+
+def tokenize(text: str):
+    return _TOKEN.findall(fold(text))
+
+
+def parse_query(query: str):
+    """
+    Терми запиту: [(токен, нечітко)]. Кожен терм шукається як префікс;
+    "слово~" — ще й нечітко (за триграмами), наприклад з одруківкою.
+    """
+    terms = []
+    for word in query.split():
+        fuzzy = word.endswith("~")
+        terms += [(token, fuzzy) for token in tokenize(word.rstrip("~"))]
+    return terms
+
+
+class SearchIndex:
+    """
+    Інвертований індекс токенів для повнотекстового пошуку записів.
+
+    Індексуються не рядки журналу, а різні текстові значення (коментарі,
+    категорії тощо): токен -> номери значень, що його містять. Значень
+    набагато менше, ніж рядків, а сам індекс не залежить від порядку
+    чи кількості рядків, тож після дописування записів лишається чинним —
+    нові значення просто доіндексовуються (ids).
+
+    Зберігається поруч зі сховищем (<файл>.search.npz, масиви numpy —
+    компактніше й швидше за JSON на сотнях тисяч коментарів); нові значення
+    дописуються у файл пачками (SAVE_EVERY), незбережений залишок
+    після перезапуску просто токенізується знову.
+
+    Відповідність рядків значенням (номерам) веде ExpenseManager.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.values = []     # номер -> текст
+        self.value_ids = {}  # текст -> номер
+        self.postings = {}   # токен -> np.ndarray номерів значень
+        self._unsaved = 0
+        self._sorted_tokens = None
+        self._trigrams = None
+        self._loaded = False
+
+    # ---------- Побудова ----------
+
+    def ids(self, values) -> np.ndarray:
+        """
+        Номери значень values (int32; -1 — порожнє значення);
+        ще не проіндексовані значення токенізуються і додаються.
+        """
+        self._load()
+        values = list(values)
+        get = self.value_ids.get
+        ids = np.array([get(value, -2) if isinstance(value, str) and value and "\x00" not in value else -1
+                        for value in values], dtype=np.int32)
+        new = np.flatnonzero(ids == -2)
+        if len(new):
+            self._add(list(dict.fromkeys(values[i] for i in new)))
+            ids[new] = [self.value_ids[values[i]] for i in new]
+        return ids
+
+    def _add(self, values):
+        """
+        Індексує нові значення пачкою: токенізація — рядковими методами pandas,
+        групування номерів за токенами — сортуванням, а не циклом по значеннях.
+        """
+        start = len(self.values)
+        self.values.extend(values)
+        self.value_ids.update(zip(values, range(start, start + len(values))))
+        self._unsaved += len(values)
+
+        # нормалізуємо всю пачку одним рядком: \x00 не з'являється з casefold/NFC
+        folded = fold("\x00".join(values)).split("\x00")
+        if len(folded) != len(values):
+            folded = [fold(value) for value in values]
+        tokens = pd.Series(folded, dtype=object).str.findall(_TOKEN.pattern).explode().dropna()
+        pairs = pd.DataFrame({"token": tokens.to_numpy(), "id": tokens.index + start}).drop_duplicates()
+        if pairs.empty:
+            return
+        codes, names = pd.factorize(pairs["token"])
+        order = np.argsort(codes, kind="stable")
+        ids = pairs["id"].to_numpy(dtype=np.int32)[order]
+        bounds = np.flatnonzero(np.diff(codes[order])) + 1
+        new_tokens = []
+        for token, chunk in zip(names, np.split(ids, bounds)):
+            postings = self.postings.get(token)
+            if postings is None:
+                self.postings[token] = chunk
+                new_tokens.append(token)
+            else:
+                self.postings[token] = np.concatenate([postings, chunk])
+        self._add_tokens(new_tokens)
+
+    def _add_tokens(self, tokens):
+        """
+        Доповнює впорядкований список токенів і триграмний індекс
+        (якщо вони вже побудовані); велику пачку простіше перебудувати.
+        """
+        if self._sorted_tokens is not None:
+            if len(tokens) > 100:
+                self._sorted_tokens = None
+            else:
+                for token in tokens:
+                    bisect.insort(self._sorted_tokens, token)
+        if self._trigrams is not None:
+            for token in tokens:
+                for trigram in _trigrams(token):
+                    self._trigrams.setdefault(trigram, []).append(token)
+
+    # ---------- Пошук ----------
+
+    def match(self, query):
+        """
+        Для кожного терму запиту — список масивів номерів значень
+        (по одному на знайдений токен). Запис підходить, якщо кожен терм
+        знайдено хоч в одному з його стовпців.
+        """
+        self._load()
+        return [self._term_postings(token, fuzzy) for token, fuzzy in parse_query(query)]
+
+    def _term_postings(self, token, fuzzy):
+        tokens = self._prefixed(token)
+        if fuzzy:
+            tokens = set(tokens) | set(self._similar(token))
+        return [self.postings[t] for t in tokens]
+
+    def _prefixed(self, prefix):
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self.postings)
+        tokens = self._sorted_tokens
+        # усі токени з префіксом лежать поспіль: до першого, більшого за префікс
+        # зі збільшеним останнім символом
+        end = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        return tokens[bisect.bisect_left(tokens, prefix):bisect.bisect_left(tokens, end)]
+
+    def _similar(self, token):
+        """
+        Токени, схожі на token за триграмами (коефіцієнт Жаккара).
+        Триграмний індекс токенів будується при першому нечіткому запиті.
+        """
+        if self._trigrams is None:
+            self._trigrams = {}
+            for other in self.postings:
+                for trigram in _trigrams(other):
+                    self._trigrams.setdefault(trigram, []).append(other)
+        wanted = _trigrams(token)
+        shared = Counter(other for trigram in wanted for other in self._trigrams.get(trigram, ()))
+        return [other for other, count in shared.items()
+                if count / (len(wanted) + len(_trigrams(other)) - count) >= FUZZY_THRESHOLD]
+
+    # ---------- Збереження ----------
+
+    def flush(self):
+        """
+        Зберігає індекс, якщо незбережених значень накопичилось SAVE_EVERY
+        або вони становлять помітну частку індексу (зокрема після побудови).
+        """
+        if not self._unsaved or (self._unsaved < SAVE_EVERY and self._unsaved * 10 < len(self.values)):
+            return
+        tokens = list(self.postings)
+        postings = [self.postings[token] for token in tokens]
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f,
+                     values=_pack(self.values),
+                     tokens=_pack(tokens),
+                     lengths=np.array([len(ids) for ids in postings], dtype=np.int64),
+                     ids=np.concatenate(postings) if postings else np.empty(0, dtype=np.int32))
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+
+    def _load(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with np.load(self.path) as state:
+                values, tokens = _unpack(state["values"]), _unpack(state["tokens"])
+                bounds = np.concatenate([[0], np.cumsum(state["lengths"])])
+                ids = state["ids"].astype(np.int32)
+        except (OSError, ValueError, KeyError):
+            return
+        if len(tokens) != len(bounds) - 1 or bounds[-1] != len(ids):
+            return
+        self.values = values
+        self.value_ids = {value: i for i, value in enumerate(values)}
+        self.postings = {token: ids[bounds[i]:bounds[i + 1]] for i, token in enumerate(tokens)}
+
+
+def _pack(strings) -> np.ndarray:
+    """
+    Список рядків як байти UTF-8, розділені \x00 (для np.savez).
+    """
+    return np.frombuffer("\x00".join(strings).encode("utf-8"), dtype=np.uint8)
+
+
+def _unpack(data: np.ndarray):
+    text = data.tobytes().decode("utf-8")
+    return text.split("\x00") if text else []
+
+
+def _trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
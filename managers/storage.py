@@ -0,0 +1,870 @@
+import csv
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from contextlib import contextmanager
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from managers.journal import WriteJournal
+from managers.labels import relabel_frame
+from managers.locking import file_lock
+from managers.profiling import profiler
+
+COLUMNS = ["Дата", "Сума", "Категорія", "Підкатегорія", "Коментар"]
+
+# Стовпці, що зберігаються у колонкових форматах як словникові (categorical) коди
+CATEGORICAL_COLUMNS = ("Категорія", "Підкатегорія")
+
+# Інші текстові стовпці тримаються в пам'яті кодами, якщо різних значень
+# не більше за цю частку рядків (див. compact_frame)
+CATEGORICAL_MAX_RATIO = 0.5
+
+# Режими надійності запису:
+# "flush"  — лише скидаємо буфер Python у ОС (найшвидше);
+# "fsync"  — додатково чекаємо фізичного запису на диск;
+# "atomic" — дописуємо у тимчасову копію і підміняємо файл через os.replace
+#            (файл ніколи не буває «напівзаписаним», але кожен запис копіює файл);
+# "journal" — лише CSV: дописуємо в журнал <файл>.journal з group commit
+#            (один fsync на пачку записів від багатьох процесів) і періодично
+#            переносимо журнал в основний файл.
+DURABILITY_MODES = ("flush", "fsync", "atomic", "journal")
+
+# Розмір журналу, після якого записи переносяться в основний CSV-файл
+JOURNAL_COMPACT_BYTES = 256 * 1024
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """
+    Перетворює стовпець дат у datetime64.
+    Підтримує обидва формати, що трапляються у файлах:
+    "yyyy-mm-dd" (DateEntry) та "dd.mm.yyyy" (старі експорти).
+    Нерозпізнані значення стають NaT.
+    """
+    def parse(uniques):
+        iso = pd.to_datetime(uniques, format="%Y-%m-%d", errors="coerce")
+        dotted = pd.to_datetime(uniques, format="%d.%m.%Y", errors="coerce")
+        return iso.fillna(dotted)
+    return _parse_unique(values, parse)
+
+
+def parse_amounts(values: pd.Series) -> pd.Series:
+    """
+    Перетворює стовпець сум у число; нерозпізнані значення стають NaN.
+    """
+    return _parse_unique(values, lambda uniques: pd.to_numeric(uniques, errors="coerce"))
+
+
+def _parse_unique(values: pd.Series, parse) -> pd.Series:
+    """
+    Застосовує parse лише до різних значень стовпця і розкладає результат
+    по рядках: дат і сум у журналі значно менше, ніж рядків.
+    """
+    codes, uniques = pd.factorize(values)
+    parsed = parse(pd.Series(uniques, dtype=values.dtype))
+    missing = codes < 0
+    if missing.any() and parsed.dtype.kind in "iub":
+        parsed = parsed.astype("float64")
+    result = parsed.to_numpy()[codes]
+    if missing.any():
+        result[missing] = np.datetime64("NaT") if result.dtype.kind == "M" else np.nan
+    return pd.Series(result, index=values.index, name=values.name)
+
+
+def coerce_types(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Приводить сирі рядкові стовпці до робочих типів:
+    "Дата" — datetime64, "Сума" — число, порожній "Коментар" — "".
+    """
+    if "Дата" in df:
+        df["Дата"] = parse_dates(df["Дата"])
+    if "Сума" in df:
+        df["Сума"] = parse_amounts(df["Сума"])
+    if "Коментар" in df:
+        df["Коментар"] = df["Коментар"].fillna("")
+    return df
+
+
+def records_to_frame(records, columns) -> pd.DataFrame:
+    """
+    Будує типізований DataFrame зі списку словників-записів.
+    Порожні рядки вважаються відсутніми значеннями, як у pd.read_csv.
+    """
+    df = pd.DataFrame([{col: record.get(col, "") for col in columns} for record in records],
+                      columns=columns, dtype=str)
+    return coerce_types(df.where(df != ""))
+
+
+def compact_frame(df: pd.DataFrame, dictionary=None) -> pd.DataFrame:
+    """
+    Ущільнює типізований DataFrame у пам'яті: категорії, підкатегорії
+    та інші текстові стовпці з невеликою кількістю різних значень
+    зберігаються словниковими кодами (categorical, 1–2 байти на рядок
+    замість рядка Python).
+
+    dictionary — словник CategoryManager {категорія: [підкатегорії]}:
+    його назви входять у словник кодів разом із тими, що трапились у даних.
+    Коди впорядковані за назвами, тож сортування і групування за ними
+    дають той самий порядок, що й за рядками.
+    """
+    known = {
+        "Категорія": list(dictionary or ()),
+        "Підкатегорія": [sub for subcats in (dictionary or {}).values() for sub in subcats],
+    }
+    for col in df.columns:
+        values = df[col]
+        if col in ("Дата", "Сума") or not (pd.api.types.is_string_dtype(values.dtype)
+                                           or isinstance(values.dtype, pd.CategoricalDtype)):
+            continue
+        codes = values.astype("category")
+        observed = codes.cat.categories
+        if col not in CATEGORICAL_COLUMNS and len(observed) > len(values) * CATEGORICAL_MAX_RATIO:
+            continue  # вільний текст: коди не зекономлять пам'ять
+        categories = sorted(set(observed) | set(known.get(col, ())))
+        if list(observed) != categories:
+            codes = codes.cat.set_categories(categories)
+        df[col] = codes
+    return df
+
+
+def concat_frames(frames) -> pd.DataFrame:
+    """
+    Об'єднує типізовані DataFrame, зберігаючи словникові (categorical) стовпці:
+    pd.concat перетворює їх на object, якщо словники частин різні,
+    тому вони об'єднуються окремо через union_categoricals (лише коди).
+    """
+    if len(frames) == 1:
+        return frames[0]
+    columns = list(dict.fromkeys(col for f in frames for col in f.columns))
+    categorical = [col for col in columns
+                   if any(col in f and isinstance(f[col].dtype, pd.CategoricalDtype) for f in frames)]
+    df = pd.concat([f.drop(columns=[col for col in categorical if col in f]) for f in frames],
+                   ignore_index=True)
+    for col in categorical:
+        parts = [_as_categorical(f[col] if col in f else pd.Series(None, index=f.index, dtype=str))
+                 for f in frames]
+        df[col] = union_categoricals(parts, sort_categories=True)
+    return df[columns]
+
+
+def _as_categorical(values: pd.Series) -> pd.Categorical:
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.array
+    else:
+        values = pd.Categorical(values.astype(str).where(values.notna()))
+    # у порожньої частини словник має тип object — приводимо до рядкового
+    return values.set_categories(values.categories.astype(str))
+
+
+def check_columns(records, columns):
+    unknown = {key for record in records for key in record} - set(columns)
+    if unknown:
+        raise ValueError(f"Стовпців немає у файлі витрат: {', '.join(sorted(unknown))}")
+
+
+class _Prefix(io.RawIOBase):
+    """
+    Перші size байтів відкритого файлу: читач бачить файл таким,
+    яким він був під блокуванням, навіть якщо інші процеси вже дописали ще.
+    """
+    def __init__(self, f, size):
+        self._f = f
+        self._remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = min(len(buffer), self._remaining)
+        if count <= 0:
+            return 0
+        data = self._f.read(count)
+        buffer[:len(data)] = data
+        self._remaining -= len(data)
+        return len(data)
+
+
+class CsvStorage:
+    """
+    Зберігання витрат у текстовому CSV-файлі.
+    Нові записи лише дописуються в кінець файлу (append-only),
+    тож час додавання не залежить від розміру журналу витрат.
+
+    Файл може спільно використовуватися кількома процесами (кілька
+    робочих місць на спільному диску): записи виконуються під
+    рекомендаційним блокуванням <файл>.lock, а читач бере лише ту частину
+    файлу, що була повністю записана на момент читання.
+    """
+    def __init__(self, path="expenses.csv", durability="flush", compact_bytes=JOURNAL_COMPACT_BYTES):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Невідомий режим надійності: {durability!r}")
+        self.path = path
+        self.durability = durability
+        self.compact_bytes = compact_bytes
+        self._lock = file_lock(path)
+        self.journal = WriteJournal(path + ".journal") if durability == "journal" else None
+        self._unsynced = 0  # кінець ще не зафіксованого (fsync) запису в журналі
+
+    def init(self, columns=COLUMNS):
+        """
+        Створює файл зі стандартними стовпцями, якщо його ще немає.
+        """
+        with self.lock():
+            if not os.path.exists(self.path):
+                with open(self.path, "w", encoding="utf-8", newline="") as f:
+                    csv.writer(f).writerow(columns)
+
+    @contextmanager
+    def lock(self):
+        """
+        Ексклюзивне блокування запису між процесами (реентерабельне).
+        У режимі "journal" після зняття зовнішнього блокування чекає
+        на group commit власних записів і за потреби переносить журнал.
+        """
+        with self._lock:
+            yield
+            end = 0
+            if self._lock.depth == 1:
+                end, self._unsynced = self._unsynced, 0
+        if end:
+            self.journal.commit(end)
+            if self.journal.size() > self.compact_bytes:
+                self.compact()
+
+    def signature(self):
+        """
+        Відбиток стану файлу (і журналу) для інвалідації кешу.
+        """
+        st = os.stat(self.path)
+        if self.journal is None:
+            return st.st_mtime_ns, st.st_size
+        return st.st_mtime_ns, st.st_size, self.journal.size()
+
+    def columns(self):
+        """
+        Зчитує лише перший рядок файлу — порядок стовпців для нових записів.
+        """
+        with open(self.path, "r", encoding="utf-8-sig", newline="") as f:
+            return next(csv.reader(f), None) or list(COLUMNS)
+
+    def load(self) -> pd.DataFrame:
+        with self.lock():
+            journal_text = self._recover()[0] if self.journal is not None else ""
+            f = open(self.path, "rb")
+            size = os.fstat(f.fileno()).st_size
+        with f, profiler.span("csv.read", nbytes=size + len(journal_text)) as span:
+            df = pd.read_csv(io.BufferedReader(_Prefix(f, size), buffer_size=1 << 20), dtype=str)
+            if journal_text:
+                pending = pd.read_csv(io.StringIO(journal_text), header=None, names=list(df.columns), dtype=str)
+                df = pd.concat([df, pending], ignore_index=True)
+            span.rows = len(df)
+        with profiler.span("csv.coerce", rows=len(df)):
+            return coerce_types(df)
+
+    def append(self, records):
+        columns = self.columns()
+        check_columns(records, columns)
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows([record.get(col, "") for col in columns] for record in records)
+        self._append_text(buffer.getvalue())
+
+    def append_frame(self, df: pd.DataFrame):
+        """
+        Дописує вже типізований DataFrame (дата у форматі yyyy-mm-dd)
+        одним векторизованим перетворенням у текст.
+        """
+        columns = self.columns()
+        unknown = set(df.columns) - set(columns)
+        if unknown:
+            raise ValueError(f"Стовпців немає у файлі витрат: {', '.join(sorted(unknown))}")
+        if df.empty:
+            return
+        text = format_frame(df).reindex(columns=columns, fill_value="") \
+            .to_csv(header=False, index=False, lineterminator="\r\n")
+        self._append_text(text)
+
+    def _append_text(self, text):
+        with self.lock(), profiler.span("csv.append", nbytes=len(text)):
+            if self.journal is not None:
+                self._unsynced = self.journal.append(text)
+            elif self.durability == "atomic":
+                self._append_atomic(text)
+            else:
+                self._append_to(self.path, text, fsync=self.durability == "fsync")
+
+    def compact(self):
+        """
+        Переносить записи з журналу в основний файл і очищає журнал.
+        Перед дописуванням у журнал ставиться позначка з розміром основного
+        файлу, тож обірване перенесення відкочується і не дублює записи.
+        """
+        if self.journal is None:
+            return
+        with self.lock():
+            text, valid_end = self._recover()
+            if text:
+                self.journal.begin_compaction(os.path.getsize(self.path), valid_end)
+                self._append_to(self.path, text, fsync=True)
+            if self.journal.size():
+                self.journal.clear()
+
+    def apply_labels(self, rules):
+        """
+        Переписує файл, застосувавши правила LabelMap (relabel_frame) до
+        стовпців категорій; решта значень переноситься текстом як є.
+        Журнал спершу переноситься в основний файл, а заміна атомарна
+        (тимчасовий файл, fsync, os.replace).
+        """
+        with self.lock():
+            self.compact()
+            df = pd.read_csv(self.path, dtype=str, keep_default_na=False, na_values=[""],
+                             encoding="utf-8-sig")
+            df, _ = relabel_frame(df, rules)
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, tmp_path = tempfile.mkstemp(prefix=".expenses-", suffix=".tmp", dir=directory)
+            try:
+                with open(fd, "w", encoding="utf-8", newline="") as f:
+                    df.to_csv(f, index=False, lineterminator="\r\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                shutil.copymode(self.path, tmp_path)
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+    def _recover(self):
+        """
+        Під блокуванням: відкочує обірване перенесення журналу (якщо було)
+        і повертає (CSV-текст записів журналу, кінець останнього цілого запису).
+        """
+        text, valid_end, compact_from = self.journal.read()
+        if compact_from is not None:
+            if os.path.getsize(self.path) > compact_from:
+                os.truncate(self.path, compact_from)
+            self.journal.discard_marker(valid_end)
+        return text, valid_end
+
+    @staticmethod
+    def _needs_newline(path):
+        """
+        Перевіряє, чи закінчується файл символом нового рядка
+        (файли, збережені сторонніми програмами, часто його не мають).
+        """
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() == 0:
+                return False
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) not in (b"\n", b"\r")
+
+    @classmethod
+    def _append_to(cls, path, text, fsync=False):
+        needs_newline = cls._needs_newline(path)
+        with open(path, "a", encoding="utf-8", newline="") as f:
+            if needs_newline:
+                f.write("\r\n")
+            f.write(text)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+
+    def _append_atomic(self, text):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".expenses-", suffix=".tmp", dir=directory)
+        os.close(fd)
+        try:
+            shutil.copyfile(self.path, tmp_path)
+            self._append_to(tmp_path, text, fsync=True)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+class ColumnarStorage:
+    """
+    Бінарне колонкове зберігання (Parquet або Feather) у каталозі з частинами:
+
+        expenses.parquet/
+            columns.json          — порядок стовпців
+            part-000001.parquet   — пачки записів
+
+    Дати зберігаються як datetime64, суми — цілими копійками (int64),
+    категорії та підкатегорії — словниковими кодами (categorical).
+    Кожне додавання створює нову невелику частину (атомарно через os.replace),
+    а коли частин стає забагато, вони зливаються в одну (compact).
+    Запис і злиття виконуються під блокуванням <каталог>.lock, тож кілька
+    процесів не створять частину з однаковим номером.
+    Потрібен пакет pyarrow.
+    """
+    FORMATS = ("parquet", "feather")
+
+    def __init__(self, path="expenses.parquet", fmt=None, durability="flush", max_parts=64):
+        if fmt is None:
+            fmt = "feather" if path.endswith(".feather") else "parquet"
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Невідомий колонковий формат: {fmt!r}")
+        if durability not in DURABILITY_MODES or durability == "journal":
+            raise ValueError(f"Невідомий режим надійності: {durability!r}")
+        self.path = path
+        self.fmt = fmt
+        self.durability = durability
+        self.max_parts = max_parts
+        self._lock = file_lock(path)
+
+    def init(self, columns=COLUMNS):
+        with self.lock():
+            os.makedirs(self.path, exist_ok=True)
+            if not os.path.exists(self._columns_path()):
+                with open(self._columns_path(), "w", encoding="utf-8") as f:
+                    json.dump(list(columns), f, ensure_ascii=False)
+
+    def lock(self):
+        """
+        Ексклюзивне блокування запису між процесами (реентерабельне).
+        """
+        return self._lock
+
+    def signature(self):
+        signature = []
+        for name in self._parts():
+            st = os.stat(os.path.join(self.path, name))
+            signature.append((name, st.st_mtime_ns, st.st_size))
+        return tuple(signature)
+
+    def columns(self):
+        with open(self._columns_path(), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def load(self) -> pd.DataFrame:
+        columns = self.columns()
+        with profiler.span("columnar.read") as span:
+            while True:
+                try:
+                    parts = self._parts()
+                    span.nbytes = sum(os.path.getsize(os.path.join(self.path, name)) for name in parts)
+                    frames = [self._read_part(name) for name in parts]
+                    break
+                except FileNotFoundError:
+                    # інший процес саме злив частини — читаємо новий набір
+                    continue
+            if not frames:
+                return coerce_types(pd.DataFrame(columns=columns, dtype=str))
+            df = self._from_stored(concat_frames(frames), columns)
+            span.rows = len(df)
+            return df
+
+    def append(self, records):
+        columns = self.columns()
+        check_columns(records, columns)
+        self.append_frame(records_to_frame(records, columns))
+
+    def append_frame(self, df: pd.DataFrame):
+        columns = self.columns()
+        unknown = set(df.columns) - set(columns)
+        if unknown:
+            raise ValueError(f"Стовпців немає у файлі витрат: {', '.join(sorted(unknown))}")
+        if df.empty:
+            return
+        stored = self._to_stored(df.reindex(columns=columns))
+        with self.lock():
+            self._write_part(stored, self._next_part_name())
+            if len(self._parts()) > self.max_parts:
+                self.compact()
+
+    def compact(self):
+        """
+        Зливає всі частини в одну. Стара множина частин видаляється
+        лише після того, як нова частина атомарно записана.
+        """
+        with self.lock():
+            parts = self._parts()
+            if len(parts) <= 1:
+                return
+            df = self._to_stored(self.load())
+            self._write_part(df, self._next_part_name())
+            for name in parts:
+                os.remove(os.path.join(self.path, name))
+
+    def apply_labels(self, rules):
+        """
+        Зливає частини в одну, застосувавши правила LabelMap (relabel_frame)
+        до стовпців категорій; решта стовпців переноситься у збереженому вигляді.
+        """
+        with self.lock():
+            parts = self._parts()
+            if not parts:
+                return
+            df, _ = relabel_frame(concat_frames([self._read_part(name) for name in parts]), rules)
+            self._write_part(df, self._next_part_name())
+            for name in parts:
+                os.remove(os.path.join(self.path, name))
+
+    # ---------- Перетворення типів ----------
+
+    @staticmethod
+    def _to_stored(df: pd.DataFrame) -> pd.DataFrame:
+        df = df.copy()
+        if "Сума" in df:
+            df["Сума"] = (pd.to_numeric(df["Сума"], errors="coerce") * 100).round().astype("Int64")
+        for col in CATEGORICAL_COLUMNS:
+            if col in df:
+                df[col] = df[col].astype("category")
+        return df
+
+    @staticmethod
+    def _from_stored(df: pd.DataFrame, columns) -> pd.DataFrame:
+        df = df.reindex(columns=columns)
+        if "Сума" in df:
+            df["Сума"] = df["Сума"].astype("float64") / 100
+        if "Коментар" in df:
+            df["Коментар"] = df["Коментар"].fillna("")
+        return df
+
+    # ---------- Файли частин ----------
+
+    def _columns_path(self):
+        return os.path.join(self.path, "columns.json")
+
+    def _parts(self):
+        suffix = "." + self.fmt
+        return sorted(name for name in os.listdir(self.path)
+                      if name.startswith("part-") and name.endswith(suffix))
+
+    def _next_part_name(self):
+        parts = self._parts()
+        number = int(parts[-1][len("part-"):-len(self.fmt) - 1]) + 1 if parts else 1
+        return f"part-{number:06d}.{self.fmt}"
+
+    def _read_part(self, name):
+        path = os.path.join(self.path, name)
+        if self.fmt == "parquet":
+            return pd.read_parquet(path)
+        return pd.read_feather(path)
+
+    def _write_part(self, df, name):
+        tmp_path = os.path.join(self.path, "." + name + ".tmp")
+        if self.fmt == "parquet":
+            df.to_parquet(tmp_path, index=False)
+        else:
+            df.reset_index(drop=True).to_feather(tmp_path)
+        if self.durability != "flush":
+            with open(tmp_path, "rb") as f:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.path, name))
+
+
+class SqliteStorage:
+    """
+    Зберігання витрат у базі SQLite (стандартний модуль sqlite3).
+
+    База працює в режимі WAL, тож кілька процесів можуть одночасно
+    дописувати записи в один спільний файл без його переписування,
+    а читачі не блокують записувачів. Індекси за датою та парою
+    (категорія, підкатегорія) дозволяють рахувати агрегати прямо в SQL —
+    у Python потрапляють лише кілька десятків підсумкових рядків.
+    Суми зберігаються цілими копійками, дати — текстом yyyy-mm-dd.
+    """
+    # Відповідність стовпців програми стовпцям таблиці
+    SQL_COLUMNS = {
+        "Дата": "date",
+        "Сума": "amount",
+        "Категорія": "category",
+        "Підкатегорія": "subcategory",
+        "Коментар": "comment",
+        "За шо платіж": "purpose",
+    }
+
+    def __init__(self, path="expenses.db", timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        self._conn = None
+        self._lock = threading.Lock()
+        self._write_lock = file_lock(path)
+
+    def lock(self):
+        """
+        Блокування між процесами для тих, кому потрібні відбитки стану
+        до і після власного запису (кеш ExpenseManager). Самі вставки
+        захищає транзакція SQLite.
+        """
+        return self._write_lock
+
+    def init(self, columns=COLUMNS):
+        conn = self._connection()
+        with self._lock, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS expenses (
+                    id          INTEGER PRIMARY KEY,
+                    date        TEXT,
+                    amount      INTEGER,
+                    category    TEXT,
+                    subcategory TEXT,
+                    comment     TEXT NOT NULL DEFAULT '',
+                    purpose     TEXT
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_date ON expenses(date)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_expenses_category "
+                         "ON expenses(category, subcategory)")
+
+    def signature(self):
+        """
+        Номер версії даних із таблиці meta. Він збільшується в тій самій
+        транзакції, що й вставка, тож однаковий для всіх процесів
+        і зберігається між перезапусками.
+        """
+        with self._lock:
+            row = self._connection().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    def columns(self):
+        return list(self.SQL_COLUMNS)
+
+    def load(self) -> pd.DataFrame:
+        select = ", ".join(f'{sql} AS "{col}"' for col, sql in self.SQL_COLUMNS.items())
+        with self._lock, profiler.span("sqlite.read") as span:
+            df = pd.read_sql_query(f"SELECT {select} FROM expenses ORDER BY id", self._connection())
+            span.rows = len(df)
+        return self._from_stored(df)
+
+    def append(self, records):
+        check_columns(records, self.columns())
+        self.append_frame(records_to_frame(records, self.columns()))
+
+    def append_frame(self, df: pd.DataFrame):
+        unknown = set(df.columns) - set(self.SQL_COLUMNS)
+        if unknown:
+            raise ValueError(f"Стовпців немає у файлі витрат: {', '.join(sorted(unknown))}")
+        if df.empty:
+            return
+        df = df.reindex(columns=self.columns())
+        stored = pd.DataFrame({
+            "date": df["Дата"].dt.strftime("%Y-%m-%d"),
+            "amount": (pd.to_numeric(df["Сума"], errors="coerce") * 100).round().astype("Int64"),
+            "category": df["Категорія"],
+            "subcategory": df["Підкатегорія"],
+            "comment": df["Коментар"].fillna(""),
+            "purpose": df["За шо платіж"],
+        })
+        rows = stored.astype(object).where(stored.notna(), None).itertuples(index=False, name=None)
+
+        conn = self._connection()
+        with self._lock, conn:
+            conn.executemany(
+                "INSERT INTO expenses (date, amount, category, subcategory, comment, purpose) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    def relabel(self, rule):
+        """
+        Перейменування категорії / пари (правило LabelMap) прямо в таблиці:
+        UPDATE за індексом (категорія, підкатегорія) зачіпає лише рядки пари.
+        """
+        conn = self._connection()
+        with self._lock, conn:
+            if rule[0] == "category":
+                conn.execute("UPDATE expenses SET category = ? WHERE category = ?", (rule[2], rule[1]))
+            else:
+                conn.execute("UPDATE expenses SET category = ?, subcategory = ? "
+                             "WHERE category = ? AND subcategory = ?", (rule[3], rule[4], rule[1], rule[2]))
+            conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    # ---------- Агрегати в SQL ----------
+
+    def query(self, date_from=None, date_to=None, categories=None, subcategories=None,
+              columns=None) -> pd.DataFrame:
+        """
+        Вибірка з фільтрами та проєкцією стовпців прямо в SQL:
+        діапазон дат використовує індекс за датою, а непотрібні стовпці
+        взагалі не зчитуються з бази.
+        """
+        columns = list(columns) if columns is not None else self.columns()
+        select = ", ".join(f'{self.SQL_COLUMNS[col]} AS "{col}"' for col in columns)
+        where, params = self._where(date_from, date_to, categories, subcategories)
+        order = "date, id" if date_from is not None or date_to is not None else "id"
+        sql = f"SELECT {select} FROM expenses WHERE {' AND '.join(where) or '1'} ORDER BY {order}"
+        with self._lock:
+            df = pd.read_sql_query(sql, self._connection(), params=params)
+        return self._from_stored(df)
+
+    def sum_by_category(self, date_from=None, date_to=None, categories=None, subcategories=None) -> pd.Series:
+        return self._aggregate(["category"], ["Категорія"],
+                               date_from, date_to, categories, subcategories)
+
+    def sum_by_subcategory(self, date_from=None, date_to=None, categories=None, subcategories=None) -> pd.Series:
+        return self._aggregate(["category", "subcategory"], ["Категорія", "Підкатегорія"],
+                               date_from, date_to, categories, subcategories)
+
+    def monthly_totals(self, date_from=None, date_to=None, categories=None, subcategories=None) -> pd.Series:
+        totals = self._aggregate(["strftime('%Y-%m-01', date)"], ["Місяць"],
+                                 date_from, date_to, categories, subcategories)
+        totals.index = pd.to_datetime(totals.index)
+        return totals
+
+    def report_totals(self, date_from=None, date_to=None, categories=None, subcategories=None):
+        """
+        (за категоріями, за парами, за місяцями) одним запитом: GROUP BY
+        за (категорія, підкатегорія, місяць), далі дрібна таблиця груп
+        згортається в pandas. Порожні категорії й підкатегорії враховуються
+        лише в місячних сумах — так само, як у трьох окремих запитах.
+        """
+        where, params = self._where(date_from, date_to, categories, subcategories)
+        where += ["date IS NOT NULL", "amount IS NOT NULL"]
+        sql = ("SELECT category, subcategory, strftime('%Y-%m-01', date) AS month, SUM(amount) "
+               f"FROM expenses WHERE {' AND '.join(where)} GROUP BY category, subcategory, month")
+        with self._lock:
+            rows = self._connection().execute(sql, params).fetchall()
+
+        groups = pd.DataFrame(rows, columns=["Категорія", "Підкатегорія", "Місяць", "Сума"])
+        groups["Сума"] = groups["Сума"].astype("int64")
+        groups["Місяць"] = pd.to_datetime(groups["Місяць"])
+
+        def totals(keys):
+            sums = groups.groupby(keys, dropna=True)["Сума"].sum().sort_index()
+            return (sums / 100).astype("float64")
+
+        return totals("Категорія"), totals(["Категорія", "Підкатегорія"]), totals("Місяць")
+
+    @staticmethod
+    def _where(date_from, date_to, categories, subcategories):
+        where = []
+        params = []
+        if date_from is not None:
+            where.append("date >= ?")
+            params.append(pd.Timestamp(date_from).strftime("%Y-%m-%d"))
+        if date_to is not None:
+            where.append("date <= ?")
+            params.append(pd.Timestamp(date_to).strftime("%Y-%m-%d"))
+        for column, values in (("category", categories), ("subcategory", subcategories)):
+            if values is not None:
+                values = list(values)
+                where.append(f"{column} IN ({', '.join('?' * len(values)) or 'NULL'})")
+                params += values
+        return where, params
+
+    def _aggregate(self, group_exprs, index_names, date_from, date_to, categories, subcategories):
+        where, params = self._where(date_from, date_to, categories, subcategories)
+        where += ["date IS NOT NULL", "amount IS NOT NULL"]
+        # NULL-категорії відкидаємо, як це робить groupby у pandas
+        where += [f"{expr} IS NOT NULL" for expr in group_exprs]
+
+        group = ", ".join(group_exprs)
+        sql = (f"SELECT {group}, SUM(amount) FROM expenses "
+               f"WHERE {' AND '.join(where)} GROUP BY {group} ORDER BY {group}")
+        with self._lock:
+            rows = self._connection().execute(sql, params).fetchall()
+
+        if len(group_exprs) == 1:
+            index = pd.Index([row[0] for row in rows], name=index_names[0])
+        else:
+            index = pd.MultiIndex.from_tuples([row[:-1] for row in rows], names=index_names)
+        return pd.Series([row[-1] / 100 for row in rows], index=index, name="Сума", dtype="float64")
+
+    # ---------- З'єднання ----------
+
+    def _connection(self):
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn = conn
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    @staticmethod
+    def _from_stored(df: pd.DataFrame) -> pd.DataFrame:
+        if "Дата" in df:
+            df["Дата"] = pd.to_datetime(df["Дата"], format="%Y-%m-%d", errors="coerce")
+        if "Сума" in df:
+            df["Сума"] = df["Сума"].astype("float64") / 100
+        if "Коментар" in df:
+            df["Коментар"] = df["Коментар"].fillna("")
+        return df
+
+
+def format_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Перетворює типізований DataFrame на рядкові значення для показу чи експорту:
+    дата — yyyy-mm-dd, ціла сума — без дробової частини, пропуски — "".
+    """
+    # кожен стовпець форматується окремо і лише за різними значеннями
+    # (як _parse_unique): без копії всього DataFrame і без where по ньому —
+    # сторінки записів форматуються на кожну прокрутку, і там важать
+    # накладні витрати pandas, а в експорті — кількість рядків
+    formats = {"Дата": lambda uniques: uniques.dt.strftime("%Y-%m-%d"), "Сума": _format_amounts}
+    columns = {col: _format_unique(df[col], formats.get(col)) for col in df.columns}
+    return pd.DataFrame(columns, index=df.index, columns=df.columns, dtype=object)
+
+
+def _format_amounts(uniques: pd.Series) -> np.ndarray:
+    amounts = uniques.to_numpy(dtype="float64", na_value=np.nan)
+    whole = amounts % 1 == 0
+    text = np.round(amounts, 2).astype(str).astype(object)
+    text[whole] = amounts[whole].astype(np.int64).astype(str)
+    return text
+
+
+def _format_unique(values: pd.Series, format=None) -> np.ndarray:
+    """
+    Масив рядків (object) стовпця: format застосовується лише до різних
+    значень; пропуски стають "".
+    """
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Series(uniques, dtype=values.dtype)
+    text = np.empty(len(uniques) + 1, dtype=object)
+    text[:-1] = format(uniques) if format is not None else uniques.to_numpy(dtype=object)
+    text[-1] = ""  # код -1 (пропуск) бере останній елемент
+    return text[codes]
+
+
+def frame_to_records(df: pd.DataFrame):
+    return format_frame(df).to_dict("records")
+
+
+def open_storage(path, durability="flush"):
+    """
+    Обирає сховище за розширенням шляху:
+    .parquet / .feather — колонкове, .db / .sqlite — SQLite, інакше — CSV.
+    """
+    if isinstance(path, str) and path.endswith((".parquet", ".feather")):
+        return ColumnarStorage(path, durability=durability)
+    if isinstance(path, str) and path.endswith((".db", ".sqlite", ".sqlite3")):
+        return SqliteStorage(path)
+    return CsvStorage(path, durability=durability)
+
+
+def migrate_csv(csv_paths, storage):
+    """
+    Одноразово переносить витрати з одного чи кількох CSV-файлів
+    (наприклад, expenses.csv та old_expenses.csv) у нове сховище.
+    Набір стовпців сховища — об'єднання стовпців усіх файлів.
+    Повертає кількість перенесених рядків.
+    """
+    frames = [CsvStorage(path).load() for path in csv_paths]
+    columns = list(COLUMNS)
+    for df in frames:
+        columns += [col for col in df.columns if col not in columns]
+
+    storage.init(columns)
+    total = 0
+    for df in frames:
+        storage.append_frame(df.reindex(columns=columns))
+        total += len(df)
+    return total
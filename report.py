@@ -0,0 +1,189 @@
+"""
+Пакетне формування звітів аналітики без графічного інтерфейсу.
+
+Для кожного журналу витрат і кожного періоду рахує п'ять звітів вкладки
+"Фінансова аналітика" і записує їх у <out>/<журнал>/<період>/:
+report.json, <звіт>.csv та <звіт>.png. Пари (журнал, період)
+обробляються паралельно у пулі процесів.
+
+Приклади:
+  python report.py expenses.csv --month 2024-01 --month 2024-02
+  python report.py clinic_a.csv clinic_b.db --year 2024 --monthly --workers 8
+  python report.py expenses.csv --range 2024-01-01:2024-03-31 --formats json csv
+  python report.py expenses.csv --year 2024 --profile report_profile.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from managers.profiling import DEFAULT_PATH, profiler
+
+FORMATS = ("png", "csv", "json")
+
+# Менеджер і рендерер живуть весь час роботи процесу-виконавця:
+# журнал зчитується один раз на процес, а не на кожен період
+_managers = {}
+_renderer = None
+
+
+def month_period(month):
+    """
+    "yyyy-mm" -> (назва, перший день, останній день).
+    """
+    import pandas as pd
+    start = pd.Period(month, freq="M")
+    return str(start), start.start_time.date(), start.end_time.date()
+
+
+def parse_periods(args):
+    periods = []
+    for month in args.month:
+        periods.append(month_period(month))
+    for year in args.year:
+        if args.monthly:
+            periods.extend(month_period(f"{year}-{month:02d}") for month in range(1, 13))
+        else:
+            periods.append((year, f"{year}-01-01", f"{year}-12-31"))
+    for value in args.range:
+        date_from, _, date_to = value.partition(":")
+        if not date_from or not date_to:
+            raise ValueError(f"Очікується діапазон ДАТА:ДАТА, отримано {value!r}")
+        periods.append((f"{date_from}_{date_to}", date_from, date_to))
+    return periods or [("all", None, None)]
+
+
+def ledger_name(path):
+    return os.path.splitext(os.path.basename(path.rstrip("/\\")))[0]
+
+
+def init_worker(profile_path):
+    """
+    Початкове налаштування процесу-виконавця: профілювання, якщо ввімкнене.
+    """
+    if profile_path:
+        profiler.configure(True, profile_path)
+
+
+def build_reports(ledger, period, out_dir, formats, categories=None):
+    """
+    Виконується у процесі-виконавці: рахує і записує звіти одного періоду.
+    Повертає короткий підсумок для друку.
+    """
+    from managers.analytics import REPORTS, compute_reports, report_to_dict
+    from managers.expense_manager import ExpenseManager
+
+    start = time.perf_counter()
+    manager = _managers.get(ledger)
+    if manager is None:
+        manager = _managers[ledger] = ExpenseManager(ledger)
+
+    label, date_from, date_to = period
+    with profiler.span("report.compute"):
+        reports = compute_reports(manager, date_from, date_to, categories)
+    target = os.path.join(out_dir, ledger_name(ledger), label)
+    os.makedirs(target, exist_ok=True)
+
+    if "json" in formats:
+        document = {
+            "ledger": ledger,
+            "period": label,
+            "date_from": str(date_from) if date_from is not None else None,
+            "date_to": str(date_to) if date_to is not None else None,
+            "total": float(reports["categories"].sum()),
+            "reports": {name: report_to_dict(reports[name]) for name in REPORTS},
+        }
+        with open(os.path.join(target, "report.json"), "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, indent=2)
+    if "csv" in formats:
+        for name in REPORTS:
+            reports[name].to_csv(os.path.join(target, f"{name}.csv"), header=["Сума"])
+    if "png" in formats:
+        with profiler.span("report.charts"):
+            _save_charts(reports, (ledger, label), target)
+
+    return ledger, label, float(reports["categories"].sum()), time.perf_counter() - start
+
+
+def _save_charts(reports, key, target):
+    global _renderer
+    from app.charts import CHART_SPECS, ChartRenderer
+
+    if _renderer is None:
+        # безекранне полотно Agg: tkinter не імпортується взагалі
+        _renderer = ChartRenderer()
+    for spec in CHART_SPECS.values():
+        # часові графіки (TIME_REPORTS) у пакетний звіт не входять
+        if spec["report"] not in reports:
+            continue
+        grouped = reports[spec["report"]]
+        if grouped.empty:
+            continue
+        _renderer.render(spec, grouped, key + (spec["report"],))
+        _renderer.figure.savefig(os.path.join(target, f"{spec['report']}.png"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="\n".join(__doc__.strip().splitlines()[1:]))
+    parser.add_argument("ledgers", nargs="+", help="журнали витрат (.csv, .parquet, .feather, .db)")
+    parser.add_argument("--month", action="append", default=[], help="місяць yyyy-mm (можна кілька)")
+    parser.add_argument("--year", action="append", default=[], help="рік yyyy (можна кілька)")
+    parser.add_argument("--monthly", action="store_true", help="розбити кожен --year на місяці")
+    parser.add_argument("--range", action="append", default=[], help="діапазон yyyy-mm-dd:yyyy-mm-dd")
+    parser.add_argument("--category", action="append", default=None, help="лише ці категорії")
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    parser.add_argument("--out", default="reports", help="каталог для звітів")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PATH, default=None, metavar="ФАЙЛ",
+                        help=f"записувати тривалості операцій у JSONL (типово {DEFAULT_PATH})")
+    args = parser.parse_args(argv)
+    profile_path = args.profile or profiler.path
+    init_worker(profile_path)
+
+    try:
+        periods = parse_periods(args)
+    except ValueError as exc:
+        parser.error(str(exc))
+    missing = [path for path in args.ledgers if not os.path.exists(path)]
+    if missing:
+        parser.error("не знайдено журнали: " + ", ".join(missing))
+
+    # завдання згруповані за журналом, щоб процес частіше отримував «свій» журнал
+    tasks = [(ledger, period) for ledger in args.ledgers for period in periods]
+    start = time.perf_counter()
+    failures = 0
+
+    def results():
+        if args.workers <= 1 or len(tasks) == 1:
+            for ledger, period in tasks:
+                yield (ledger, period[0]), lambda: build_reports(ledger, period, args.out,
+                                                                 args.formats, args.category)
+            return
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(tasks)),
+                                 initializer=init_worker, initargs=(profile_path,)) as pool:
+            futures = {pool.submit(build_reports, ledger, period, args.out, args.formats, args.category):
+                       (ledger, period[0]) for ledger, period in tasks}
+            for future in as_completed(futures):
+                yield futures[future], future.result
+
+    for (ledger, label), result in results():
+        try:
+            _, _, total, seconds = result()
+        except Exception as exc:
+            failures += 1
+            print(f"{ledger_name(ledger)}/{label}: помилка — {exc}", file=sys.stderr)
+        else:
+            print(f"{ledger_name(ledger)}/{label}: {total:,.2f} ({seconds:.2f} с)")
+
+    print(f"Звітів: {len(tasks) - failures} з {len(tasks)} за {time.perf_counter() - start:.1f} с → {args.out}")
+    if profile_path:
+        print(f"Профіль операцій: {profile_path}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,523 @@
+"""
+Локальний HTTP/JSON-сервіс обліку витрат (без графічного інтерфейсу).
+
+Дає іншим програмам і формі введення з телефона в локальній мережі
+додавати й переглядати витрати через ExpenseManager і CategoryManager.
+Працює на asyncio і стандартній бібліотеці, без сторонніх служб.
+
+Маршрути (відповіді — JSON; дати yyyy-mm-dd або dd.mm.yyyy):
+  GET  /health                 — стан і версія даних;
+  GET  /categories             — довідник категорій;
+  POST /expenses               — додати один запис (об'єкт);
+  POST /expenses/bulk          — додати пачку записів (масив об'єктів);
+  GET  /expenses               — записи сторінками: offset, limit, sort, desc
+                                 та фільтри date_from, date_to, category,
+                                 subcategory (можна кілька), text (пошук);
+  GET  /reports                — п'ять звітів вкладки аналітики з тими ж фільтрами;
+  GET  /reports/<звіт>         — один звіт (назви з managers.analytics.REPORTS
+                                 і часові звіти з TIME_REPORTS).
+
+Усі записи проходять через одне завдання-записувач: запити, що надійшли,
+поки виконується попередній запис, дописуються однією пачкою
+(один запис у сховище, один fsync журналу). Читання виконуються у пулі
+потоків і кешуються у спільному знімку, прив'язаному до версії даних:
+однакові запити обслуговуються готовою відповіддю, а одночасні — одним
+обчисленням. Типово читання завжди бачать останні записи. З
+--max-staleness С знімок після запису з іншого процесу ще до С секунд
+лишається чинним, тож потік таких записів не змушує перераховувати
+звіти на кожен запит; записи через сам сервіс знімок скидають одразу,
+тож клієнт бачить власні записи.
+
+Запуск:  python server.py [expenses.csv] [--categories categories.json]
+             [--host 127.0.0.1] [--port 8765] [--max-staleness 0]
+             [--profile [ФАЙЛ]]
+Для доступу з телефона: --host 0.0.0.0.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from managers.profiling import DEFAULT_PATH, profiler
+
+DEFAULT_PORT = 8765
+# Обмеження запитів: розмір тіла, записів у пачці, рядків на сторінці
+MAX_BODY = 16 * 1024 * 1024
+MAX_RECORDS = 100_000
+MAX_PAGE = 1000
+DEFAULT_PAGE = 100
+# Скільки записів записувач об'єднує в один виклик add_expenses
+MAX_WRITE_BATCH = 10_000
+# Потоки для читань (менеджер усе одно виконує їх по черзі під своїм блокуванням,
+# але поки один потік рахує, інші можуть кодувати готові відповіді в JSON)
+READ_WORKERS = 4
+# Скільки різних відповідей тримає знімок (далі він очищується)
+MAX_SNAPSHOT_RESPONSES = 1024
+# Скільки секунд після зміни даних іншим процесом ще можна відповідати
+# зі старого знімка (записи через сервіс скидають знімок одразу)
+MAX_STALENESS = 0
+
+REQUIRED_FIELDS = ("Дата", "Сума", "Категорія", "Підкатегорія")
+DATE_FORMATS = ("%Y-%m-%d", "%d.%m.%Y")
+STATUS_TEXT = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+               405: "Method Not Allowed", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Snapshot:
+    """
+    Готові відповіді на читання для однієї версії даних:
+    ключ запиту -> asyncio.Future з тілом відповіді (bytes).
+    """
+    def __init__(self, version):
+        self.version = version
+        self.created = time.monotonic()
+        self.responses = {}
+
+
+class ExpenseService:
+    """
+    Обробники маршрутів над ExpenseManager і CategoryManager.
+
+    Записи ставляться в чергу записувача (_writer) і чекають на свою пачку;
+    читання обчислюються у пулі потоків один раз на версію даних (Snapshot).
+    """
+    def __init__(self, expense_manager, category_manager, max_staleness=MAX_STALENESS):
+        self.expense_manager = expense_manager
+        self.max_staleness = max_staleness
+        self.category_manager = category_manager
+        self._categories_mtime = self._categories_signature()
+        self._queue = asyncio.Queue()
+        self._snapshot = Snapshot(None)
+        self._version_check = None
+        self._readers = ThreadPoolExecutor(READ_WORKERS, thread_name_prefix="read")
+        # окремий потік записувача: записи не чекають за чергою читань
+        self._write_thread = ThreadPoolExecutor(1, thread_name_prefix="write")
+        self._writer_task = None
+        self.batches = 0
+        self.written = 0
+
+    async def start(self):
+        self._writer_task = asyncio.create_task(self._writer())
+
+    async def close(self):
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+        self._readers.shutdown(wait=False)
+        self._write_thread.shutdown(wait=True)
+        # записи завершено — зберігаємо відкладені контрольні точки
+        self.expense_manager.flush()
+
+    # ---------- Маршрутизація ----------
+
+    async def handle(self, method, target, body):
+        """
+        Повертає (статус, тіло відповіді у bytes).
+        """
+        parts = urlsplit(target)
+        path = unquote(parts.path).rstrip("/") or "/"
+        params = parse_qs(parts.query)
+
+        if path == "/expenses" or path == "/expenses/bulk":
+            if method == "POST":
+                records = _parse_json(body)
+                if path == "/expenses":
+                    records = [records]
+                elif not isinstance(records, list):
+                    raise HttpError(400, "Очікується масив записів")
+                return 201, _dumps({"added": await self.add(records)})
+            if method == "GET" and path == "/expenses":
+                filters = _filters(params)
+                page = (_int_param(params, "offset", 0), min(_int_param(params, "limit", DEFAULT_PAGE), MAX_PAGE),
+                        _param(params, "sort"), _param(params, "desc") not in (None, "", "0", "false"))
+                if page[2] is not None and page[2] not in self.expense_manager.storage.columns():
+                    raise HttpError(400, f"Невідомий стовпець для сортування: {page[2]}")
+                return 200, await self.read(("expenses", _key(filters), page),
+                                            lambda: self._expenses(filters, *page))
+        elif path == "/reports" or path.startswith("/reports/"):
+            if method == "GET":
+                from managers.analytics import REPORTS, TIME_REPORTS
+                name = path[len("/reports/"):] or None
+                if name is not None and name not in REPORTS + TIME_REPORTS:
+                    raise HttpError(404, f"Невідомий звіт: {name}")
+                filters = _filters(params)
+                return 200, await self.read(("reports", name, _key(filters)),
+                                            lambda: self._reports(name, filters))
+        elif path == "/categories":
+            if method == "GET":
+                return 200, _dumps(self.categories())
+        elif path == "/health":
+            if method == "GET":
+                loop = asyncio.get_running_loop()
+                version = await loop.run_in_executor(self._readers, self.expense_manager.data_version)
+                return 200, _dumps({"status": "ok", "version": version,
+                                    "batches": self.batches, "written": self.written})
+        else:
+            raise HttpError(404, f"Немає маршруту {path}")
+        raise HttpError(405, f"Метод {method} не підтримується для {path}")
+
+    # ---------- Запис ----------
+
+    async def add(self, records):
+        """
+        Перевіряє записи й ставить їх у чергу записувача;
+        завершується, коли пачку з ними записано.
+        """
+        if len(records) > MAX_RECORDS:
+            raise HttpError(413, f"Забагато записів за раз (понад {MAX_RECORDS})")
+        columns, categories = self.expense_manager.storage.columns(), self.categories()
+        records = [self._validate(record, columns, categories) for record in records]
+        if not records:
+            return 0
+        done = asyncio.get_running_loop().create_future()
+        await self._queue.put((records, done))
+        return await done
+
+    async def _writer(self):
+        """
+        Єдине завдання, що пише у сховище: забирає з черги все, що
+        накопичилось за час попереднього запису, і дописує однією пачкою.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            size = len(batch[0][0])
+            while size < MAX_WRITE_BATCH and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                size += len(batch[-1][0])
+            records = [record for chunk, _ in batch for record in chunk]
+            try:
+                await loop.run_in_executor(self._write_thread, self._write, records)
+            except Exception as exc:
+                self._expire_snapshot()
+                for _, done in batch:
+                    if not done.done():
+                        done.set_exception(exc)
+            else:
+                # до відповіді клієнтам: наступні читання мають бачити ці записи
+                self._expire_snapshot()
+                for chunk, done in batch:
+                    if not done.done():
+                        done.set_result(len(chunk))
+
+    def _write(self, records):
+        with profiler.span("server.write", rows=len(records)):
+            self.expense_manager.add_expenses(records)
+        self.batches += 1
+        self.written += len(records)
+
+    def _validate(self, record, columns, categories):
+        """
+        Ті самі вимоги, що у вкладці "Додавання витрат": обов'язкові поля,
+        сума — скінченне число, категорія й підкатегорія — з довідника.
+        """
+        if not isinstance(record, dict):
+            raise HttpError(400, "Запис має бути об'єктом JSON")
+        unknown = set(record) - set(columns)
+        if unknown:
+            raise HttpError(400, f"Стовпців немає у файлі витрат: {', '.join(sorted(unknown))}")
+        record = {key: "" if value is None else str(value).strip() for key, value in record.items()}
+        missing = [field for field in REQUIRED_FIELDS if not record.get(field)]
+        if missing:
+            raise HttpError(400, f"Не заповнені обов'язкові поля: {', '.join(missing)}")
+        _parse_date(record["Дата"])
+        try:
+            amount = float(record["Сума"])
+        except ValueError:
+            raise HttpError(400, f"Сума має бути числом: {record['Сума']!r}") from None
+        # float() приймає і "nan", "inf" — такі суми зіпсували б підсумки
+        if not math.isfinite(amount):
+            raise HttpError(400, f"Сума має бути скінченним числом: {record['Сума']!r}")
+        if record["Підкатегорія"] not in categories.get(record["Категорія"], ()):
+            raise HttpError(400, f"Немає такої категорії: {record['Категорія']} / {record['Підкатегорія']}")
+        return record
+
+    def categories(self):
+        """
+        Довідник категорій; перечитується, якщо файл змінив інший процес.
+        """
+        signature = self._categories_signature()
+        if signature != self._categories_mtime:
+            self.category_manager.categories = self.category_manager.load_categories()
+            self._categories_mtime = signature
+        return self.category_manager.categories
+
+    def _categories_signature(self):
+        try:
+            st = os.stat(self.category_manager.json_file_path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    # ---------- Читання ----------
+
+    async def read(self, key, compute):
+        """
+        Відповідь зі знімка; якщо її ще немає — обчислюється у пулі потоків,
+        і одночасні однакові запити чекають на те саме обчислення.
+        Знімок замінюється, коли змінилась версія даних і він старший
+        за max_staleness.
+        """
+        responses = (await self._current_snapshot()).responses
+        response = responses.get(key)
+        if response is None:
+            loop = asyncio.get_running_loop()
+            response = responses[key] = loop.run_in_executor(self._readers, lambda: _dumps(compute()))
+        try:
+            return await asyncio.shield(response)
+        except Exception:
+            responses.pop(key, None)
+            raise
+
+    async def _current_snapshot(self):
+        """
+        Чинний знімок. Версія даних (для SQLite — запит до бази під її
+        блокуванням) перевіряється у пулі потоків, а не в циклі подій;
+        одночасні читання чекають на ту саму перевірку.
+        """
+        snapshot = self._snapshot
+        full = len(snapshot.responses) >= MAX_SNAPSHOT_RESPONSES
+        if time.monotonic() - snapshot.created < self.max_staleness and not full:
+            return snapshot
+        check = self._version_check
+        if check is None:
+            loop = asyncio.get_running_loop()
+            check = self._version_check = loop.run_in_executor(self._readers, self.expense_manager.data_version)
+        try:
+            version = await asyncio.shield(check)
+        finally:
+            if self._version_check is check:
+                self._version_check = None
+        # поки чекали, знімок міг замінити інший читач або скинути записувач
+        if self._snapshot is snapshot and (version != snapshot.version or full):
+            self._snapshot = Snapshot(version)
+        return self._snapshot
+
+    def _expire_snapshot(self):
+        """
+        Скидає знімок після запису через сервіс (читання бачать власні записи).
+        Перевірку версії, розпочату до запису, теж відкидаємо: вона могла
+        повернути попередню версію.
+        """
+        self._snapshot = Snapshot(None)
+        self._version_check = None
+
+    def _expenses(self, filters, offset, limit, sort_by, descending):
+        from managers.storage import frame_to_records
+
+        manager = self.expense_manager
+        with profiler.span("server.expenses") as span:
+            filters = dict(filters)
+            text = filters.pop("text", None)
+            if filters:
+                df = manager.query(**filters, text=text)
+                total = len(df)
+                if sort_by is not None:
+                    df = df.sort_values(sort_by, ascending=not descending, na_position="last", kind="stable")
+                page = df.iloc[offset:offset + limit]
+            else:
+                total = manager.count(text)
+                page = manager.get_page(offset, limit, sort_by, not descending, text=text)
+            span.rows = len(page)
+            return {"total": total, "offset": offset, "records": frame_to_records(page)}
+
+    def _reports(self, name, filters):
+        from managers.analytics import REPORTS, compute_report, compute_reports, report_to_dict
+
+        with profiler.span("server.reports"):
+            if name is not None:
+                return report_to_dict(compute_report(self.expense_manager, name, **filters))
+            reports = compute_reports(self.expense_manager, **filters)
+            return {name: report_to_dict(reports[name]) for name in REPORTS}
+
+
+# ---------- Параметри запитів ----------
+
+def _param(params, name):
+    values = params.get(name)
+    return values[-1] if values else None
+
+
+def _int_param(params, name, default):
+    value = _param(params, name)
+    if value is None:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise HttpError(400, f"Параметр {name} має бути цілим числом") from None
+    if number < 0:
+        raise HttpError(400, f"Параметр {name} не може бути від'ємним")
+    return number
+
+
+def _filters(params):
+    """
+    Фільтри запиту як аргументи ExpenseManager (лише задані).
+    """
+    filters = {}
+    for name in ("date_from", "date_to"):
+        value = _param(params, name)
+        if value:
+            filters[name] = _parse_date(value).strftime("%Y-%m-%d")
+    for name, param in (("categories", "category"), ("subcategories", "subcategory")):
+        if params.get(param):
+            filters[name] = params[param]
+    text = _param(params, "text")
+    if text and text.strip():
+        filters["text"] = text.strip()
+    return filters
+
+
+def _key(filters):
+    return tuple(sorted((name, tuple(value) if isinstance(value, list) else value)
+                        for name, value in filters.items()))
+
+
+def _parse_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            pass
+    raise HttpError(400, f"Нерозпізнана дата: {value!r} (очікується yyyy-mm-dd або dd.mm.yyyy)")
+
+
+def _parse_json(body):
+    try:
+        return json.loads(body)
+    except ValueError as exc:
+        raise HttpError(400, f"Некоректний JSON: {exc}") from None
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
+# ---------- HTTP ----------
+
+async def serve_connection(service, reader, writer):
+    """
+    HTTP/1.1 із keep-alive: запити одного з'єднання обробляються по черзі.
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            try:
+                method, target, version = request_line.decode("latin-1").split()
+            except ValueError:
+                break
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            keep_alive = (headers.get("connection", "").lower() != "close" if version == "HTTP/1.1"
+                          else headers.get("connection", "").lower() == "keep-alive")
+
+            try:
+                try:
+                    length = int(headers.get("content-length", 0))
+                except ValueError:
+                    keep_alive = False
+                    raise HttpError(400, "Некоректний Content-Length") from None
+                if length > MAX_BODY:
+                    keep_alive = False
+                    raise HttpError(413, "Завелике тіло запиту")
+                body = await reader.readexactly(length) if length else b""
+                with profiler.span(f"server.{method} {urlsplit(target).path}"):
+                    status, payload = await service.handle(method, target, body)
+            except HttpError as exc:
+                status, payload = exc.status, _dumps({"error": str(exc)})
+            except ValueError as exc:
+                status, payload = 400, _dumps({"error": str(exc)})
+            except asyncio.IncompleteReadError:
+                break
+            except Exception as exc:
+                status, payload = 500, _dumps({"error": f"{type(exc).__name__}: {exc}"})
+
+            writer.write(
+                f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + payload)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(ledger, categories_path, host, port, max_staleness=MAX_STALENESS, ready=None):
+    """
+    Відкриває менеджери й обслуговує запити до зупинки.
+    ready(адреса) викликається, коли сервер уже приймає з'єднання.
+    """
+    from managers.category_manager import CategoryManager
+    from managers.expense_manager import ExpenseManager
+
+    category_manager = CategoryManager(categories_path)
+    expense_manager = ExpenseManager(ledger, category_manager=category_manager)
+    service = ExpenseService(expense_manager, category_manager, max_staleness)
+    await service.start()
+    # перше зчитування журналу — до прийому з'єднань
+    await asyncio.get_running_loop().run_in_executor(None, expense_manager.get_expenses)
+
+    server = await asyncio.start_server(lambda r, w: serve_connection(service, r, w), host, port)
+    try:
+        address = server.sockets[0].getsockname()
+        if ready is not None:
+            ready(address)
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog="\n".join(__doc__.strip().splitlines()[1:]))
+    parser.add_argument("ledger", nargs="?", default="expenses.csv",
+                        help="журнал витрат (.csv, .parquet, .feather, .db)")
+    parser.add_argument("--categories", default="categories.json")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-staleness", type=float, default=MAX_STALENESS, metavar="С",
+                        help="скільки секунд після запису іншого процесу читання можуть бачити "
+                             "попередні дані (типово 0)")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PATH, default=None, metavar="ФАЙЛ",
+                        help=f"записувати тривалості операцій у JSONL (типово {DEFAULT_PATH})")
+    args = parser.parse_args(argv)
+    if args.profile:
+        profiler.configure(True, args.profile)
+
+    def ready(address):
+        print(f"Сервіс витрат: http://{address[0]}:{address[1]} ({args.ledger})", flush=True)
+
+    try:
+        asyncio.run(serve(args.ledger, args.categories, args.host, args.port, args.max_staleness, ready))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())